@@ -0,0 +1,212 @@
+# mock_llm_server.py
+"""
+Anthropic Messages API 대역 서버 (회의록 생성 벤치마크용)
+
+/v1/messages 요청을 받아 프롬프트의 세그먼트로 만든 결정적인 가짜 회의록을
+Anthropic과 같은 SSE 형식으로 스트리밍합니다. 첫 토큰까지의 지연과 초당 토큰 수를
+조절할 수 있어 실제 API 비용 없이 회의록 생성 처리량을 측정할 수 있습니다.
+토큰은 공백으로 나눈 단어 하나로 간주합니다.
+
+사용 예:
+    python mock_llm_server.py --port 8089 --latency 0.5 --tokens-per-second 80
+    python whisper_with_speaker_diarization.py -st -jp output/meeting.json --llm-base-url http://127.0.0.1:8089
+    curl http://127.0.0.1:8089/stats
+"""
+import re
+import json
+import time
+import zlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+SEGMENT_LINE_PATTERN = re.compile(r'^\s*\[\d+:\d+:\d+ - \d+:\d+:\d+\] ?(.*)$', re.MULTILINE)
+TOKEN_PATTERN = re.compile(r'\s*\S+|\s+')
+
+def assign_speaker(text, num_speakers=3):
+    """세그먼트 텍스트로 화자를 결정 (같은 텍스트는 항상 같은 화자)"""
+    return "ABCDEFGH"[zlib.crc32(text.encode('utf-8')) % num_speakers]
+
+def generate_fake_minutes(prompt):
+    """
+    프롬프트 종류에 맞는 가짜 회의록 생성
+
+    - 결정사항/후속 조치 요약 요청: 두 섹션만 반환
+    - 후속 배치 요청: 화자 발언만 반환
+    - 첫 번째 배치 요청: 머리말과 회의 내용 반환 (결정사항은 이후 요약 요청에서 생성)
+    - 단일 배치 요청: 머리말, 회의 내용, 결정사항, 후속 조치 모두 반환
+    """
+    footer = ("## 주요 결정사항\n- 다음 회의까지 안건을 정리한다\n- 일정은 이번 달 안에 확정한다\n\n"
+              "## 후속 조치\n- 회의 자료 공유 - 담당자: 화자 A\n- 일정 확인 - 담당자: 화자 B\n")
+    if "결정사항과 후속 조치를 다음 형식으로" in prompt:
+        return footer
+
+    turns = []
+    for text in SEGMENT_LINE_PATTERN.findall(prompt):
+        text = text.strip()
+        if text:
+            turns.append(f"**화자 {assign_speaker(text)}**: {text}")
+    body = "\n".join(turns)
+
+    if "이전 부분에서 이미" in prompt:
+        return body
+    header = "# 회의록\n날짜: 2025년 1월\n참석자: 화자 A, 화자 B, 화자 C\n주제: 정기 회의\n\n## 회의 내용\n"
+    if "첫 번째 부분" in prompt:
+        return header + body
+    return header + body + "\n\n" + footer
+
+def extract_prompt(body):
+    """요청 본문의 마지막 사용자 메시지 텍스트"""
+    content = body["messages"][-1]["content"]
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content)
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.5, tokens_per_second=80, chunk_tokens=8):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.chunk_tokens = chunk_tokens
+        self.requests = 0
+        self.bytes_sent = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self._lock = threading.Lock()
+        super().__init__(address, MockLLMHandler)
+
+    def record(self, input_tokens, output_tokens, bytes_sent):
+        with self._lock:
+            self.requests += 1
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+            self.bytes_sent += bytes_sent
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "bytes": self.bytes_sent,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+            }
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/stats":
+            self.send_error(404)
+            return
+        self.send_json(self.server.stats())
+
+    def do_POST(self):
+        if self.path.split("?")[0] != "/v1/messages":
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        prompt = extract_prompt(body)
+        input_tokens = len(TOKEN_PATTERN.findall(prompt))
+
+        tokens = TOKEN_PATTERN.findall(generate_fake_minutes(prompt))
+        stop_reason = "end_turn"
+        if len(tokens) > body.get("max_tokens", 4096):
+            tokens = tokens[:body["max_tokens"]]
+            stop_reason = "max_tokens"
+
+        message = {
+            "id": f"msg_mock_{self.server.requests + 1}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "mock"),
+            "content": [],
+            "stop_reason": None,
+            "stop_sequence": None,
+            "usage": {"input_tokens": input_tokens, "output_tokens": 0},
+        }
+        time.sleep(self.server.latency)
+
+        if not body.get("stream"):
+            message.update(content=[{"type": "text", "text": "".join(tokens)}], stop_reason=stop_reason,
+                           usage={"input_tokens": input_tokens, "output_tokens": len(tokens)})
+            sent = self.send_json(message)
+            self.server.record(input_tokens, len(tokens), sent)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        sent = self.send_event("message_start", {"type": "message_start", "message": message})
+        sent += self.send_event("content_block_start", {
+            "type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}})
+
+        # 초당 토큰 수에 맞춰 chunk_tokens개씩 내보냄
+        start = time.time()
+        step = self.server.chunk_tokens
+        for i in range(0, len(tokens), step):
+            if self.server.tokens_per_second > 0:
+                delay = start + i / self.server.tokens_per_second - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+            sent += self.send_event("content_block_delta", {
+                "type": "content_block_delta", "index": 0,
+                "delta": {"type": "text_delta", "text": "".join(tokens[i:i + step])}})
+
+        sent += self.send_event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        sent += self.send_event("message_delta", {
+            "type": "message_delta", "delta": {"stop_reason": stop_reason, "stop_sequence": None},
+            "usage": {"output_tokens": len(tokens)}})
+        sent += self.send_event("message_stop", {"type": "message_stop"})
+        self.server.record(input_tokens, len(tokens), sent)
+
+    def send_event(self, event, data):
+        payload = f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode('utf-8')
+        self.wfile.write(payload)
+        self.wfile.flush()
+        return len(payload)
+
+    def send_json(self, data):
+        payload = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        return len(payload)
+
+    def log_message(self, format, *args):
+        pass  # 요청마다 로그를 남기지 않음
+
+def start_mock_server(host="127.0.0.1", port=0, **options):
+    """백그라운드 스레드에서 대역 서버 시작 (port=0이면 빈 포트 사용)"""
+    server = MockLLMServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Anthropic Messages API 대역 서버 (가짜 회의록 스트리밍)")
+    parser.add_argument("--host", default="127.0.0.1", help="바인드 주소 (기본값: 127.0.0.1)")
+    parser.add_argument("--port", "-p", type=int, default=8089, help="포트 (기본값: 8089)")
+    parser.add_argument("--latency", type=float, default=0.5,
+                        help="첫 토큰까지의 지연(초) (기본값: 0.5)")
+    parser.add_argument("--tokens-per-second", type=float, default=80,
+                        help="초당 출력 토큰 수, 0이면 제한 없음 (기본값: 80)")
+    parser.add_argument("--chunk-tokens", type=int, default=8,
+                        help="SSE 이벤트 하나에 담을 토큰 수 (기본값: 8)")
+    args = parser.parse_args()
+
+    server = MockLLMServer((args.host, args.port), args.latency, args.tokens_per_second, args.chunk_tokens)
+    print(f"\n🚀 LLM 대역 서버 시작: http://{args.host}:{args.port} "
+          f"(지연 {args.latency}초, 초당 {args.tokens_per_second:g} 토큰)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n서버를 종료합니다.")
+    finally:
+        stats = server.stats()
+        print(f"처리한 요청: {stats['requests']}건, 전송: {stats['bytes'] / 1024:.1f}KB")
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -10,13 +10,20 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 import os
+import time
 from datetime import datetime
 from voc_processor import (
-    generate_monthly_data,
-    save_monthly_data,
-    load_all_monthly_data,
+    load_month_index,
+    load_monthly_data,
+    delete_monthly_data,
+    month_index_path,
+    month_path,
+    counts_index_path,
+    load_count_table,
+    get_month_key,
     CATEGORY_COLORS
 )
+from voc_jobs import JobRunner, QUEUED, RUNNING, DONE, CANCELLED, FAILED
 
 # 페이지 설정
 st.set_page_config(
@@ -420,13 +427,184 @@ LIGHT_THEME_CSS = """
 # 라이트 모드 CSS 적용
 st.markdown(LIGHT_THEME_CSS, unsafe_allow_html=True)
 
+
+def file_mtime(path):
+    """캐시 무효화용 파일 수정 시각 (파일이 없으면 0)"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+# 저장 파일의 수정 시각을 캐시 키에 넣어 파일이 바뀌면 다시 읽음
+@st.cache_data(show_spinner=False)
+def cached_month_index(data_dir, mtime):
+    return load_month_index(data_dir)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_monthly_data(month_key, data_dir, mtime):
+    return load_monthly_data(month_key, data_dir)
+
+
+def get_month_index(data_dir='data'):
+    """저장된 월 목록 (목록 파일이 바뀌지 않았으면 캐시 사용)"""
+    return cached_month_index(data_dir, file_mtime(month_index_path(data_dir)))
+
+
+def get_monthly_data(month_key, data_dir='data'):
+    """한 달 데이터 (월 파일이 바뀌지 않았으면 캐시 사용)"""
+    return cached_monthly_data(month_key, data_dir, file_mtime(month_path(month_key, data_dir)))
+
+
+@st.cache_resource
+def get_job_runner():
+    """세션 간에 공유하는 대시보드 생성 작업 실행기"""
+    return JobRunner(data_dir='data')
+
+
+@st.cache_data(show_spinner=False)
+def cached_count_table(data_dir, mtime):
+    return load_count_table(data_dir)
+
+
+def get_count_table(data_dir='data'):
+    """월/국가/역할/RFM/대분류별 건수 표 (건수 집계 파일이 바뀌지 않았으면 캐시 사용)"""
+    return cached_count_table(data_dir, file_mtime(counts_index_path(data_dir)))
+
+
+def clear_dashboard_cache():
+    """데이터 저장/삭제 후 목록, 월 데이터, 건수 집계, 차트 캐시 비우기"""
+    cached_month_index.clear()
+    cached_monthly_data.clear()
+    cached_count_table.clear()
+    build_segment_figure.clear()
+    build_trend_figure.clear()
+
+
+def select_counts(count_table, country, role, rfm=None):
+    """
+    국가/역할(/RFM)로 건수 표를 걸러 월별로 합산
+
+    Returns:
+        (Series, DataFrame): 월별 전체 건수, 월 × 대분류 건수
+    """
+    table = count_table[(count_table['country'] == country) & (count_table['role'] == role)]
+    if rfm is not None:
+        table = table[table['rfm'] == rfm]
+    totals = table[table['category'].isna()].groupby('month')['count'].sum()
+    by_category = (table[table['category'].notna()]
+                   .pivot_table(index='month', columns='category', values='count', aggfunc='sum', fill_value=0)
+                   .reindex(totals.index, fill_value=0))
+    return totals, by_category
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def build_trend_figure(country, role, rfm, data_dir, mtime):
+    """국가/역할/RFM별 월별 건수 추이 차트 (건수 집계 파일 수정 시각이 같으면 캐시 사용)"""
+    totals, by_category = select_counts(cached_count_table(data_dir, mtime), country, role, rfm)
+
+    fig = make_subplots(specs=[[{'secondary_y': True}]])
+    fig.add_trace(go.Bar(
+        x=totals.index, y=totals.values, name='전체 건수',
+        marker=dict(color='rgba(255,102,0,0.15)'),
+        hovertemplate='<b>%{x}</b><br>전체: %{y:,}건<extra></extra>'
+    ), secondary_y=True)
+
+    # 기간 전체 건수가 많은 대분류부터 표시
+    for category in by_category.sum().sort_values(ascending=False).index:
+        fig.add_trace(go.Scatter(
+            x=by_category.index, y=by_category[category], name=category, mode='lines+markers',
+            line=dict(color=CATEGORY_COLORS.get(category, '#CCCCCC'), width=2),
+            hovertemplate=f'<b>{category}</b><br>%{{x}}: %{{y:,}}건<extra></extra>'
+        ), secondary_y=False)
+
+    # 레이아웃 설정 (라이트 모드)
+    fig.update_layout(
+        height=500,
+        paper_bgcolor='#FFFFFF',
+        plot_bgcolor='#FFFFFF',
+        font=dict(color='#333333'),
+        legend=dict(orientation='h', y=-0.15),
+        xaxis=dict(type='category')
+    )
+    fig.update_yaxes(title_text='대분류 건수', secondary_y=False)
+    fig.update_yaxes(title_text='전체 건수', secondary_y=True, showgrid=False)
+    return fig
+
+
+def month_over_month(totals, by_category, month):
+    """기준 월과 그 이전 저장 월의 대분류별 건수 증감 표"""
+    months = list(totals.index)
+    previous = months[months.index(month) - 1]
+    current_counts = pd.concat([pd.Series({'전체': totals[month]}), by_category.loc[month]])
+    previous_counts = pd.concat([pd.Series({'전체': totals[previous]}), by_category.loc[previous]])
+
+    delta = pd.DataFrame({
+        '대분류': current_counts.index,
+        month: current_counts.values,
+        previous: previous_counts.values,
+    })
+    delta['증감'] = delta[month] - delta[previous]
+    delta['증감률(%)'] = (delta['증감'] / delta[previous].where(delta[previous] > 0) * 100).round(1)
+    # 전체 행을 맨 위에 두고 나머지는 이번 달 건수 순
+    return pd.concat([delta.iloc[:1], delta.iloc[1:].sort_values(month, ascending=False)], ignore_index=True)
+
+
+def add_category_pie(fig, categories, col):
+    """대분류별 건수 파이 차트를 subplot 한 칸에 추가"""
+    labels = list(categories.keys())
+    values = [categories[cat]['count'] for cat in labels]
+    colors = [CATEGORY_COLORS.get(cat, '#CCCCCC') for cat in labels]
+
+    fig.add_trace(go.Pie(
+        labels=labels,
+        values=values,
+        marker=dict(colors=colors, line=dict(color='white', width=2)),
+        textinfo='label+percent',
+        textposition='auto',
+        hovertemplate='<b>%{label}</b><br>건수: %{value}<br>비율: %{percent}<extra></extra>',
+        hole=0.3
+    ), row=1, col=col)
+
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def build_segment_figure(month_key, rfm, data_dir, mtime):
+    """(월 키, RFM)별 DJ/Listener 파이 차트 (월 파일 수정 시각이 같으면 캐시 사용)"""
+    segment_data = cached_monthly_data(month_key, data_dir, mtime)['rfm_segments'][rfm]
+
+    fig = make_subplots(
+        rows=1, cols=2,
+        subplot_titles=('DJ', 'Listener'),
+        specs=[[{'type': 'pie'}, {'type': 'pie'}]],
+        horizontal_spacing=0.1
+    )
+
+    # DJ 파이 차트
+    if segment_data['dj_categories']:
+        add_category_pie(fig, segment_data['dj_categories'], col=1)
+
+    # Listener 파이 차트
+    if segment_data['listener_categories']:
+        add_category_pie(fig, segment_data['listener_categories'], col=2)
+
+    # 레이아웃 설정 (라이트 모드)
+    fig.update_layout(
+        height=600,
+        showlegend=False,
+        paper_bgcolor='#FFFFFF',
+        plot_bgcolor='#FFFFFF',
+        font=dict(color='#333333')
+    )
+    return fig
+
 # 사이드바 - 설정
 with st.sidebar:
     st.title("📊 VOC Dashboard")
 
     # 저장된 월 목록 표시
-    all_data = load_all_monthly_data('data')
-    months = list(all_data.get('months', {}).keys())
+    month_index = get_month_index('data')
+    months = list(month_index['months'].keys())
 
     if months:
         st.success(f"📅 저장된 월: {len(months)}개")
@@ -437,10 +615,10 @@ with st.sidebar:
         st.info("📅 저장된 월이 없습니다")
 
 # 메인 화면 - 탭 (대시보드 보기가 기본)
-tab1, tab2 = st.tabs(["📊 대시보드 보기", "📤 파일 업로드"])
+tab1, tab2, tab3 = st.tabs(["📊 대시보드 보기", "📈 월별 추이", "📤 파일 업로드"])
 
-# 탭 2: 파일 업로드 (관리자 전용)
-with tab2:
+# 탭 3: 파일 업로드 (관리자 전용)
+with tab3:
     st.header("📤 월별 VOC 데이터 업로드")
     
     # 관리자 접근 패스워드 (st.secrets 또는 환경변수에서 로드)
@@ -523,6 +701,13 @@ with tab2:
             key="file_password_input"
         )
 
+        # 복호화된 워크북 캐시 사용 여부
+        use_workbook_cache = st.checkbox(
+            "⚡ 복호화된 파일 캐시 사용",
+            help="같은 파일을 다시 처리할 때 Excel 파싱을 건너뜁니다.\n캐시는 파일 비밀번호로 암호화되어 data/workbook_cache에 저장됩니다.",
+            key="workbook_cache_checkbox"
+        )
+
         # OpenAI API Key 입력
         api_key = st.text_input(
             "🔑 OpenAI API Key",
@@ -532,7 +717,7 @@ with tab2:
         )
 
         # 기존 데이터 확인
-        existing_data = load_all_monthly_data('data')
+        existing_data = get_month_index('data')
         # 국가별 키 형식으로 확인
         if selected_month and selected_month.strip():
             country_suffix = "_JP" if is_japan else "_KR"
@@ -542,11 +727,10 @@ with tab2:
             if month_exists:
                 st.warning(f"⚠️ {selected_month.strip()} 데이터가 이미 존재합니다. 생성하면 기존 데이터를 덮어씁니다!")
 
-        # 처리 상태 관리
-        if 'processing' not in st.session_state:
-            st.session_state.processing = False
-        if 'cancelled' not in st.session_state:
-            st.session_state.cancelled = False
+        # 처리 상태 관리 (생성 작업은 백그라운드에서 실행되고 화면은 상태만 조회)
+        job_runner = get_job_runner()
+        job = job_runner.get(st.session_state.get('job_id'))
+        st.session_state.processing = job is not None and job['status'] in (QUEUED, RUNNING)
 
         # 생성/취소 버튼
         col_btn1, col_btn2 = st.columns([3, 1])
@@ -556,10 +740,32 @@ with tab2:
         
         with col_btn2:
             if st.button("🛑 취소", type="secondary", use_container_width=True, disabled=not st.session_state.processing):
-                st.session_state.cancelled = True
-                st.session_state.processing = False
-                st.warning("⚠️ 처리가 취소되었습니다.")
+                job_runner.cancel(job['id'])
+                st.rerun()
+
+        # 작업 진행 상황
+        if job is not None:
+            if job['status'] in (QUEUED, RUNNING):
+                progress_text = f"🤖 {job['month']} {job['stage']}"
+                if job['total']:
+                    progress_text += f" - 요약 {job['done']}/{job['total']}건 ({job['label']})"
+                st.progress(job['done'] / job['total'] if job['total'] else 0.0, text=progress_text)
+                st.caption("💡 처리는 백그라운드에서 진행됩니다. 취소하면 진행 중인 요약 요청이 끝난 뒤 멈춥니다.")
+            elif job['status'] == DONE:
+                job_runner.forget(job['id'])
+                st.session_state.job_id = None
+                clear_dashboard_cache()
+
+                # 성공 상태 저장 및 입력값 초기화
+                st.session_state.upload_success = True
+                st.session_state.success_month = job['month']
+                st.session_state.clear_inputs = True
                 st.rerun()
+            elif job['status'] == CANCELLED:
+                st.warning(f"⚠️ 처리가 취소되었습니다. (요약 {job['done']}/{job['total']}건 완료)\n\n"
+                           "💡 같은 파일로 다시 생성하면 완료된 요약은 캐시에서 불러오고 남은 요약부터 이어서 진행합니다.")
+            elif job['status'] == FAILED:
+                st.error(f"❌ 오류 발생: {job['error']}")
 
         st.divider()
         
@@ -604,10 +810,8 @@ with tab2:
                     with col2:
                         if st.button("삭제", type="primary", use_container_width=True):
                             # 데이터 삭제
-                            del existing_data['months'][month_to_delete]
-                            with open('data/monthly_data.json', 'w', encoding='utf-8') as f:
-                                import json
-                                json.dump(existing_data, f, ensure_ascii=False, indent=2)
+                            delete_monthly_data(month_to_delete, 'data')
+                            clear_dashboard_cache()
                             st.session_state.confirm_delete = None
                             st.session_state.delete_success = month_to_delete
                             st.rerun()
@@ -635,66 +839,32 @@ with tab2:
                 import re
                 if not re.match(r'^\d{4}-\d{2}$', selected_month.strip()):
                     st.error("⚠️ 월 형식이 올바르지 않습니다. YYYY-MM 형식으로 입력하세요 (예: 2025-11)")
+                elif job_runner.active_job(get_month_key(selected_month.strip(), is_japan)) is not None:
+                    st.error("⚠️ 같은 월 데이터를 생성하는 작업이 이미 진행 중입니다.")
                 else:
-                    st.session_state.processing = True
-                    st.session_state.cancelled = False
-                    
-                    try:
-                        # 임시 파일로 저장
-                        temp_path = f"temp_{uploaded_file.name}"
-                        with open(temp_path, "wb") as f:
-                            f.write(uploaded_file.getvalue())
-
-                        # 진행 상태 표시
-                        progress_placeholder = st.empty()
-                        progress_placeholder.info(f"🤖 {selected_month.strip()} 데이터 처리 중... (AI 요약 생성 중)\n\n💡 취소하려면 위의 '취소' 버튼을 누르거나 페이지를 새로고침하세요.")
-                        
-                        with st.spinner("처리 중..."):
-                            # 월별 데이터 생성
-                            monthly_data = generate_monthly_data(
-                                temp_path,
-                                selected_month.strip(),
-                                api_key,
-                                file_password,
-                                is_japan
-                            )
-
-                            # 취소 확인
-                            if st.session_state.cancelled:
-                                raise Exception("사용자가 처리를 취소했습니다.")
-
-                            # 데이터 저장
-                            save_monthly_data(monthly_data, 'data')
-
-                        # 임시 파일 삭제
-                        os.remove(temp_path)
-                        
-                        st.session_state.processing = False
-                        progress_placeholder.empty()
-
-                        # 성공 상태 저장 및 입력값 초기화
-                        st.session_state.upload_success = True
-                        st.session_state.success_month = selected_month.strip()
-                        
-                        # 입력값 초기화를 위한 플래그
-                        st.session_state.clear_inputs = True
-
-                        # 페이지 리로드
-                        st.rerun()
-
-                    except Exception as e:
-                        st.session_state.processing = False
-                        st.error(f"❌ 오류 발생: {e}")
-                        if 'temp_path' in locals() and os.path.exists(temp_path):
-                            os.remove(temp_path)
+                    # 임시 파일로 저장 (작업이 끝나면 작업 스레드가 삭제)
+                    temp_path = f"temp_{datetime.now():%Y%m%d%H%M%S%f}_{uploaded_file.name}"
+                    with open(temp_path, "wb") as f:
+                        f.write(uploaded_file.getvalue())
+
+                    # 월별 데이터 생성 작업 제출
+                    st.session_state.job_id = job_runner.submit(
+                        temp_path,
+                        selected_month.strip(),
+                        api_key,
+                        file_password,
+                        is_japan,
+                        workbook_cache_dir='data/workbook_cache' if use_workbook_cache else None
+                    )
+                    st.rerun()
 
 # 탭 1: 대시보드 보기 (기본 탭)
 with tab1:
     st.header("📊 VOC Dashboard")
 
     # 저장된 데이터 로드
-    all_data = load_all_monthly_data('data')
-    all_months_data = all_data.get('months', {})
+    month_index = get_month_index('data')
+    all_months_data = month_index['months']
 
     if not all_months_data:
         st.warning("⚠️ 저장된 월별 데이터가 없습니다. '파일 업로드' 탭에서 데이터를 먼저 업로드하세요.")
@@ -744,7 +914,7 @@ with tab1:
                 )
 
             # 선택한 월 데이터
-            month_data = all_data['months'][selected_display_month]
+            month_data = get_monthly_data(selected_display_month, 'data')
 
             # RFM 세그먼트 선택
             rfm_segments = list(month_data['rfm_segments'].keys())
@@ -772,53 +942,10 @@ with tab1:
 
                 st.divider()
 
-                # 차트 생성
-                fig = make_subplots(
-                    rows=1, cols=2,
-                    subplot_titles=('DJ', 'Listener'),
-                    specs=[[{'type': 'pie'}, {'type': 'pie'}]],
-                    horizontal_spacing=0.1
-                )
-
-                # DJ 파이 차트
-                if segment_data['dj_categories']:
-                    dj_categories = list(segment_data['dj_categories'].keys())
-                    dj_values = [segment_data['dj_categories'][cat]['count'] for cat in dj_categories]
-                    dj_colors = [CATEGORY_COLORS.get(cat, '#CCCCCC') for cat in dj_categories]
-
-                    fig.add_trace(go.Pie(
-                        labels=dj_categories,
-                        values=dj_values,
-                        marker=dict(colors=dj_colors, line=dict(color='white', width=2)),
-                        textinfo='label+percent',
-                        textposition='auto',
-                        hovertemplate='<b>%{label}</b><br>건수: %{value}<br>비율: %{percent}<extra></extra>',
-                        hole=0.3
-                    ), row=1, col=1)
-
-                # Listener 파이 차트
-                if segment_data['listener_categories']:
-                    listener_categories = list(segment_data['listener_categories'].keys())
-                    listener_values = [segment_data['listener_categories'][cat]['count'] for cat in listener_categories]
-                    listener_colors = [CATEGORY_COLORS.get(cat, '#CCCCCC') for cat in listener_categories]
-
-                    fig.add_trace(go.Pie(
-                        labels=listener_categories,
-                        values=listener_values,
-                        marker=dict(colors=listener_colors, line=dict(color='white', width=2)),
-                        textinfo='label+percent',
-                        textposition='auto',
-                        hovertemplate='<b>%{label}</b><br>건수: %{value}<br>비율: %{percent}<extra></extra>',
-                        hole=0.3
-                    ), row=1, col=2)
-
-                # 레이아웃 설정 (라이트 모드)
-                fig.update_layout(
-                    height=600,
-                    showlegend=False,
-                    paper_bgcolor='#FFFFFF',
-                    plot_bgcolor='#FFFFFF',
-                    font=dict(color='#333333')
+                # 차트 생성 (월/RFM별로 캐시)
+                fig = build_segment_figure(
+                    selected_display_month, selected_rfm, 'data',
+                    file_mtime(month_path(selected_display_month, 'data'))
                 )
 
                 st.plotly_chart(fig, use_container_width=True)
@@ -907,6 +1034,74 @@ with tab1:
                         listener_total_height += 30 + (lines * 28)  # 패딩 + 줄 높이
                     components.html(listener_html, height=listener_total_height, scrolling=False)
 
+# 탭 2: 월별 추이 (건수 집계만 사용하고 월별 파일/요약은 읽지 않음)
+with tab2:
+    st.header("📈 월별 추이")
+
+    count_table = get_count_table('data')
+
+    if count_table.empty:
+        st.warning("⚠️ 저장된 월별 데이터가 없습니다. '파일 업로드' 탭에서 데이터를 먼저 업로드하세요.")
+    else:
+        col_country, col_role, col_rfm = st.columns(3)
+
+        with col_country:
+            trend_country = st.selectbox(
+                "🌏 국가 선택",
+                options=["🇰🇷 한국", "🇯🇵 일본"],
+                key="trend_country"
+            )
+        with col_role:
+            trend_role = st.selectbox(
+                "👥 역할 선택",
+                options=["DJ", "Listener"],
+                key="trend_role"
+            )
+
+        country = "JP" if trend_country == "🇯🇵 일본" else "KR"
+        role = trend_role.lower()
+        country_table = count_table[count_table['country'] == country]
+
+        if country_table.empty:
+            country_name = "일본" if country == "JP" else "한국"
+            st.warning(f"⚠️ {country_name} 데이터가 없습니다. '파일 업로드' 탭에서 데이터를 먼저 업로드하세요.")
+        else:
+            with col_rfm:
+                trend_rfm = st.selectbox(
+                    "RFM 세그먼트 선택",
+                    options=["전체"] + sorted(country_table['rfm'].unique()),
+                    key="trend_rfm"
+                )
+            rfm = None if trend_rfm == "전체" else trend_rfm
+
+            mtime = file_mtime(counts_index_path('data'))
+            st.plotly_chart(build_trend_figure(country, role, rfm, 'data', mtime), use_container_width=True)
+            st.caption("💡 이전 버전에서 생성한 월은 세그먼트별 상위 5개 대분류 건수만 포함합니다. 해당 월을 다시 생성하면 전체 대분류가 반영됩니다.")
+
+            st.divider()
+
+            # 전월 대비 증감
+            st.subheader("📊 전월 대비 증감")
+            totals, by_category = select_counts(count_table, country, role, rfm)
+            if len(totals) < 2:
+                st.info("📅 2개월 이상 저장되어 있어야 전월 대비 증감을 볼 수 있습니다.")
+            else:
+                delta_month = st.selectbox(
+                    "📅 기준 월",
+                    options=list(totals.index[1:])[::-1],
+                    key="trend_delta_month"
+                )
+                st.dataframe(
+                    month_over_month(totals, by_category, delta_month),
+                    use_container_width=True,
+                    hide_index=True
+                )
+
 # Footer
 st.divider()
 st.caption("✨ Thanks to Claude Code, Cursor, and OpenAI GPT-4o-mini")
+
+# 생성 작업이 진행 중이면 잠시 후 다시 실행해 진행 상황 갱신
+if st.session_state.get('processing'):
+    time.sleep(1)
+    st.rerun()
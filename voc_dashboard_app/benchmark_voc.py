@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+VOC 데이터 처리 성능 측정 도구
+
+사용 예:
+    python benchmark_voc.py rfm --rows 300000
+    python benchmark_voc.py templates --rows 100000
+"""
+
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+import voc_processor as vp
+
+CATEGORIES = ['아이템스토어', '구독', '베리', '랭킹', '이벤트', '커뮤니티', '앱 설정', '개인정보',
+              '라이브', '계정 관리', '스푼 결제', '스푼 환전', '경고', '반려']
+
+
+def generate_synthetic_voc(rows, seed=0):
+    """
+    원본 Excel과 같은 열 구성의 합성 VOC 데이터 생성
+
+    점수에는 경계값과 함께 NaN, 3.5, 7.5 같은 소수 점수를 섞어 분류 경계를 검증할 수 있게 합니다.
+    """
+    rng = np.random.default_rng(seed)
+
+    def scores(max_score):
+        values = rng.integers(0, max_score + 1, rows).astype(float)
+        values[rng.random(rows) < 0.05] = np.nan
+        odd = rng.random(rows) < 0.03
+        values[odd] = rng.choice([1.5, 3.5, 4.5, 7.5, 10.5, -1], odd.sum())
+        return values
+
+    contents = [f"본문 {i % 997} 내용입니다. " * (1 + i % 4) for i in range(rows)]
+    template_rows = rng.random(rows) < 0.3
+    templates = rng.choice(vp.TEMPLATE_TEXTS_KR, rows)
+    contents = [f"{template}\n{content}" if use else content
+                for use, template, content in zip(template_rows, templates, contents)]
+
+    return pd.DataFrame({
+        'djScoreR': scores(5),
+        'djScoreF': scores(10),
+        'djScoreM2': scores(10),
+        'listenerScoreR': scores(5),
+        'listenerScoreF': scores(10),
+        'listenerScoreM2': scores(10),
+        '대분류': [f" {category}" for category in rng.choice(CATEGORIES, rows)],
+        '문의 제목': [f"제목 {i % 311}" for i in range(rows)],
+        '문의 내용': contents,
+    })
+
+
+def legacy_rfm_columns(df):
+    """행마다 분류 함수를 호출하고 문자열을 이어 붙이던 기존 방식"""
+    df['DJ_R'] = df['djScoreR'].apply(vp.classify_r_score)
+    df['DJ_F'] = df['djScoreF'].apply(vp.classify_fm_score)
+    df['DJ_M'] = df['djScoreM2'].apply(vp.classify_fm_score)
+    df['DJ_RFM'] = df['DJ_R'] + df['DJ_F'] + df['DJ_M']
+
+    df['Listener_R'] = df['listenerScoreR'].apply(vp.classify_r_score)
+    df['Listener_F'] = df['listenerScoreF'].apply(vp.classify_fm_score)
+    df['Listener_M'] = df['listenerScoreM2'].apply(vp.classify_fm_score)
+    df['Listener_RFM'] = df['Listener_R'] + df['Listener_F'] + df['Listener_M']
+
+
+def vectorized_rfm_columns(df):
+    vp.add_rfm_columns(df, 'DJ', 'djScoreR', 'djScoreF', 'djScoreM2')
+    vp.add_rfm_columns(df, 'Listener', 'listenerScoreR', 'listenerScoreF', 'listenerScoreM2')
+
+
+def benchmark_rfm(args):
+    """기존 apply 방식과 벡터화 방식의 RFM 분류 시간 및 메모리 비교"""
+    base = generate_synthetic_voc(args.rows)
+    rfm_columns = [f'{prefix}_{suffix}' for prefix in ('DJ', 'Listener') for suffix in ('R', 'F', 'M', 'RFM')]
+    print(f"\n합성 VOC: {args.rows:,}건")
+
+    results = {}
+    for name, func in (('apply', legacy_rfm_columns), ('vectorized', vectorized_rfm_columns)):
+        best = None
+        for _ in range(args.repeat):
+            df = base.copy()
+            start = time.perf_counter()
+            func(df)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        memory = df[rfm_columns].memory_usage(deep=True, index=False).sum()
+        results[name] = (best, memory, df[rfm_columns])
+
+    legacy = results['apply'][2]
+    vectorized = results['vectorized'][2].astype(str)
+    if not legacy.equals(vectorized):
+        mismatched = [column for column in rfm_columns if not legacy[column].equals(vectorized[column])]
+        raise SystemExit(f"❌ 분류 결과 불일치: {mismatched}")
+    print("✅ 두 방식의 분류 결과 일치")
+
+    print(f"\n{'방식':>12} {'시간(초)':>10} {'메모리(MB)':>12}")
+    for name, (elapsed, memory, _) in results.items():
+        print(f"{name:>12} {elapsed:>10.3f} {memory / 1024 / 1024:>12.1f}")
+    speedup = results['apply'][0] / results['vectorized'][0]
+    print(f"\n속도 향상: {speedup:.1f}배, 메모리 {results['apply'][1] / results['vectorized'][1]:.1f}배 절감")
+
+
+def legacy_remove_template_text(text, is_japan=False):
+    """템플릿마다 정규화와 str.replace를 반복하던 기존 방식"""
+    if pd.isna(text):
+        return ""
+    text = str(text).replace('\r\n', '\n')
+
+    templates = vp.TEMPLATE_TEXTS_JP if is_japan else vp.TEMPLATE_TEXTS_KR
+    for template in templates:
+        template_normalized = template.replace('\r\n', '\n')
+        text = text.replace(template_normalized, "")
+
+    return text.strip()
+
+
+def generate_template_edge_cases(is_japan, count=2000, seed=1):
+    """템플릿 조각을 섞어 겹침/제거 후 새로 생기는 일치 등 경계 상황을 만드는 문의 내용"""
+    rng = np.random.default_rng(seed)
+    templates = vp.TEMPLATE_TEXTS_JP if is_japan else vp.TEMPLATE_TEXTS_KR
+    cases = [np.nan, "", "\r\n".join(templates)]
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.integers(1, 5)):
+            template = templates[rng.integers(len(templates))]
+            cut = sorted(rng.integers(0, len(template) + 1, 2))
+            kind = rng.integers(4)
+            if kind == 0:
+                parts.append(template)
+            elif kind == 1:
+                parts.append(template[:cut[1]])
+            elif kind == 2:
+                # 다른 템플릿이 제거되면 이어지는 앞/뒤 조각
+                other = templates[rng.integers(len(templates))]
+                parts.append(template[:cut[0]] + other + template[cut[0]:])
+            else:
+                parts.append("본문 내용")
+        cases.append(("\r\n" if rng.random() < 0.3 else "").join(parts))
+    return pd.Series(cases, dtype=object)
+
+
+def benchmark_templates(args):
+    """안내 문구 제거: 템플릿별 순차 str.replace vs 미리 컴파일한 매처(열 단위)"""
+    for is_japan in (False, True):
+        edge_cases = generate_template_edge_cases(is_japan)
+        expected = [legacy_remove_template_text(text, is_japan) for text in edge_cases]
+        if vp.remove_template_texts(edge_cases, is_japan).tolist() != expected:
+            raise SystemExit(f"❌ 경계 사례 결과 불일치 (is_japan={is_japan})")
+    print("✅ 경계 사례(겹침, 제거 후 새로 생기는 일치, NaN, \\r\\n) 결과 일치")
+
+    contents = generate_synthetic_voc(args.rows)['문의 내용']
+    print(f"\n합성 문의 내용: {args.rows:,}건")
+
+    start = time.perf_counter()
+    legacy = contents.apply(legacy_remove_template_text)
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bulk = vp.remove_template_texts(contents)
+    bulk_elapsed = time.perf_counter() - start
+
+    if not legacy.equals(bulk):
+        raise SystemExit("❌ 제거 결과 불일치")
+    print("✅ 두 방식의 제거 결과 일치")
+    print(f"\n{'방식':>12} {'시간(초)':>10}")
+    print(f"{'replace':>12} {legacy_elapsed:>10.3f}")
+    print(f"{'matcher':>12} {bulk_elapsed:>10.3f}")
+    print(f"\n속도 향상: {legacy_elapsed / bulk_elapsed:.1f}배")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VOC 데이터 처리 벤치마크")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rfm_parser = subparsers.add_parser("rfm", help="RFM 분류: 기존 apply 방식 vs 벡터화")
+    rfm_parser.add_argument("--rows", type=int, default=300000, help="합성 VOC 건수 (기본값: 300000)")
+    rfm_parser.add_argument("--repeat", type=int, default=3, help="반복 측정 횟수, 최솟값 사용 (기본값: 3)")
+    rfm_parser.set_defaults(func=benchmark_rfm)
+
+    templates_parser = subparsers.add_parser("templates", help="안내 문구 제거: 순차 replace vs 컴파일된 매처")
+    templates_parser.add_argument("--rows", type=int, default=100000, help="합성 VOC 건수 (기본값: 100000)")
+    templates_parser.set_defaults(func=benchmark_templates)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+VOC 월별 데이터 일괄 생성 (Streamlit 없이 실행)
+
+여러 (파일, 월, 국가) 작업을 받아 복호화/파싱은 프로세스 풀에서 병렬로 하고,
+AI 요약은 모든 작업이 요약기 하나(동시 요청 풀과 요약 캐시)를 함께 씁니다.
+모든 달을 만든 뒤 한 번에 저장하고 처리량을 요약해 출력합니다.
+
+사용 예:
+    python voc_batch.py 2025-01.xlsx:2025-01 2025-02.xlsx:2025-02 jp_2025-01.xlsx:2025-01:JP
+    python voc_batch.py --manifest backfill.csv --parse-workers 4
+    (manifest CSV 열: file,month,country — country는 KR 또는 JP, 비우면 KR)
+
+비밀번호와 API 키는 --password/--api-key 또는 EXCEL_PASSWORD/OPENAI_API_KEY 환경변수로 전달합니다.
+"""
+
+import os
+import re
+import csv
+import sys
+import time
+import uuid
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from voc_processor import (
+    SUMMARY_MAX_WORKERS,
+    SUMMARY_SAMPLE_TOKEN_BUDGET,
+    VOCSummarizer,
+    build_monthly_data,
+    get_month_key,
+    get_summary_cache,
+    load_excel_file,
+    save_monthly_data_batch,
+)
+
+MONTH_PATTERN = re.compile(r'^\d{4}-\d{2}$')
+
+
+def parse_job(spec):
+    """'파일:월[:국가]' 형식의 작업을 (파일, 월, 일본 여부)로 변환"""
+    parts = spec.rsplit(':', 2)
+    if len(parts) == 3 and parts[2].upper() in ('KR', 'JP'):
+        file_path, month, country = parts
+    else:
+        file_path, month = spec.rsplit(':', 1) if ':' in spec else (spec, '')
+        country = 'KR'
+    return make_job(file_path, month, country)
+
+
+def make_job(file_path, month, country='KR'):
+    month = month.strip()
+    country = (country or 'KR').strip().upper()
+    if not MONTH_PATTERN.match(month):
+        raise ValueError(f"월 형식이 올바르지 않습니다 (YYYY-MM): {month!r} ({file_path})")
+    if country not in ('KR', 'JP'):
+        raise ValueError(f"국가는 KR 또는 JP여야 합니다: {country!r} ({file_path})")
+    if not os.path.exists(file_path):
+        raise ValueError(f"파일이 없습니다: {file_path}")
+    return file_path, month, country == 'JP'
+
+
+def read_manifest(path):
+    """manifest CSV (file,month,country)에서 작업 목록 읽기"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        return [make_job(row['file'], row['month'], row.get('country')) for row in csv.DictReader(f)]
+
+
+def load_workbook_job(file_path, password, workbook_cache_dir):
+    """작업 프로세스에서 파일 복호화 및 파싱 (DataFrame과 소요 시간 반환)"""
+    start = time.time()
+    df = load_excel_file(file_path, password, workbook_cache_dir)
+    return df, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VOC 월별 데이터 일괄 생성 (Streamlit 없이 실행)")
+    parser.add_argument("jobs", nargs="*", help="'파일:월[:국가]' 형식의 작업 (예: voc.xlsx:2025-01:JP, 국가 기본값 KR)")
+    parser.add_argument("--manifest", "-m", help="작업 목록 CSV (열: file,month,country)")
+    parser.add_argument("--password", "-p", default=os.environ.get("EXCEL_PASSWORD", ""),
+                        help="Excel 파일 비밀번호 (기본값: EXCEL_PASSWORD 환경변수)")
+    parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY", ""),
+                        help="OpenAI API 키 (기본값: OPENAI_API_KEY 환경변수)")
+    parser.add_argument("--data-dir", default="data", help="월별 데이터 저장 폴더 (기본값: data)")
+    parser.add_argument("--parse-workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="복호화/파싱 프로세스 수 (기본값: min(4, CPU 수))")
+    parser.add_argument("--summary-workers", type=int, default=SUMMARY_MAX_WORKERS,
+                        help=f"모든 작업이 함께 쓰는 AI 요약 동시 요청 수 (기본값: {SUMMARY_MAX_WORKERS})")
+    parser.add_argument("--token-budget", type=int, default=SUMMARY_SAMPLE_TOKEN_BUDGET,
+                        help=f"요약 요청 하나에 담을 샘플 문의 토큰 수 (기본값: {SUMMARY_SAMPLE_TOKEN_BUDGET})")
+    parser.add_argument("--workbook-cache-dir", help="복호화한 워크북 캐시 폴더 (지정하면 같은 파일은 다시 파싱하지 않음)")
+    parser.add_argument("--full", action="store_true", help="이전 업로드 지문을 무시하고 모든 요약을 다시 생성")
+    args = parser.parse_args()
+
+    try:
+        jobs = [parse_job(spec) for spec in args.jobs]
+        if args.manifest:
+            jobs += read_manifest(args.manifest)
+    except (ValueError, KeyError, OSError) as e:
+        parser.error(str(e))
+    if not jobs:
+        parser.error("작업을 하나 이상 지정하세요 (파일:월[:국가] 또는 --manifest)")
+    if not args.api_key:
+        parser.error("OpenAI API 키가 필요합니다 (--api-key 또는 OPENAI_API_KEY)")
+
+    month_keys = [get_month_key(month, is_japan) for _, month, is_japan in jobs]
+    duplicates = sorted({key for key in month_keys if month_keys.count(key) > 1})
+    if duplicates:
+        parser.error(f"같은 월/국가 작업이 중복되었습니다: {', '.join(duplicates)}")
+
+    print(f"\n📦 일괄 처리: {len(jobs)}개 작업 (파싱 프로세스 {args.parse_workers}개, 요약 동시 {args.summary_workers}개)")
+    batch_start = time.time()
+    fingerprints_ids = {key: uuid.uuid4().hex[:12] for key in month_keys}  # 이번 실행의 업로드 지문 대기 파일
+
+    # 대시보드와 같은 요약 캐시 파일을 써도 저장할 때 합쳐지므로 서로의 요약을 덮어쓰지 않음
+    cache = get_summary_cache(args.data_dir)
+    summarizer = VOCSummarizer(args.api_key, max_workers=args.summary_workers, cache=cache,
+                               token_budget=args.token_budget)
+    stats = {}  # 월 키 -> (행 수, 파싱 시간, 전체 시간)
+    results = {}
+    failures = {}
+
+    # 파싱이 끝나는 순서대로 월별 데이터 생성을 시작해 파싱과 AI 요약을 겹쳐 실행
+    with ProcessPoolExecutor(max_workers=args.parse_workers) as parse_pool, \
+            ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix="voc-batch") as build_pool:
+        parse_futures = {
+            parse_pool.submit(load_workbook_job, file_path, args.password, args.workbook_cache_dir):
+                (file_path, month, is_japan)
+            for file_path, month, is_japan in jobs
+        }
+        build_futures = {}
+        for future in as_completed(parse_futures):
+            file_path, month, is_japan = parse_futures[future]
+            month_key = get_month_key(month, is_japan)
+            try:
+                df, parse_time = future.result()
+            except Exception as e:
+                failures[month_key] = str(e)
+                print(f"❌ {month_key} 파일 읽기 실패: {e}")
+                continue
+            print(f"✅ {month_key} 파싱 완료: {len(df):,}건 ({parse_time:.1f}초)")
+            stats[month_key] = (len(df), parse_time)
+            build_futures[build_pool.submit(
+                build_monthly_data, df, month, args.api_key, is_japan, summarizer, args.data_dir,
+                incremental=not args.full, fingerprints_id=fingerprints_ids[month_key]
+            )] = month_key
+
+        for future in as_completed(build_futures):
+            month_key = build_futures[future]
+            try:
+                results[month_key] = future.result()
+            except Exception as e:
+                failures[month_key] = str(e)
+                print(f"❌ {month_key} 생성 실패: {e}")
+            stats[month_key] += (time.time() - batch_start,)
+
+    cache.save()
+
+    # 모든 달을 한 번에 저장 (목록과 건수 집계는 한 번만 갱신)
+    saved_keys = [key for key in month_keys if key in results]
+    if saved_keys:
+        save_monthly_data_batch([results[key] for key in saved_keys], args.data_dir,
+                                [fingerprints_ids[key] for key in saved_keys])
+    elapsed = time.time() - batch_start
+
+    print(f"\n{'월 키':<12} {'행 수':>10} {'파싱(초)':>9} {'완료(초)':>9}")
+    for key in saved_keys:
+        rows, parse_time, finished = stats[key]
+        print(f"{key:<12} {rows:>10,} {parse_time:>9.1f} {finished:>9.1f}")
+
+    total_rows = sum(stats[key][0] for key in saved_keys)
+    summaries = len(summarizer.timings)
+    lookups = cache.hits + cache.misses
+    print(f"\n📊 처리량: {len(saved_keys)}/{len(jobs)}개월, {total_rows:,}건, 전체 {elapsed:.1f}초 "
+          f"({total_rows / elapsed:,.0f}건/초, {len(saved_keys) / elapsed * 60:.1f}개월/분)")
+    print(f"🤖 AI 요청 {summaries}건"
+          + (f", 요약 캐시 적중 {cache.hits}/{lookups}건" if lookups else ""))
+    summarizer.report()
+    summarizer.close()
+
+    if failures:
+        print(f"\n❌ 실패한 작업 {len(failures)}개:")
+        for key, error in failures.items():
+            print(f"  - {key}: {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+VOC Dashboard Background Jobs
+대시보드 생성(파일 로드 → AI 요약 → 저장)을 Streamlit 요청 밖의 작업 스레드에서 실행
+
+작업 목록에서 진행 상황(완료 요약 수/전체 수)을 조회하고, cancel()로 API 호출 사이에서
+작업을 멈출 수 있습니다. 취소 전까지 끝난 요약은 요약 캐시에 남으므로 같은 파일로 다시
+제출하면 남은 요약만 요청합니다.
+"""
+
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from voc_processor import (
+    GenerationCancelled,
+    generate_monthly_data,
+    get_month_key,
+    save_monthly_data,
+)
+
+# 작업 상태
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+CANCELLED = 'cancelled'
+FAILED = 'failed'
+FINISHED_STATES = (DONE, CANCELLED, FAILED)
+FINISHED_JOB_TTL = 3600  # 끝난 작업을 목록에 남겨 두는 시간 (초, UI가 forget하지 않은 작업도 이후 정리)
+
+
+class Job:
+    """대시보드 생성 작업 하나의 상태 (작업 스레드가 갱신하고 UI가 snapshot()으로 조회)"""
+
+    def __init__(self, month, is_japan):
+        self.id = uuid.uuid4().hex[:12]
+        self.month = month
+        self.is_japan = is_japan
+        self.month_key = get_month_key(month, is_japan)
+        self.status = QUEUED
+        self.stage = "대기 중"
+        self.done = 0
+        self.total = 0
+        self.label = ""
+        self.error = None
+        self.partial = None  # 취소 시 만들던 월별 데이터 (끝나지 않은 요약은 None)
+        self.created_at = time.time()
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def update(self, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+
+    def is_finished(self):
+        with self._lock:
+            return self.status in FINISHED_STATES
+
+    def on_progress(self, done, total, label):
+        self.update(done=done, total=total, label=label)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'id': self.id,
+                'month': self.month,
+                'is_japan': self.is_japan,
+                'month_key': self.month_key,
+                'status': self.status,
+                'stage': self.stage,
+                'done': self.done,
+                'total': self.total,
+                'label': self.label,
+                'error': self.error,
+                'has_partial': self.partial is not None,
+                'cancel_requested': self.cancel_event.is_set(),
+                'elapsed': (self.finished_at or time.time()) - self.created_at,
+            }
+
+
+class JobRunner:
+    """
+    대시보드 생성 작업 목록과 작업 스레드
+
+    max_workers개의 작업만 동시에 실행하고 나머지는 대기합니다. (요약 요청 자체는
+    작업마다 VOCSummarizer가 동시에 보냅니다.) 모든 작업은 data_dir의 요약 캐시 하나
+    (get_summary_cache)를 함께 쓰므로 동시에 끝난 작업끼리 요약을 덮어쓰지 않습니다.
+    """
+
+    def __init__(self, max_workers=1, data_dir='data'):
+        self.data_dir = data_dir
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="voc-job")
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, file_path, month, api_key, password, is_japan=False, workbook_cache_dir=None,
+               remove_file=True):
+        """
+        대시보드 생성 작업 제출
+
+        Args:
+            file_path (str): 암호화된 Excel 파일 경로
+            remove_file (bool): 작업이 끝나면(성공/취소/실패 모두) file_path 삭제
+
+        Returns:
+            str: 작업 ID
+        """
+        job = Job(month, is_japan)
+        with self._lock:
+            self._prune()
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job, file_path, api_key, password, workbook_cache_dir, remove_file)
+        return job.id
+
+    def _run(self, job, file_path, api_key, password, workbook_cache_dir, remove_file):
+        try:
+            if job.cancel_event.is_set():
+                raise GenerationCancelled()
+            job.update(status=RUNNING, stage="파일 로드 및 AI 요약 생성 중")
+            monthly_data = generate_monthly_data(
+                file_path, job.month, api_key, password, job.is_japan,
+                data_dir=self.data_dir,
+                workbook_cache_dir=workbook_cache_dir,
+                progress=job.on_progress,
+                cancel_event=job.cancel_event,
+                fingerprints_id=job.id
+            )
+            job.update(stage="저장 중")
+            save_monthly_data(monthly_data, self.data_dir, fingerprints_id=job.id)
+            job.update(status=DONE, stage="완료")
+        except GenerationCancelled as e:
+            job.update(status=CANCELLED, stage="취소됨", partial=e.partial)
+        except Exception as e:
+            job.update(status=FAILED, stage="실패", error=str(e))
+        finally:
+            job.update(finished_at=time.time())
+            if remove_file and os.path.exists(file_path):
+                os.remove(file_path)
+
+    def _prune(self):
+        """끝난 지 FINISHED_JOB_TTL이 지난 작업 제거 (self._lock을 잡은 상태에서 호출)"""
+        now = time.time()
+        for job_id, job in list(self.jobs.items()):
+            with job._lock:
+                expired = job.status in FINISHED_STATES and job.finished_at is not None \
+                    and now - job.finished_at > FINISHED_JOB_TTL
+            if expired:
+                del self.jobs[job_id]
+
+    def get(self, job_id):
+        """작업 상태 (없으면 None)"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+        return job.snapshot() if job else None
+
+    def cancel(self, job_id):
+        """작업 취소 요청 (진행 중인 API 호출이 끝나면 멈춤)"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            return False
+        with job._lock:
+            if job.status in FINISHED_STATES:
+                return False
+            job.cancel_event.set()
+            job.stage = "취소 중"
+        return True
+
+    def active_job(self, month_key=None):
+        """실행 중이거나 대기 중인 작업 상태 (month_key를 주면 해당 월만)"""
+        with self._lock:
+            self._prune()
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            if not job.is_finished() and (month_key is None or job.month_key == month_key):
+                return job.snapshot()
+        return None
+
+    def forget(self, job_id):
+        """끝난 작업을 목록에서 제거"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is not None and job.is_finished():
+                del self.jobs[job_id]
+
+    def shutdown(self):
+        with self._lock:
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            job.cancel_event.set()
+        self.executor.shutdown(wait=True)
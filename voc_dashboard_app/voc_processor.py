@@ -6,13 +6,55 @@ VOC Dashboard Data Processor
 
 import os
 import io
+import re
+import base64
+import pickle
 import json
+import time
+import random
+import glob
 import hashlib
+import threading
+from array import array
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 import msoffcrypto
+import openpyxl
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+import openai
 from openai import OpenAI
 import warnings
 warnings.filterwarnings('ignore')
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+try:
+    import fcntl  # 요약 캐시 파일을 다른 프로세스(voc_batch.py 등)와 함께 쓸 때 잠금 (Windows에는 없음)
+except ImportError:
+    fcntl = None
+
+# AI 요약 모델 및 동시 요청 설정
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_MAX_WORKERS = 8
+SUMMARY_MAX_TOKENS = 150  # 요약 응답 최대 토큰
+# 요청 하나의 샘플 문의 토큰 예산 (프롬프트 안내문 약 300토큰은 별도) 및 문의 하나의 내용 최대 토큰
+SUMMARY_SAMPLE_TOKEN_BUDGET = 1200
+SAMPLE_CONTENT_MAX_TOKENS = 60
+# 100만 토큰당 요금 (USD, 입력/출력)
+SUMMARY_PRICE_PER_1M_TOKENS = (0.15, 0.60)
+# 재시도할 오류: 요청 한도 초과(429), 시간 초과, 연결 오류, 서버 오류(5xx)
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError,
+                    openai.InternalServerError)
+
+# RFM 등급 (범주형 코드 0=H, 1=M, 2=L) 및 27가지 RFM 조합 ('HHH', 'HHM', ..., 'LLL')
+RFM_LEVELS = ['H', 'M', 'L']
+RFM_COMBINATIONS = [r + f + m for r in RFM_LEVELS for f in RFM_LEVELS for m in RFM_LEVELS]
 
 # 대분류별 고정 색상 매핑
 # 대분류별 색상 매핑 (밝고 부드러운 파스텔톤)
@@ -103,23 +145,204 @@ TEMPLATE_TEXTS_JP = [
 ]
 
 
-def load_excel_file(file_path, password=None):
+# VOC 처리에 쓰는 열 (나머지 열은 읽지 않음)
+VOC_SCORE_COLUMNS = ['djScoreR', 'djScoreF', 'djScoreM2', 'listenerScoreR', 'listenerScoreF', 'listenerScoreM2']
+VOC_CATEGORY_COLUMN = '대분류'
+VOC_TEXT_COLUMNS = ['문의 제목', '문의 내용']
+VOC_COLUMNS = VOC_SCORE_COLUMNS + [VOC_CATEGORY_COLUMN] + VOC_TEXT_COLUMNS
+
+
+def to_score(value):
+    """점수 셀 값을 실수로 변환 (숫자가 아니면 NaN, pd.to_numeric(errors='coerce')와 같은 기준)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return np.nan
+    return np.nan
+
+
+def to_text(value):
+    """텍스트 셀 값 변환 (빈 셀은 NaN, 정수인 실수는 pd.read_excel처럼 정수로)"""
+    if value is None or value == "":
+        return np.nan
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def read_voc_sheet(source):
+    """
+    첫 번째 시트에서 VOC_COLUMNS만 openpyxl 읽기 전용 모드로 한 행씩 읽어 DataFrame 생성
+
+    pd.read_excel은 모든 열을 object 행 목록으로 만든 뒤 DataFrame으로 바꾸지만, 여기서는
+    필요한 열만 읽으면서 점수는 float64 배열, 대분류는 범주형 코드로 바로 변환합니다.
+    시트 전체를 메모리에 올리지 않으므로 큰 워크북에서도 최대 메모리가 필요한 열 크기로 제한됩니다.
+
+    Args:
+        source: 파일 경로 또는 파일 객체 (msoffcrypto로 복호화한 BytesIO 포함)
+
+    Returns:
+        DataFrame: 시트에 있는 VOC_COLUMNS 열 (행 구성은 pd.read_excel과 같음)
+    """
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook.worksheets[0]
+        sheet.reset_dimensions()
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+
+        positions = {}
+        for position, name in enumerate(header):
+            if name in VOC_COLUMNS and name not in positions:
+                positions[name] = position
+
+        scores = {name: array('d') for name in VOC_SCORE_COLUMNS if name in positions}
+        texts = {name: [] for name in VOC_TEXT_COLUMNS if name in positions}
+        category_position = positions.get(VOC_CATEGORY_COLUMN)
+        category_codes = array('i')
+        category_index = {}
+
+        score_cells = [(positions[name], values) for name, values in scores.items()]
+        text_cells = [(positions[name], values) for name, values in texts.items()]
+
+        blank_rows = 0
+        for row in rows:
+            # pd.read_excel처럼 중간의 빈 행은 유지하고 끝에 이어지는 빈 행만 버림
+            if all(value is None for value in row):
+                blank_rows += 1
+                continue
+            for _ in range(blank_rows):
+                for _, values in score_cells + text_cells:
+                    values.append(np.nan)
+                if category_position is not None:
+                    category_codes.append(-1)
+            blank_rows = 0
+
+            width = len(row)
+            for position, values in score_cells:
+                values.append(to_score(row[position]) if position < width else np.nan)
+            for position, values in text_cells:
+                values.append(to_text(row[position]) if position < width else np.nan)
+            if category_position is not None:
+                category = row[category_position] if category_position < width else None
+                if category is None or category == "":
+                    category_codes.append(-1)
+                else:
+                    category_codes.append(category_index.setdefault(to_text(category), len(category_index)))
+    finally:
+        workbook.close()
+
+    columns = {name: np.frombuffer(values, dtype=np.float64) for name, values in scores.items()}
+    if category_position is not None:
+        columns[VOC_CATEGORY_COLUMN] = pd.Categorical.from_codes(
+            np.frombuffer(category_codes, dtype=np.int32), categories=list(category_index))
+    for name, values in texts.items():
+        columns[name] = pd.Series(values, dtype=object)
+    # 원래 시트의 열 순서 유지
+    return pd.DataFrame({name: columns[name] for name in sorted(columns, key=positions.get)})
+
+
+class WorkbookCache:
+    """
+    복호화한 워크북을 원본 파일 해시별로 저장하는 캐시 (선택 사항)
+
+    openpyxl 파싱이 업로드 과정에서 가장 느리므로, 한 번 읽은 시트를 DataFrame 피클로 저장해
+    같은 파일을 다시 처리할 때(재요약, 제외 카테고리 변경 등) 바로 불러옵니다.
+    내용은 파일 비밀번호와 원본 해시로 만든 키로 암호화(Fernet)하고, 캐시 폴더와 파일은
+    소유자만 읽을 수 있게 만듭니다. 비밀번호가 다르면 복호화에 실패해 원본을 다시 읽고,
+    다른 pandas 버전에서 저장되어 풀 수 없는 항목은 지운 뒤 원본을 다시 읽습니다.
+    """
+
+    VERSION = 2
+    KDF_ITERATIONS = 100_000
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        os.chmod(cache_dir, 0o700)
+
+    @staticmethod
+    def file_hash(file_path):
+        """원본 파일의 SHA-256 (파일 전체를 메모리에 올리지 않고 나눠 읽음)"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def path(self, file_hash):
+        return os.path.join(self.cache_dir, f"{file_hash}.v{self.VERSION}.enc")
+
+    def _fernet(self, password, file_hash):
+        kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=bytes.fromhex(file_hash),
+                         iterations=self.KDF_ITERATIONS)
+        return Fernet(base64.urlsafe_b64encode(kdf.derive(password.encode('utf-8'))))
+
+    def load(self, file_hash, password):
+        """캐시된 DataFrame (없거나 비밀번호가 맞지 않으면 None)"""
+        path = self.path(file_hash)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                token = f.read()
+            data = self._fernet(password, file_hash).decrypt(token)
+        except (InvalidToken, OSError):
+            return None
+        try:
+            return pickle.loads(data)
+        except Exception as e:
+            # 다른 pandas 버전의 피클 등 풀 수 없는 항목은 지워서 다음부터 다시 만들도록 함
+            print(f"⚠️ 워크북 캐시 항목을 읽을 수 없어 삭제합니다: {type(e).__name__}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def save(self, file_hash, password, df):
+        path = self.path(file_hash)
+        token = self._fernet(password, file_hash).encrypt(pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL))
+        tmp_path = f"{path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(token)
+        os.replace(tmp_path, path)
+
+
+def load_excel_file(file_path, password=None, cache_dir=None):
     if password is None:
-        import os
         password = os.environ.get("EXCEL_PASSWORD", "")
-    """암호화된 Excel 파일 로드"""
+    """암호화된 Excel 파일 로드 (cache_dir를 주면 복호화한 시트를 WorkbookCache로 재사용)"""
     try:
+        cache = WorkbookCache(cache_dir) if cache_dir else None
+        if cache is not None:
+            file_hash = cache.file_hash(file_path)
+            df = cache.load(file_hash, password)
+            if df is not None:
+                print(f"⚡ 워크북 캐시 사용: {file_hash[:12]}")
+                return df
+
+        decrypted = io.BytesIO()
         with open(file_path, 'rb') as f:
             file = msoffcrypto.OfficeFile(f)
             file.load_key(password=password)
-            decrypted = io.BytesIO()
             file.decrypt(decrypted)
-            decrypted.seek(0)
-            df = pd.read_excel(decrypted, engine='openpyxl')
-        return df
+        decrypted.seek(0)
+        df = read_voc_sheet(decrypted)
     except Exception as e:
         raise Exception(f"파일 읽기 실패: {e}")
 
+    if cache is not None:
+        try:
+            cache.save(file_hash, password, df)
+        except OSError as e:
+            print(f"⚠️ 워크북 캐시 저장 실패: {e}")
+    return df
+
 
 def classify_r_score(score):
     """R 점수 분류: 4~5=H, 2~3=M, 0~1=L"""
@@ -145,44 +368,315 @@ def classify_fm_score(score):
         return 'L'
 
 
+def classify_score_codes(scores, high, mid):
+    """
+    점수 열을 등급 코드 배열로 분류 (0=H, 1=M, 2=L)
+
+    high/mid는 (최소, 최대) 닫힌 구간이며, 어느 구간에도 속하지 않거나
+    숫자가 아닌 값(NaN 포함)은 L로 분류합니다. classify_r_score/classify_fm_score와 같은 기준입니다.
+    """
+    values = pd.to_numeric(scores, errors='coerce').to_numpy(dtype=float)
+    return np.select(
+        [(values >= high[0]) & (values <= high[1]), (values >= mid[0]) & (values <= mid[1])],
+        [0, 1],
+        default=2
+    ).astype(np.int8)
+
+
+def classify_r_codes(scores):
+    """R 점수 분류 코드: 4~5=H, 2~3=M, 그 외=L"""
+    return classify_score_codes(scores, (4, 5), (2, 3))
+
+
+def classify_fm_codes(scores):
+    """F/M 점수 분류 코드: 8~10=H, 4~7=M, 그 외=L"""
+    return classify_score_codes(scores, (8, 10), (4, 7))
+
+
+def add_rfm_columns(df, prefix, r_column, f_column, m_column):
+    """R/F/M 등급과 RFM 조합 열을 범주형으로 추가 (예: DJ_R, DJ_F, DJ_M, DJ_RFM)"""
+    r_codes = classify_r_codes(df[r_column])
+    f_codes = classify_fm_codes(df[f_column])
+    m_codes = classify_fm_codes(df[m_column])
+    df[f'{prefix}_R'] = pd.Categorical.from_codes(r_codes, RFM_LEVELS)
+    df[f'{prefix}_F'] = pd.Categorical.from_codes(f_codes, RFM_LEVELS)
+    df[f'{prefix}_M'] = pd.Categorical.from_codes(m_codes, RFM_LEVELS)
+    rfm_codes = r_codes.astype(np.int16) * 9 + f_codes * 3 + m_codes
+    df[f'{prefix}_RFM'] = pd.Categorical.from_codes(rfm_codes, RFM_COMBINATIONS)
+
+
+class TemplateMatcher:
+    """
+    안내 문구 목록을 미리 정규화/컴파일해 두고 문의 내용에서 제거하는 매처
+
+    모든 템플릿의 앞부분(고정 길이 접두어)을 하나의 정규식으로 묶어, 템플릿이 들어 있을 수
+    없는 문의는 한 번의 검사로 바로 건너뜁니다. 후보 문의는 목록 순서대로 포함된 템플릿만
+    제거하므로 결과는 목록 전체를 순서대로 str.replace 하던 방식(겹치는 템플릿 포함)과 같습니다.
+    """
+
+    ANCHOR_LENGTH = 8
+    ROW_SEPARATOR = '\x00'  # 열 전체를 한 번에 검사할 때 행 구분자 (템플릿에 없는 문자)
+
+    def __init__(self, templates):
+        self.templates = [template.replace('\r\n', '\n') for template in templates]
+        anchors = dict.fromkeys(template[:self.ANCHOR_LENGTH] for template in self.templates)
+        self.any_anchor = re.compile("|".join(re.escape(anchor) for anchor in anchors))
+
+    def remove(self, text):
+        """정규화된 문자열에서 템플릿을 제거하고 앞뒤 공백 정리"""
+        if self.any_anchor.search(text):
+            text = self._remove_templates(text)
+        return text.strip()
+
+    def _remove_templates(self, text):
+        for template in self.templates:
+            if template in text:
+                text = text.replace(template, "")
+        return text
+
+    def remove_all(self, texts):
+        """
+        정규화된 문자열 목록에서 템플릿 제거
+
+        목록 전체를 구분자로 이어 붙여 접두어 정규식을 한 번만 실행하고,
+        일치한 위치가 속한 행만 템플릿 제거를 수행합니다.
+        """
+        offsets = np.cumsum([len(text) + 1 for text in texts])
+        joined = self.ROW_SEPARATOR.join(texts)
+        starts = [match.start() for match in self.any_anchor.finditer(joined)]
+        candidate_rows = set(np.searchsorted(offsets, starts, side='right').tolist())
+
+        return [
+            self._remove_templates(text).strip() if row in candidate_rows else text.strip()
+            for row, text in enumerate(texts)
+        ]
+
+
+@lru_cache(maxsize=None)
+def get_template_matcher(is_japan=False):
+    """국가별 템플릿 매처 (처음 사용할 때 한 번만 생성)"""
+    return TemplateMatcher(TEMPLATE_TEXTS_JP if is_japan else TEMPLATE_TEXTS_KR)
+
+
 def remove_template_text(text, is_japan=False):
     """템플릿 텍스트 제거"""
     if pd.isna(text):
         return ""
-    text = str(text).replace('\r\n', '\n')
+    return get_template_matcher(is_japan).remove(str(text).replace('\r\n', '\n'))
+
+
+def remove_template_texts(texts, is_japan=False):
+    """문의 내용 열 전체에서 템플릿 텍스트 제거 (remove_template_text와 같은 결과의 Series 반환)"""
+    missing = texts.isna().to_numpy()
+    normalized = [
+        "" if is_missing else str(text).replace('\r\n', '\n')
+        for text, is_missing in zip(texts.tolist(), missing)
+    ]
+    cleaned = get_template_matcher(is_japan).remove_all(normalized)
+    return pd.Series(cleaned, index=texts.index, dtype=object)
+
+
+# 유사 문의 묶기: 대분류별 앞쪽 SAMPLE_POOL_SIZE건을 SimHash로 묶고, 대표 문의를 묶음이 큰 순서로
+# 토큰 예산(SUMMARY_SAMPLE_TOKEN_BUDGET)만큼 프롬프트에 담음
+SUMMARY_SAMPLE_SIZE = 20
+SAMPLE_POOL_SIZE = 200
+SIMHASH_SHINGLE = 3
+SIMHASH_MAX_DISTANCE = 10  # 64비트 중 다른 비트가 이 값 이하면 같은 문의로 봄 (무관한 문의는 보통 20 이상)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+DIGITS_PATTERN = re.compile(r'\d+')
+POPCOUNT_16 = np.array([bin(value).count('1') for value in range(1 << 16)], dtype=np.uint8)
+
+
+def voc_contents(voc_samples, is_japan=False):
+    """템플릿을 제거한 문의 내용 Series (열이 없으면 빈 문자열)"""
+    if '문의 내용' not in voc_samples:
+        return pd.Series('', index=voc_samples.index, dtype=object)
+    return remove_template_texts(voc_samples['문의 내용'].astype(str), is_japan)
+
+
+def simhash_texts(texts):
+    """
+    문자 3-gram SimHash(64비트)를 여러 문서에 대해 한 번에 계산
+
+    모든 문서의 문자 코드를 하나의 배열로 이어 붙여 shingle 해시와 비트 합계를 numpy로 구합니다.
+    공백은 하나로 줄이고 숫자(주문번호, 날짜 등)는 모두 0으로 바꾸며 대소문자는 무시합니다. 빈 문서의 값은 0입니다.
+    """
+    width = SIMHASH_SHINGLE
+    codes = []
+    starts = []
+    counts = []
+    offset = 0
+    padding = np.zeros(width - 1, dtype=np.uint32)
+    for text in texts:
+        text = DIGITS_PATTERN.sub('0', WHITESPACE_PATTERN.sub(' ', text)).strip().lower()
+        code = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        codes.append(code)
+        codes.append(padding)
+        starts.append(offset)
+        # 짧은 문서도 뒤의 0 채움과 함께 shingle 하나로 계산
+        counts.append(max(len(code) - width + 1, 1) if len(code) else 0)
+        offset += len(code) + width - 1
 
-    templates = TEMPLATE_TEXTS_JP if is_japan else TEMPLATE_TEXTS_KR
-    for template in templates:
-        template_normalized = template.replace('\r\n', '\n')
-        text = text.replace(template_normalized, "")
+    result = np.zeros(len(starts), dtype=np.uint64)
+    if not starts or not any(counts):
+        return result
 
-    return text.strip()
+    flat = np.concatenate(codes).astype(np.uint64)
+    counts = np.array(counts)
+    positions = np.repeat(np.array(starts) - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
 
+    # shingle 해시 (다항식 결합 후 splitmix64로 비트를 섞음, uint64 오버플로는 의도된 동작)
+    with np.errstate(over='ignore'):
+        hashes = np.zeros(len(positions), dtype=np.uint64)
+        for i in range(width):
+            hashes = hashes * np.uint64(0x100000001B3) + flat[positions + i]
+        hashes ^= hashes >> np.uint64(30)
+        hashes *= np.uint64(0xBF58476D1CE4E5B9)
+        hashes ^= hashes >> np.uint64(27)
+        hashes *= np.uint64(0x94D049BB133111EB)
+        hashes ^= hashes >> np.uint64(31)
 
-def summarize_voc_with_ai(df_segment, category, role, api_key, is_japan=False):
-    """OpenAI API로 대분류별 VOC 요약"""
+    nonempty = counts > 0
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])[nonempty]
+    for bit in range(64):
+        ones = np.add.reduceat((hashes >> np.uint64(bit)) & np.uint64(1), offsets)
+        result[nonempty] |= (ones * 2 > counts[nonempty]).astype(np.uint64) << np.uint64(bit)
+    return result
+
+
+def hamming_distances(hashes, value):
+    """SimHash 배열과 값 하나의 해밍 거리"""
+    diff = hashes ^ np.uint64(value)
+    return sum(POPCOUNT_16[(diff >> np.uint64(shift)) & np.uint64(0xFFFF)].astype(np.int64)
+               for shift in (0, 16, 32, 48))
+
+
+def collapse_near_duplicates(voc_samples, is_japan=False, max_samples=None, hashes=None, contents=None):
+    """
+    거의 같은 문의를 묶어 묶음마다 대표 문의 하나만 남김
+
+    원래 순서대로 보면서 기존 대표와 SimHash 거리가 SIMHASH_MAX_DISTANCE 이하면 그 묶음에 넣고,
+    아니면 새 묶음을 만듭니다. 대표는 묶음 크기가 큰 순서(같으면 먼저 나온 순서)로 max_samples건까지
+    (None이면 모두) 반환하며 cluster_size 열에 묶음 크기를 담습니다. 내용이 빈 문의는 묶지 않습니다.
+
+    Args:
+        hashes, contents: 미리 계산한 SimHash와 템플릿 제거 내용 (없으면 여기서 계산)
+    """
+    if contents is None:
+        contents = voc_contents(voc_samples, is_japan)
+    contents = np.asarray(contents, dtype=object)
+    filled = np.flatnonzero([bool(content) for content in contents])
+    if len(filled) == 0:
+        return voc_samples.head(max_samples or len(voc_samples)).assign(cluster_size=1)
+    if hashes is None:
+        hashes = simhash_texts(contents[filled])
+    else:
+        hashes = np.asarray(hashes, dtype=np.uint64)[filled]
+
+    representatives = []  # 대표 문의의 위치
+    representative_hashes = np.zeros(len(filled), dtype=np.uint64)
+    sizes = []
+    for position, value in zip(filled, hashes):
+        if representatives:
+            distances = hamming_distances(representative_hashes[:len(representatives)], value)
+            nearest = int(np.argmin(distances))
+            if distances[nearest] <= SIMHASH_MAX_DISTANCE:
+                sizes[nearest] += 1
+                continue
+        representative_hashes[len(representatives)] = value
+        representatives.append(position)
+        sizes.append(1)
+
+    order = sorted(range(len(representatives)), key=lambda i: -sizes[i])[:max_samples]
+    return voc_samples.iloc[[representatives[i] for i in order]].assign(cluster_size=[sizes[i] for i in order])
+
+
+@lru_cache(maxsize=1)
+def token_encoder():
+    """요약 모델의 tiktoken 인코더 (tiktoken이 없거나 인코딩을 받을 수 없으면 None)"""
+    if not TIKTOKEN_AVAILABLE:
+        return None
     try:
-        if not api_key:
-            return "⚠️ OPENAI_API_KEY가 필요합니다."
+        try:
+            return tiktoken.encoding_for_model(SUMMARY_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        print(f"⚠️ tiktoken 인코딩을 불러올 수 없어 추정값을 사용합니다: {e}")
+        return None
+
+
+def count_tokens(text):
+    """
+    텍스트의 토큰 수 (tiktoken이 있으면 정확한 값, 없으면 추정값)
+
+    추정: 한글/일본어 등 ASCII가 아닌 문자는 1자당 1토큰, ASCII는 4자당 1토큰으로 넉넉하게 계산합니다.
+    """
+    encoder = token_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text))
+    non_ascii = len(text) - len(text.encode('ascii', 'ignore'))
+    return non_ascii + -(-(len(text) - non_ascii) // 4)
 
-        client = OpenAI(api_key=api_key)
 
-        voc_samples = df_segment[df_segment['대분류'] == category].head(20)
-        if len(voc_samples) == 0:
-            return "데이터 없음"
+def truncate_to_tokens(text, max_tokens):
+    """토큰 수가 max_tokens 이하가 되도록 텍스트 뒤를 자름"""
+    tokens = count_tokens(text)
+    while tokens > max_tokens:
+        text = text[:min(len(text) - 1, int(len(text) * max_tokens / tokens))]
+        tokens = count_tokens(text)
+    return text
 
-        voc_texts = []
-        for idx, row in voc_samples.iterrows():
-            title = str(row.get('문의 제목', ''))
-            content = str(row.get('문의 내용', ''))
-            content_cleaned = remove_template_text(content, is_japan)
-            if content_cleaned:
-                voc_texts.append(f"- {title}: {content_cleaned[:100]}")
 
-        voc_text = "\n".join(voc_texts)
+def fit_voc_samples(voc_samples, is_japan=False, token_budget=SUMMARY_SAMPLE_TOKEN_BUDGET):
+    """
+    샘플 VOC 행 중 요약 프롬프트에 들어가는 행과 그 줄 목록
 
-        if is_japan:
-            prompt = f"""다음은 일본 사용자의 '{category}' 대분류 문의 내용입니다.
+    행 순서대로 문의 한 줄씩(내용은 SAMPLE_CONTENT_MAX_TOKENS까지) 담고, 다음 줄을 넣으면
+    token_budget을 넘을 때 멈춥니다. 첫 줄은 예산과 관계없이 담으며 내용이 빈 행은 건너뜁니다.
+    cluster_size 열이 있으면 2건 이상 묶인 문의 앞에 '(N건)'을 붙입니다.
+
+    Returns:
+        tuple: (프롬프트에 들어간 행 DataFrame, 줄 목록)
+    """
+    if '문의 제목' in voc_samples:
+        titles = voc_samples['문의 제목'].astype(str)
+    else:
+        titles = pd.Series('', index=voc_samples.index)
+    contents = voc_contents(voc_samples, is_japan)
+    if 'cluster_size' in voc_samples:
+        weights = [f"({size}건) " if size > 1 else "" for size in voc_samples['cluster_size']]
+    else:
+        weights = [""] * len(voc_samples)
+
+    voc_texts = []
+    positions = []
+    used_tokens = 0
+    for position, (weight, title, content) in enumerate(zip(weights, titles, contents)):
+        if not content:
+            continue
+        line = f"- {weight}{title}: {truncate_to_tokens(content, SAMPLE_CONTENT_MAX_TOKENS)}"
+        line_tokens = count_tokens(line) + 1  # 줄바꿈 포함
+        if voc_texts and used_tokens + line_tokens > token_budget:
+            break
+        voc_texts.append(line)
+        positions.append(position)
+        used_tokens += line_tokens
+    return voc_samples.iloc[positions], voc_texts
+
+
+def format_voc_samples(voc_samples, is_japan=False, token_budget=SUMMARY_SAMPLE_TOKEN_BUDGET):
+    """대분류 하나의 샘플 VOC 행을 요약 프롬프트용 텍스트로 변환 (fit_voc_samples 기준, 데이터가 없으면 None)"""
+    if len(voc_samples) == 0:
+        return None
+    _, voc_texts = fit_voc_samples(voc_samples, is_japan, token_budget)
+    return "\n".join(voc_texts)
+
+
+def build_summary_prompt(category, voc_text, is_japan=False):
+    """대분류 요약 요청 프롬프트 생성"""
+    if is_japan:
+        prompt = f"""다음은 일본 사용자의 '{category}' 대분류 문의 내용입니다.
 이 일본어 VOC 내용을 분석하여 한국어로 핵심 이슈를 1~2문장으로 요약하세요.
 
 요구사항:
@@ -191,6 +685,7 @@ def summarize_voc_with_ai(df_segment, category, role, api_key, is_japan=False):
 - 문장의 끝을 '~되고 있음', '~발생하고 있음', '~이어지고 있음' 스타일로 마무리
 - '~에 대한 문의', '문의가 많음', '주로', '많음' 등 관찰자 표현 금지
 - 번호, 하이픈, 불릿포인트 금지
+- '(N건)' 표시는 비슷한 문의 N건을 하나로 묶은 것이므로 건수가 많은 이슈를 우선 반영
 - 감정·부사·추측 제거, 사실만 요약
 - 원문에 없는 해석 추가 금지
 
@@ -205,8 +700,8 @@ def summarize_voc_with_ai(df_segment, category, role, api_key, is_japan=False):
 - 환전 관련 문의 많음
 환전에 대한 문의가 주로 발생함
 """
-        else:
-            prompt = f"""다음은 '{category}' 대분류의 고객 문의 내용입니다.
+    else:
+        prompt = f"""다음은 '{category}' 대분류의 고객 문의 내용입니다.
 대시보드 요약용으로 핵심 이슈를 1~2문장으로 작성하세요.
 
 요구사항:
@@ -214,6 +709,7 @@ def summarize_voc_with_ai(df_segment, category, role, api_key, is_japan=False):
 - 문장의 끝을 '~되고 있음', '~발생하고 있음', '~이어지고 있음' 스타일로 마무리
 - '~에 대한 문의', '문의가 많음', '주로', '많음' 등 관찰자 표현 금지
 - 번호, 하이픈, 불릿포인트 금지
+- '(N건)' 표시는 비슷한 문의 N건을 하나로 묶은 것이므로 건수가 많은 이슈를 우선 반영
 - 감정·부사·추측 제거, 사실만 요약
 - 원문에 없는 해석 추가 금지
 
@@ -227,59 +723,490 @@ def summarize_voc_with_ai(df_segment, category, role, api_key, is_japan=False):
 - 환전 관련 문의 많음
 환전에 대한 문의가 주로 발생함
 """
+    return prompt
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            max_tokens=150,
-            messages=[{"role": "user", "content": prompt}]
-        )
 
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"요약 실패: {str(e)}"
+class SummaryCache:
+    """
+    AI 요약 결과를 프롬프트 해시로 저장하는 영구 캐시 (data/summary_cache.json)
+
+    같은 국가/대분류/샘플 문의로 만든 프롬프트는 한 번만 요청합니다.
+    항목 수가 max_entries를 넘으면 가장 오래 사용하지 않은 항목부터 지웁니다.
+    여러 작업 스레드에서 함께 사용할 수 있으며, 파일은 save() 호출 시에만 기록합니다.
+    save()는 파일을 잠그고 그사이 다른 프로세스가 저장한 항목과 합쳐서 기록하므로 서로의 요약을
+    덮어쓰지 않습니다. 같은 프로세스에서는 get_summary_cache()로 폴더마다 하나의 캐시를 함께 씁니다.
+    """
+
+    def __init__(self, path, max_entries=5000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.entries = self._read_entries()
+
+    @staticmethod
+    def make_key(prompt):
+        payload = json.dumps([SUMMARY_MODEL, SUMMARY_MAX_TOKENS, prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, prompt):
+        key = self.make_key(prompt)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry['used'] = time.time()
+            self._dirty = True
+            return entry['summary']
+
+    def put(self, prompt, summary):
+        key = self.make_key(prompt)
+        with self._lock:
+            self.entries[key] = {'summary': summary, 'used': time.time()}
+            self._dirty = True
+
+    def _read_entries(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('entries', {})
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 요약 캐시를 읽을 수 없어 새로 만듭니다: {e}")
+            return {}
+
+    def save(self):
+        """변경된 내용이 있으면 파일의 항목과 합치고(최근 사용 기준) 오래된 항목을 정리한 뒤 기록"""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(f"{self.path}.lock", 'w') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                entries = self._read_entries()
+                for key, entry in self.entries.items():
+                    if key not in entries or entries[key]['used'] < entry['used']:
+                        entries[key] = entry
+                if len(entries) > self.max_entries:
+                    by_use = sorted(entries, key=lambda key: entries[key]['used'])
+                    for key in by_use[:len(entries) - self.max_entries]:
+                        del entries[key]
+                write_json_atomic(self.path, {'entries': entries})
+            self.entries = entries
+            self._dirty = False
+
+
+_summary_caches = {}
+_summary_caches_lock = threading.Lock()
+
+
+def get_summary_cache(data_dir='data'):
+    """data_dir의 요약 캐시 (같은 프로세스의 작업들이 하나의 SummaryCache를 함께 사용)"""
+    path = os.path.abspath(os.path.join(data_dir, 'summary_cache.json'))
+    with _summary_caches_lock:
+        if path not in _summary_caches:
+            _summary_caches[path] = SummaryCache(path)
+        return _summary_caches[path]
+
+
+class GenerationCancelled(Exception):
+    """
+    월별 데이터 생성이 취소됨
+
+    partial에는 취소 전까지 만든 월별 데이터(끝나지 않은 요약은 None)가 담깁니다.
+    끝난 요약은 요약 캐시에 저장되므로 같은 파일로 다시 생성하면 남은 요약만 요청합니다.
+    """
+
+    def __init__(self, message="사용자가 처리를 취소했습니다.", partial=None, done=0, total=0):
+        super().__init__(message)
+        self.partial = partial
+        self.done = done
+        self.total = total
+
+
+class VOCSummarizer:
+    """
+    대분류별 VOC 요약을 동시에 생성하는 요약 엔진
+
+    OpenAI 클라이언트 하나를 공유하고 최대 max_workers개의 요청만 동시에 보냅니다.
+    요청 한도 초과, 시간 초과, 연결 오류, 서버 오류는 지수 백오프(Retry-After 우선)로
+    재시도하고, 요청별 소요 시간을 기록해 report()로 출력합니다.
+    cache가 있으면 같은 프롬프트의 요약은 API를 호출하지 않고 캐시에서 가져옵니다.
+    샘플 문의는 요청마다 token_budget 토큰까지만 담고, 요청별 토큰 수와 비용을 출력합니다.
+    """
+
+    def __init__(self, api_key, max_workers=SUMMARY_MAX_WORKERS, max_retries=5, timeout=30,
+                 base_delay=1.0, client=None, cache=None, token_budget=SUMMARY_SAMPLE_TOKEN_BUDGET):
+        self.api_key = api_key
+        self.cache = cache
+        self.token_budget = token_budget
+        # 재시도는 직접 처리하므로 클라이언트 자체 재시도는 끔
+        self.client = client or (OpenAI(api_key=api_key, timeout=timeout, max_retries=0) if api_key else None)
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="voc-summary")
+        self.timings = []  # (라벨, 소요 시간, 시도 횟수, 성공 여부)
+        self.usage = []  # (라벨, 입력 토큰, 출력 토큰, 비용, 추정 여부)
+        self.wall_time = 0.0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def summarize(self, voc_samples, category, is_japan=False, label=None, cancel_event=None):
+        """
+        요약 하나를 생성
+
+        API 키가 없으면 "⚠️ OPENAI_API_KEY가 필요합니다.", 샘플이 없으면 "데이터 없음",
+        재시도 후에도 요청이 실패하면 "요약 실패: <오류>"를 요약 대신 반환합니다.
+
+        Args:
+            voc_samples (DataFrame): 해당 대분류의 샘플 VOC 행 (group_rfm_categories의 samples)
+            cancel_event (threading.Event): 설정되면 API를 호출하지 않고 None 반환
+        """
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        if not self.api_key:
+            return "⚠️ OPENAI_API_KEY가 필요합니다."
+        try:
+            voc_text = format_voc_samples(voc_samples, is_japan, self.token_budget)
+            if voc_text is None:
+                return "데이터 없음"
+            prompt = build_summary_prompt(category, voc_text, is_japan)
+            if self.cache is not None:
+                cached_summary = self.cache.get(prompt)
+                if cached_summary is not None:
+                    return cached_summary
+            summary = self.complete(prompt, label or category, cancel_event)
+            # 실패한 요약은 예외로 빠지므로 성공한 응답만 저장됨
+            if self.cache is not None:
+                self.cache.put(prompt, summary)
+            return summary
+        except GenerationCancelled:
+            return None
+        except Exception as e:
+            return f"요약 실패: {str(e)}"
+
+    def complete(self, prompt, label="", cancel_event=None):
+        """
+        프롬프트 하나를 요청하고 응답 텍스트 반환 (재시도 가능한 오류는 백오프 후 재시도)
+
+        재시도 대기 중 cancel_event가 설정되면 GenerationCancelled를 발생시킵니다.
+        """
+        start = time.time()
+        attempt = 0
+        succeeded = False
+        try:
+            while True:
+                attempt += 1
+                try:
+                    response = self.client.chat.completions.create(
+                        model=SUMMARY_MODEL,
+                        max_tokens=SUMMARY_MAX_TOKENS,
+                        messages=[{"role": "user", "content": prompt}]
+                    )
+                    succeeded = True
+                    summary = response.choices[0].message.content.strip()
+                    self.record_usage(label, prompt, summary, getattr(response, 'usage', None))
+                    return summary
+                except RETRYABLE_ERRORS as e:
+                    if attempt > self.max_retries:
+                        raise
+                    delay = self.retry_delay(e, attempt)
+                    print(f"  ⏳ {label} 재시도 {attempt}/{self.max_retries} ({type(e).__name__}, {delay:.1f}초 후)")
+                    if cancel_event is None:
+                        time.sleep(delay)
+                    elif cancel_event.wait(delay):
+                        raise GenerationCancelled()
+        finally:
+            with self._lock:
+                self.timings.append((label, time.time() - start, attempt, succeeded))
+
+    def record_usage(self, label, prompt, summary, usage=None):
+        """요청 하나의 토큰 수와 비용 기록 및 출력 (응답에 usage가 없으면 로컬 추정값)"""
+        estimated = usage is None
+        if estimated:
+            prompt_tokens, completion_tokens = count_tokens(prompt), count_tokens(summary)
+        else:
+            prompt_tokens, completion_tokens = usage.prompt_tokens, usage.completion_tokens
+        input_price, output_price = SUMMARY_PRICE_PER_1M_TOKENS
+        cost = (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+        with self._lock:
+            self.usage.append((label, prompt_tokens, completion_tokens, cost, estimated))
+        print(f"  💰 {label}: 입력 {prompt_tokens:,} / 출력 {completion_tokens:,}토큰"
+              f"{' (추정)' if estimated else ''}, ${cost:.5f}")
+
+    def retry_delay(self, error, attempt):
+        """재시도 대기 시간: 응답의 Retry-After 헤더가 있으면 그 값, 없으면 지터를 더한 지수 백오프"""
+        response = getattr(error, 'response', None)
+        if response is not None:
+            retry_after = response.headers.get('retry-after')
+            try:
+                return min(float(retry_after), 60.0)
+            except (TypeError, ValueError):
+                pass
+        return min(self.base_delay * 2 ** (attempt - 1), 30.0) + random.uniform(0, self.base_delay)
+
+    def summarize_many(self, tasks, progress=None, cancel_event=None):
+        """
+        여러 요약을 작업 스레드에서 동시에 생성
+
+        Args:
+            tasks (list): (voc_samples, category, is_japan, label) 튜플 목록
+            progress (callable): 요약이 하나 끝날 때마다 (완료 수, 전체 수, 라벨)로 호출
+            cancel_event (threading.Event): 설정되면 아직 시작하지 않은 요약은 요청하지 않음
+
+        Returns:
+            list: tasks와 같은 순서의 요약 문자열 목록 (취소로 만들지 못한 요약은 None)
+        """
+        start = time.time()
+        futures = [self.executor.submit(self.summarize, *task, cancel_event=cancel_event) for task in tasks]
+        results = []
+        done = 0
+        for future, task in zip(futures, tasks):
+            results.append(future.result())
+            if results[-1] is not None:
+                done += 1
+                if progress:
+                    progress(done, len(tasks), task[3])
+        self.wall_time += time.time() - start
+        return results
+
+    def report(self):
+        """요청별 소요 시간 요약 출력"""
+        if not self.timings:
+            return
+        durations = [duration for _, duration, _, _ in self.timings]
+        retries = sum(attempts - 1 for _, _, attempts, _ in self.timings)
+        failures = sum(1 for _, _, _, ok in self.timings if not ok)
+        waves = -(-len(durations) // self.max_workers)
+        print(f"⏱️ AI 요약 {len(durations)}건 (동시 {self.max_workers}개, {waves}회차): "
+              f"전체 {self.wall_time:.1f}초, 요청당 평균 {sum(durations) / len(durations):.1f}초, "
+              f"최대 {max(durations):.1f}초, 재시도 {retries}회, 실패 {failures}건")
+        if self.usage:
+            prompt_tokens = sum(row[1] for row in self.usage)
+            completion_tokens = sum(row[2] for row in self.usage)
+            estimated = sum(1 for row in self.usage if row[4])
+            print(f"💰 토큰: 입력 {prompt_tokens:,} (요청당 최대 {max(row[1] for row in self.usage):,}), "
+                  f"출력 {completion_tokens:,}, 비용 ${sum(row[3] for row in self.usage):.4f}"
+                  + (f" (추정 {estimated}건 포함)" if estimated else ""))
 
 
 def process_voc_data(df, is_japan=False):
     """VOC 데이터 처리 및 RFM 분류"""
-    # RFM 분류
-    df['DJ_R'] = df['djScoreR'].apply(classify_r_score)
-    df['DJ_F'] = df['djScoreF'].apply(classify_fm_score)
-    df['DJ_M'] = df['djScoreM2'].apply(classify_fm_score)
-    df['DJ_RFM'] = df['DJ_R'] + df['DJ_F'] + df['DJ_M']
-
-    df['Listener_R'] = df['listenerScoreR'].apply(classify_r_score)
-    df['Listener_F'] = df['listenerScoreF'].apply(classify_fm_score)
-    df['Listener_M'] = df['listenerScoreM2'].apply(classify_fm_score)
-    df['Listener_RFM'] = df['Listener_R'] + df['Listener_F'] + df['Listener_M']
+    # RFM 분류 (열 단위 벡터 연산, 결과는 범주형)
+    add_rfm_columns(df, 'DJ', 'djScoreR', 'djScoreF', 'djScoreM2')
+    add_rfm_columns(df, 'Listener', 'listenerScoreR', 'listenerScoreF', 'listenerScoreM2')
 
     # 대분류 처리
     df['대분류'] = df['대분류'].str.strip()
 
     if is_japan:
         df['대분류'] = df['대분류'].map(CATEGORY_TRANSLATION_JP).fillna(df['대분류'])
-        exclude_categories = ['警告', 'ブラインド', '違反未該当', 'アカウント停止']
-    else:
-        exclude_categories = ['경고', '반려', '블라인드', '로그인 정지']
 
-    df_filtered = df[~df['대분류'].isin(exclude_categories)]
+    df_filtered = df[~df['대분류'].isin(excluded_categories(is_japan))]
 
     return df_filtered
 
 
-def generate_monthly_data(file_path, month, api_key, password=None, is_japan=False):
+def excluded_categories(is_japan=False):
+    """대시보드에서 제외하는 대분류 (경고/제재 관련)"""
+    if is_japan:
+        return ['警告', 'ブラインド', '違反未該当', 'アカウント停止']
+    return ['경고', '반려', '블라인드', '로그인 정지']
+
+
+def group_rfm_categories(df, rfm_column, top_n=5, sample_size=SUMMARY_SAMPLE_SIZE):
+    """
+    RFM 세그먼트 × 대분류 그룹을 한 번의 groupby로 집계
+
+    세그먼트마다 프레임을 다시 거르지 않고 건수, 상위 대분류, 요약용 샘플을 함께 만듭니다.
+    상위 대분류 순서는 세그먼트별 value_counts().head(top_n)과 같습니다.
+
+    Args:
+        df (DataFrame): process_voc_data로 처리된 데이터
+        rfm_column (str): 'DJ_RFM' 또는 'Listener_RFM'
+        top_n (int): 세그먼트별 상위 대분류 수
+        sample_size (int): 대분류별 요약에 쓸 샘플 행 수 (원래 순서의 앞쪽 행)
+
+    Returns:
+        dict: RFM -> {'count': 세그먼트 건수, 'top_categories': 대분류별 건수 Series,
+                      'samples': 대분류 -> 샘플 DataFrame} (건수가 있는 세그먼트만 포함)
+    """
+    keys = [rfm_column, '대분류']
+    grouped = df.groupby(keys, sort=False, observed=True)
+    sizes = grouped.size()
+    samples = dict(iter(grouped.head(sample_size).groupby(keys, sort=False, observed=True)))
+    segment_counts = df[rfm_column].value_counts()
+
+    # 세그먼트 안에서 처음 나온 순서대로 대분류 건수를 모은 뒤 value_counts와 같은 방식으로 정렬
+    category_counts = {}
+    for (rfm, category), count in sizes.items():
+        category_counts.setdefault(rfm, ([], []))
+        category_counts[rfm][0].append(category)
+        category_counts[rfm][1].append(count)
+
+    result = {}
+    for rfm, count in segment_counts.items():
+        if count == 0:
+            continue
+        categories, counts = category_counts.get(rfm, ([], []))
+        top_categories = pd.Series(counts, index=pd.Index(categories, dtype=object),
+                                   dtype='int64').sort_values(ascending=False).head(top_n)
+        result[rfm] = {
+            'count': int(count),
+            'top_categories': top_categories,
+            'samples': {category: samples[(rfm, category)] for category in top_categories.index},
+        }
+    return result
+
+
+# 행 지문 파일 형식 버전 (RFM 분류/대분류 처리 규칙이나 요약 프롬프트가 바뀌면 올려서 저장된 분류와 요약을 버림)
+FINGERPRINT_VERSION = 4
+EXCLUDED_CATEGORY_CODE = -2  # 행 대분류 코드: 제외 대분류 (-1은 대분류 없음)
+
+
+def fingerprint_rows(df):
+    """VOC_COLUMNS 값으로 만든 행별 64비트 지문 (같은 내용의 행은 같은 값)"""
+    columns = [name for name in VOC_COLUMNS if name in df]
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def row_codes(df, is_japan=False):
+    """
+    process_voc_data로 처리한 df의 행별 분류 코드
+
+    Returns:
+        tuple: ({'dj', 'listener': RFM 코드 배열, 'category': 대분류 코드 배열}, 대분류 목록)
+    """
+    category_codes, categories = pd.factorize(df['대분류'])
+    category_codes[df['대분류'].isin(excluded_categories(is_japan)).to_numpy()] = EXCLUDED_CATEGORY_CODE
+    return {
+        'dj': df['DJ_RFM'].cat.codes.to_numpy(np.int8),
+        'listener': df['Listener_RFM'].cat.codes.to_numpy(np.int8),
+        'category': category_codes.astype(np.int32),
+    }, list(categories)
+
+
+def classify_voc_rows(df, row_fingerprints, is_japan=False, previous=None):
+    """
+    행을 RFM/대분류로 분류해 (필터링된 DataFrame, 행별 분류 코드, 대분류 목록) 반환
+
+    previous(이전 업로드 지문)가 있으면 같은 지문의 행은 저장된 분류 코드를 쓰고, 새로 추가되거나
+    바뀐 행만 process_voc_data로 분류합니다. 결과는 전체를 다시 분류한 것과 같습니다.
+    """
+    if previous is None:
+        df_filtered = process_voc_data(df, is_japan)
+        codes, categories = row_codes(df, is_japan)
+        return df_filtered, codes, categories
+
+    stored = previous['rows']
+    position = np.minimum(np.searchsorted(stored, row_fingerprints), max(len(stored) - 1, 0))
+    known = stored[position] == row_fingerprints if len(stored) else np.zeros(len(df), dtype=bool)
+    codes = {name: previous[name][position] if len(stored) else np.zeros(len(df), dtype=previous[name].dtype)
+             for name in ('dj', 'listener', 'category')}
+    categories = list(previous['categories'])
+
+    new = ~known
+    if new.any():
+        new_rows = df[new].copy()
+        process_voc_data(new_rows, is_japan)
+        new_codes, new_categories = row_codes(new_rows, is_japan)
+        for category in new_categories:
+            if category not in categories:
+                categories.append(category)
+        remap = np.array([categories.index(category) for category in new_categories] + [-1], dtype=np.int32)
+        new_category = new_codes['category']
+        new_codes['category'] = np.where(new_category >= 0, remap[new_category], new_category)
+        for name in codes:
+            codes[name] = codes[name].copy()
+            codes[name][new] = new_codes[name]
+
+    keep = codes['category'] != EXCLUDED_CATEGORY_CODE
+    df_filtered = df.loc[keep, [name for name in VOC_TEXT_COLUMNS if name in df]].copy()
+    df_filtered['DJ_RFM'] = pd.Categorical.from_codes(codes['dj'][keep], RFM_COMBINATIONS)
+    df_filtered['Listener_RFM'] = pd.Categorical.from_codes(codes['listener'][keep], RFM_COMBINATIONS)
+    df_filtered['대분류'] = np.asarray(pd.Categorical.from_codes(codes['category'][keep], categories), dtype=object)
+    return df_filtered, codes, categories
+
+
+def summary_settings(token_budget=SUMMARY_SAMPLE_TOKEN_BUDGET):
+    """저장된 그룹 요약을 재사용할 수 있는 조건 (하나라도 바뀌면 모든 그룹을 다시 요약)"""
+    return json.dumps([SUMMARY_MODEL, SUMMARY_MAX_TOKENS, token_budget, SAMPLE_CONTENT_MAX_TOKENS,
+                       SAMPLE_POOL_SIZE, SIMHASH_SHINGLE, SIMHASH_MAX_DISTANCE])
+
+
+def is_failed_summary(summary):
+    """API 키 누락/요청 실패로 만들어진 안내 문자열인지 여부"""
+    return summary is None or summary.startswith(("요약 실패", "⚠️"))
+
+
+def generate_monthly_data(file_path, month, api_key, password=None, is_japan=False, summarizer=None,
+                          data_dir='data', workbook_cache_dir=None, progress=None, cancel_event=None,
+                          incremental=True, fingerprints_id=None):
     if password is None:
-        import os
         password = os.environ.get("EXCEL_PASSWORD", "")
-    """월별 VOC 데이터 생성 (AI 요약 포함)"""
+    """
+    월별 VOC 데이터 생성 (AI 요약 포함, summarizer가 없으면 data_dir의 요약 캐시를 쓰는 요약기 생성)
+
+    workbook_cache_dir를 주면 복호화한 워크북을 그 폴더에 암호화해 두고 같은 파일은 다시 파싱하지 않습니다.
+    progress는 요약이 하나 끝날 때마다 (완료 수, 전체 수, 라벨)로 호출됩니다.
+    cancel_event가 설정되면 단계 사이와 API 호출 사이에서 멈추고 GenerationCancelled를 발생시킵니다.
+    incremental이면 같은 월 키의 이전 업로드 지문(data_dir/months/<월 키>.fingerprints.npz)과 비교해
+    새로 추가/변경된 행만 분류하고, 요약 샘플 행이 바뀌지 않은 그룹은 저장된 요약과 묶음 크기를 그대로
+    쓰며 바뀐 그룹만 유사 문의 묶기와 요약을 다시 합니다. 이번 업로드의 지문은 fingerprints_id의
+    대기 파일로 두었다가 save_monthly_data에 같은 fingerprints_id를 넘겨 월별 파일을 저장한 뒤에 반영됩니다.
+    (동시에 같은 달을 생성할 수 있으면 작업마다 다른 fingerprints_id를 쓰세요.)
+    """
     print(f"📂 {month} 데이터 처리 중...")
 
     # 파일 로드
-    df = load_excel_file(file_path, password)
+    df = load_excel_file(file_path, password, workbook_cache_dir)
     print(f"✅ 파일 로드 완료: {len(df):,}건")
 
+    return build_monthly_data(df, month, api_key, is_japan, summarizer, data_dir, progress, cancel_event,
+                              incremental, fingerprints_id)
+
+
+def build_monthly_data(df, month, api_key, is_japan=False, summarizer=None, data_dir='data', progress=None,
+                       cancel_event=None, incremental=True, fingerprints_id=None):
+    """
+    로드한 VOC DataFrame으로 월별 데이터 생성 (인자는 generate_monthly_data와 같음)
+
+    파일 로드와 분리되어 있어 다른 프로세스에서 읽은 DataFrame도 처리할 수 있습니다.
+    """
+    def check_cancelled():
+        if cancel_event is not None and cancel_event.is_set():
+            raise GenerationCancelled()
+
+    # 행 지문 (이전 업로드와 비교해 추가/변경된 행만 분류하고, 샘플이 바뀐 그룹만 다시 요약)
+    month_key = get_month_key(month, is_japan)
+    token_budget = summarizer.token_budget if summarizer is not None else SUMMARY_SAMPLE_TOKEN_BUDGET
+    settings = summary_settings(token_budget)
+    row_fingerprints = fingerprint_rows(df)
+    previous = load_month_fingerprints(month_key, data_dir) if incremental else None
+    if previous is not None:
+        changed_rows = int((~np.isin(row_fingerprints, previous['rows'])).sum())
+        removed_rows = int((~np.isin(previous['rows'], row_fingerprints)).sum())
+        print(f"🔁 이전 업로드 대비: 추가/변경 {changed_rows:,}건, 삭제 {removed_rows:,}건")
+
     # 데이터 처리
-    df_filtered = process_voc_data(df, is_japan)
+    check_cancelled()
+    df_filtered, codes, category_names = classify_voc_rows(df, row_fingerprints, is_japan, previous)
     print(f"🔍 필터링 완료: {len(df_filtered):,}건")
+    check_cancelled()
 
     # RFM 세그먼트
     important_rfm = [
@@ -298,13 +1225,21 @@ def generate_monthly_data(file_path, month, api_key, password=None, is_japan=Fal
 
     print(f"🤖 AI 요약 생성 중...")
 
-    # 각 RFM 세그먼트별 데이터 생성
+    # 역할별로 RFM × 대분류 그룹을 한 번씩만 집계하고, 요약 작업은 모아서 한 번에 동시 실행
+    role_groups = {
+        'dj': group_rfm_categories(df_filtered, 'DJ_RFM', sample_size=SAMPLE_POOL_SIZE),
+        'listener': group_rfm_categories(df_filtered, 'Listener_RFM', sample_size=SAMPLE_POOL_SIZE),
+    }
+    role_labels = {'dj': 'DJ', 'listener': 'Listener'}
+
+    tasks = []
+    targets = []
+    group_keys = []
     for rfm in important_rfm:
-        dj_data = df_filtered[df_filtered['DJ_RFM'] == rfm]
-        listener_data = df_filtered[df_filtered['Listener_RFM'] == rfm]
+        groups = {role: role_groups[role].get(rfm) for role in role_groups}
 
-        dj_count = len(dj_data)
-        listener_count = len(listener_data)
+        dj_count = groups['dj']['count'] if groups['dj'] else 0
+        listener_count = groups['listener']['count'] if groups['listener'] else 0
 
         if dj_count > 0 or listener_count > 0:
             segment_data = {
@@ -314,74 +1249,472 @@ def generate_monthly_data(file_path, month, api_key, password=None, is_japan=Fal
                 'listener_categories': {}
             }
 
-            # DJ 카테고리별 데이터 및 AI 요약
-            if dj_count > 0:
-                top_categories = dj_data['대분류'].value_counts().head(5)
-                for category, count in top_categories.items():
-                    print(f"  - {rfm} DJ {category} 요약 중...")
-                    summary = summarize_voc_with_ai(dj_data, category, 'DJ', api_key, is_japan)
-                    segment_data['dj_categories'][category] = {
-                        'count': int(count),
-                        'summary': summary
-                    }
-
-            # Listener 카테고리별 데이터 및 AI 요약
-            if listener_count > 0:
-                top_categories = listener_data['대분류'].value_counts().head(5)
-                for category, count in top_categories.items():
-                    print(f"  - {rfm} Listener {category} 요약 중...")
-                    summary = summarize_voc_with_ai(listener_data, category, 'Listener', api_key, is_japan)
-                    segment_data['listener_categories'][category] = {
+            # DJ / Listener 카테고리별 데이터 및 AI 요약
+            for role, group in groups.items():
+                if group is None:
+                    continue
+                categories = segment_data[f'{role}_categories']
+                for category, count in group['top_categories'].items():
+                    categories[category] = {
                         'count': int(count),
-                        'summary': summary
+                        'summary': None
                     }
+                    tasks.append((group['samples'][category], category, is_japan,
+                                  f"{rfm} {role_labels[role]} {category}"))
+                    targets.append(categories[category])
+                    group_keys.append(f"{role}|{rfm}|{category}")
 
             monthly_data['rfm_segments'][rfm] = segment_data
 
+    # 그룹 샘플(앞쪽 SAMPLE_POOL_SIZE건)의 행 지문이 이전 업로드와 같으면 저장된 요약과 묶음 크기 재사용
+    fingerprint_series = pd.Series(row_fingerprints, index=df.index)
+    pool_keys = [hashlib.sha256(fingerprint_series.loc[task[0].index].to_numpy().tobytes()).hexdigest()
+                 for task in tasks]
+    previous_groups = previous['groups'] if previous is not None and previous['settings'] == settings else {}
+    pending = []
+    for i, (group_key, pool_key) in enumerate(zip(group_keys, pool_keys)):
+        entry = previous_groups.get(group_key)
+        if entry is not None and entry['pool'] == pool_key:
+            targets[i]['summary'] = entry['summary']
+            targets[i]['clusters'] = entry['clusters']
+        else:
+            pending.append(i)
+    if previous is not None:
+        print(f"♻️ 요약 재사용 {len(tasks) - len(pending)}/{len(tasks)}건, 샘플이 바뀐 그룹 {len(pending)}건만 다시 요약")
+
+    # 유사 문의 묶기: 다시 요약할 그룹의 샘플 내용을 한 번에 정리하고 SimHash를 계산한 뒤 그룹별로 나눠 묶음
+    check_cancelled()
+    pools = [tasks[i][0] for i in pending]
+    if pools:
+        pool_sizes = np.array([len(pool) for pool in pools])
+        contents = voc_contents(pd.concat(pools, ignore_index=True), is_japan).to_numpy(dtype=object)
+        hashes = simhash_texts(contents)
+        bounds = np.concatenate([[0], np.cumsum(pool_sizes)])
+        for i, pool, start, end in zip(pending, pools, bounds[:-1], bounds[1:]):
+            representatives = collapse_near_duplicates(pool, is_japan, hashes=hashes[start:end],
+                                                       contents=contents[start:end])
+            tasks[i] = (representatives,) + tasks[i][1:]
+            # 묶음 크기는 토큰 예산 안에 들어가 실제 프롬프트에 담긴 대표 문의만 기록
+            prompt_rows, _ = fit_voc_samples(representatives, is_japan, token_budget)
+            targets[i]['clusters'] = [int(size) for size in prompt_rows['cluster_size']]
+        print(f"🧩 유사 문의 묶기: 샘플 {pool_sizes.sum():,}건 → 대표 "
+              f"{sum(len(tasks[i][0]) for i in pending):,}건 (프롬프트 포함 "
+              f"{sum(len(targets[i]['clusters']) for i in pending):,}건)")
+
+    def print_progress(done, total, label):
+        print(f"  - [{done}/{total}] {label} 요약 완료")
+        if progress:
+            progress(done, total, label)
+
+    own_summarizer = summarizer is None
+    if own_summarizer:
+        summarizer = VOCSummarizer(api_key, cache=get_summary_cache(data_dir))
+    cache = summarizer.cache
+    if cache is not None:
+        hits_before, misses_before = cache.hits, cache.misses
+    try:
+        summaries = summarizer.summarize_many([tasks[i] for i in pending], print_progress, cancel_event)
+    finally:
+        if own_summarizer:
+            summarizer.close()
+        if cache is not None:
+            cache.save()
+    for i, summary in zip(pending, summaries):
+        targets[i]['summary'] = summary
+    done = sum(1 for summary in summaries if summary is not None)
+    if done < len(summaries):
+        print(f"🛑 {month} 데이터 생성 취소: 요약 {done}/{len(summaries)}건 완료")
+        raise GenerationCancelled(partial=monthly_data, done=done, total=len(summaries))
+    summarizer.report()
+    if cache is not None:
+        hits = cache.hits - hits_before
+        lookups = hits + cache.misses - misses_before
+        if lookups:
+            print(f"💾 요약 캐시: {hits}/{lookups}건 적중 ({hits / lookups:.0%}), API 호출 {lookups - hits}건")
+
+    # 이번 업로드의 지문은 대기 파일로 두고 save_monthly_data가 월별 파일을 저장한 뒤 반영
+    # (실패한 요약은 다음 업로드에서 다시 요청하도록 제외)
+    unique_rows, first_rows, row_counts = np.unique(row_fingerprints, return_index=True, return_counts=True)
+    save_month_fingerprints(month_key, {
+        'rows': unique_rows,
+        'counts': row_counts,
+        'dj': codes['dj'][first_rows],
+        'listener': codes['listener'][first_rows],
+        'category': codes['category'][first_rows],
+        'categories': category_names,
+        'settings': settings,
+        'groups': {
+            group_key: {'pool': pool_key, 'summary': target['summary'], 'clusters': target['clusters']}
+            for group_key, pool_key, target in zip(group_keys, pool_keys, targets)
+            if not is_failed_summary(target['summary'])
+        },
+    }, data_dir, pending_fingerprints_id(fingerprints_id))
+
     print(f"✅ {month} 데이터 생성 완료!")
     return monthly_data
 
 
-def save_monthly_data(monthly_data, data_dir='data'):
-    """월별 데이터를 JSON 파일로 저장 (국가별로 구분)"""
-    os.makedirs(data_dir, exist_ok=True)
+# 월별 데이터 저장소: data/months/<월 키>.json에 한 달씩, data/months/index.json에 목록,
+# data/months/counts.json에 건수 집계 저장
+MONTHS_DIR = 'months'
+MONTH_INDEX_FILE = 'index.json'
+# 월/국가/역할/RFM/대분류별 건수만 모은 집계 (추이 차트용, 요약은 포함하지 않음)
+COUNTS_INDEX_FILE = 'counts.json'
+LEGACY_DATA_FILE = 'monthly_data.json'
+_storage_lock = threading.Lock()
 
-    # 기존 데이터 로드
-    json_path = os.path.join(data_dir, 'monthly_data.json')
-    if os.path.exists(json_path):
-        with open(json_path, 'r', encoding='utf-8') as f:
-            all_data = json.load(f)
-    else:
-        all_data = {'months': {}}
-
-    # 새 월 데이터 추가 (국가별로 키 구분: YYYY-MM_KR 또는 YYYY-MM_JP)
-    month = monthly_data['month']
-    is_japan = monthly_data.get('is_japan', False)
-    country_suffix = '_JP' if is_japan else '_KR'
-    month_key = f"{month}{country_suffix}"
-    
-    # 기존 형식(접미사 없음)의 데이터가 있으면 삭제 (마이그레이션)
-    if month in all_data['months']:
-        old_data = all_data['months'][month]
-        # 같은 국가의 데이터면 삭제
-        if old_data.get('is_japan', False) == is_japan:
-            del all_data['months'][month]
-            print(f"🔄 기존 형식 데이터 마이그레이션: {month} → {month_key}")
-    
-    all_data['months'][month_key] = monthly_data
-
-    # 저장
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(all_data, f, ensure_ascii=False, indent=2)
-
-    print(f"💾 데이터 저장 완료: {json_path} ({month_key})")
-    return json_path
 
+def get_month_key(month, is_japan=False):
+    """국가별 월 키 (YYYY-MM_KR 또는 YYYY-MM_JP)"""
+    return f"{month}{'_JP' if is_japan else '_KR'}"
 
-def load_all_monthly_data(data_dir='data'):
-    """저장된 모든 월별 데이터 로드"""
-    json_path = os.path.join(data_dir, 'monthly_data.json')
-    if os.path.exists(json_path):
-        with open(json_path, 'r', encoding='utf-8') as f:
+
+def write_json_atomic(path, data, indent=None):
+    """임시 파일에 쓴 뒤 교체해 읽는 쪽에서 반쯤 쓰인 파일을 보지 않게 저장"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    os.replace(temp_path, path)
+
+
+def month_index_path(data_dir='data'):
+    return os.path.join(data_dir, MONTHS_DIR, MONTH_INDEX_FILE)
+
+
+def month_path(month_key, data_dir='data'):
+    if os.path.basename(month_key) != month_key or f"{month_key}.json" in (MONTH_INDEX_FILE, COUNTS_INDEX_FILE):
+        raise ValueError(f"잘못된 월 키: {month_key}")
+    return os.path.join(data_dir, MONTHS_DIR, f"{month_key}.json")
+
+
+# fingerprints_id를 주지 않은 생성/저장이 함께 쓰는 대기 지문 이름
+DEFAULT_FINGERPRINTS_ID = 'next'
+
+
+def pending_fingerprints_id(fingerprints_id=None):
+    return fingerprints_id or DEFAULT_FINGERPRINTS_ID
+
+
+def fingerprints_path(month_key, data_dir='data', fingerprints_id=None):
+    """업로드 지문 파일 경로 (fingerprints_id를 주면 월별 파일 저장 전의 대기 파일)"""
+    if fingerprints_id:
+        return os.path.join(data_dir, MONTHS_DIR, f"{month_key}.fingerprints.{fingerprints_id}.pending.npz")
+    return os.path.join(data_dir, MONTHS_DIR, f"{month_key}.fingerprints.npz")
+
+
+def load_month_fingerprints(month_key, data_dir='data', fingerprints_id=None):
+    """
+    이전 업로드의 행 지문, 행 분류 코드, 그룹별 요약 (없거나 읽을 수 없으면 None)
+
+    fingerprints_id를 주면 아직 반영하지 않은 그 생성 작업의 대기 지문을 읽습니다.
+
+    Returns:
+        dict: {'rows': 정렬된 고유 행 지문, 'counts': 지문별 행 수, 'dj'/'listener'/'category': 지문별 분류 코드,
+               'categories': 대분류 목록, 'settings': summary_settings 값,
+               'groups': {'역할|RFM|대분류': {'pool': 샘플 지문, 'summary': 요약, 'clusters': 묶음 크기}}}
+    """
+    path = fingerprints_path(month_key, data_dir, fingerprints_id)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as stored:
+            if int(stored['version']) != FINGERPRINT_VERSION:
+                return None
+            return {
+                'rows': stored['rows'],
+                'counts': stored['counts'],
+                'dj': stored['dj'],
+                'listener': stored['listener'],
+                'category': stored['category'],
+                'categories': json.loads(str(stored['categories'])),
+                'settings': str(stored['settings']),
+                'groups': json.loads(str(stored['groups'])),
+            }
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ 이전 업로드 지문을 읽을 수 없어 전체를 다시 요약합니다: {e}")
+        return None
+
+
+def save_month_fingerprints(month_key, fingerprints, data_dir='data', fingerprints_id=None):
+    """업로드 지문 저장 (fingerprints_id를 주면 promote_month_fingerprints로 반영할 대기 파일로 저장)"""
+    path = fingerprints_path(month_key, data_dir, fingerprints_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'wb') as f:
+        np.savez(f, version=FINGERPRINT_VERSION, rows=fingerprints['rows'], counts=fingerprints['counts'],
+                 dj=fingerprints['dj'],
+                 listener=fingerprints['listener'], category=fingerprints['category'],
+                 categories=json.dumps(fingerprints['categories'], ensure_ascii=False),
+                 settings=fingerprints['settings'],
+                 groups=json.dumps(fingerprints['groups'], ensure_ascii=False))
+    os.replace(temp_path, path)
+
+
+def remove_pending_fingerprints(month_key, data_dir='data'):
+    """반영되지 않은(저장 실패/중단된 작업의) 대기 지문 파일 삭제"""
+    for path in glob.glob(fingerprints_path(month_key, data_dir, '*')):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def promote_month_fingerprints(month_key, fingerprints_id=None, data_dir='data'):
+    """월별 파일을 저장한 뒤 같은 생성 작업(fingerprints_id)의 대기 지문을 이 달의 지문으로 반영"""
+    pending_path = fingerprints_path(month_key, data_dir, pending_fingerprints_id(fingerprints_id))
+    if os.path.exists(pending_path):
+        os.replace(pending_path, fingerprints_path(month_key, data_dir))
+    remove_pending_fingerprints(month_key, data_dir)
+
+
+def index_entry(monthly_data):
+    """목록 파일에 둘 월별 요약 정보 (사이드바/월 선택에 필요한 값만)"""
+    return {
+        'month': monthly_data['month'],
+        'is_japan': monthly_data.get('is_japan', False),
+        'total_count': monthly_data.get('total_count', 0),
+    }
+
+
+def migrate_monthly_data(data_dir='data'):
+    """
+    기존 단일 파일(monthly_data.json)을 월별 파일로 변환
+
+    접미사 없는 기존 키는 is_japan에 맞는 국가별 키로 바꿉니다.
+    변환 후 원본은 monthly_data.json.migrated로 이름을 바꿔 보관합니다.
+    """
+    legacy_path = os.path.join(data_dir, LEGACY_DATA_FILE)
+    if not os.path.exists(legacy_path):
+        return False
+
+    with open(legacy_path, 'r', encoding='utf-8') as f:
+        legacy_months = json.load(f).get('months', {})
+
+    index = _read_month_index(data_dir)
+    counts = _read_counts_index(data_dir)
+    for key, monthly_data in legacy_months.items():
+        if not key.endswith(('_KR', '_JP')):
+            key = get_month_key(monthly_data['month'], monthly_data.get('is_japan', False))
+        write_json_atomic(month_path(key, data_dir), monthly_data, indent=2)
+        index['months'][key] = index_entry(monthly_data)
+        counts['months'][key] = count_rows(monthly_data)
+    _write_month_index(index, data_dir)
+    write_json_atomic(counts_index_path(data_dir), counts)
+
+    os.replace(legacy_path, f"{legacy_path}.migrated")
+    print(f"🔄 기존 데이터 마이그레이션 완료: {len(legacy_months)}개월 → {os.path.join(data_dir, MONTHS_DIR)}")
+    return True
+
+
+def _read_month_index(data_dir):
+    index_path = month_index_path(data_dir)
+    if os.path.exists(index_path):
+        with open(index_path, 'r', encoding='utf-8') as f:
             return json.load(f)
-    return {'months': {}}
+
+    # 목록 파일이 없으면 월별 파일에서 다시 생성
+    return {'months': {month_key: index_entry(monthly_data)
+                       for month_key, monthly_data in _iter_month_files(data_dir)}}
+
+
+def _iter_month_files(data_dir):
+    """저장된 월별 파일을 (월 키, 월별 데이터)로 순회"""
+    months_dir = os.path.join(data_dir, MONTHS_DIR)
+    if not os.path.isdir(months_dir):
+        return
+    for name in sorted(os.listdir(months_dir)):
+        if name.endswith('.json') and name not in (MONTH_INDEX_FILE, COUNTS_INDEX_FILE):
+            with open(os.path.join(months_dir, name), 'r', encoding='utf-8') as f:
+                yield name[:-5], json.load(f)
+
+
+def _write_month_index(index, data_dir):
+    write_json_atomic(month_index_path(data_dir), index, indent=2)
+
+
+def counts_index_path(data_dir='data'):
+    return os.path.join(data_dir, MONTHS_DIR, COUNTS_INDEX_FILE)
+
+
+def fingerprint_count_rows(fingerprints):
+    """
+    업로드 지문의 행별 분류 코드로 만든 전체 건수 행 목록 [역할, RFM, 대분류, 건수]
+
+    모든 RFM 세그먼트와 대분류를 포함하며, 대분류가 None인 행은 세그먼트 전체 건수입니다.
+    """
+    keep = fingerprints['category'] != EXCLUDED_CATEGORY_CODE
+    counts = fingerprints['counts'][keep]
+    categories = fingerprints['category'][keep]
+    rows = []
+    for role in ('dj', 'listener'):
+        rfm_codes = fingerprints[role][keep]
+        totals = np.bincount(rfm_codes, weights=counts, minlength=len(RFM_COMBINATIONS))
+        by_category = (pd.DataFrame({'rfm': rfm_codes, 'category': categories, 'count': counts})
+                       .loc[lambda table: table['category'] >= 0]
+                       .groupby(['rfm', 'category'])['count'].sum())
+        for rfm_code in np.flatnonzero(totals):
+            rows.append([role, RFM_COMBINATIONS[rfm_code], None, int(totals[rfm_code])])
+        for (rfm_code, category_code), count in by_category.items():
+            rows.append([role, RFM_COMBINATIONS[rfm_code], fingerprints['categories'][category_code], int(count)])
+    return rows
+
+
+def count_rows(monthly_data):
+    """
+    월별 데이터의 건수 행 목록 [역할, RFM, 대분류, 건수]
+
+    대분류가 None인 행은 세그먼트 전체 건수입니다. (대분류 행은 세그먼트별 상위 5개만 있음)
+    """
+    rows = []
+    for rfm, segment_data in monthly_data['rfm_segments'].items():
+        for role in ('dj', 'listener'):
+            rows.append([role, rfm, None, segment_data[f'{role}_count']])
+            for category, category_data in segment_data[f'{role}_categories'].items():
+                rows.append([role, rfm, category, category_data['count']])
+    return rows
+
+
+def month_count_rows(month_key, monthly_data, data_dir='data', fingerprints_id=None):
+    """
+    건수 집계에 저장할 한 달의 건수 행 목록
+
+    업로드 지문(fingerprints_id를 주면 그 생성 작업의 대기 지문)이 있으면 모든 세그먼트/대분류의
+    건수를 쓰고, 없으면 월별 데이터의 세그먼트별 상위 5개 대분류 건수로 만듭니다.
+    """
+    fingerprints = load_month_fingerprints(month_key, data_dir, fingerprints_id)
+    if fingerprints is not None:
+        return fingerprint_count_rows(fingerprints)
+    return count_rows(monthly_data)
+
+
+def _read_counts_index(data_dir):
+    path = counts_index_path(data_dir)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    # 집계 파일이 없으면 월별 파일에서 한 번만 다시 생성
+    counts = {'months': {month_key: month_count_rows(month_key, monthly_data, data_dir)
+                         for month_key, monthly_data in _iter_month_files(data_dir)}}
+    if counts['months']:
+        write_json_atomic(path, counts)
+    return counts
+
+
+def load_count_table(data_dir='data'):
+    """
+    건수 집계 표 (월별 파일과 요약은 읽지 않음)
+
+    Returns:
+        DataFrame: month_key, month, country('KR'/'JP'), role('dj'/'listener'), rfm,
+                   category(세그먼트 전체 건수 행은 None), count 열
+    """
+    with _storage_lock:
+        migrate_monthly_data(data_dir)
+        counts = _read_counts_index(data_dir)
+
+    records = [
+        (month_key, month_key[:-3], month_key[-2:], role, rfm, category, count)
+        for month_key, rows in counts['months'].items()
+        for role, rfm, category, count in rows
+    ]
+    return pd.DataFrame(records, columns=['month_key', 'month', 'country', 'role', 'rfm', 'category', 'count'])
+
+
+def load_month_index(data_dir='data'):
+    """
+    저장된 월 목록 로드 (월별 데이터 본문은 읽지 않음)
+
+    Returns:
+        dict: {'months': {월 키: {'month', 'is_japan', 'total_count'}}}
+    """
+    with _storage_lock:
+        migrate_monthly_data(data_dir)
+        return _read_month_index(data_dir)
+
+
+def load_monthly_data(month_key, data_dir='data'):
+    """선택한 한 달의 데이터만 로드 (없으면 None)"""
+    with _storage_lock:
+        migrate_monthly_data(data_dir)
+    path = month_path(month_key, data_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_monthly_data(monthly_data, data_dir='data', fingerprints_id=None):
+    """
+    월별 데이터를 국가별 월 키 파일로 저장하고 목록과 건수 집계 갱신
+
+    fingerprints_id는 build_monthly_data/generate_monthly_data에 넘긴 값과 같아야 합니다.
+    """
+    return save_monthly_data_batch([monthly_data], data_dir, [fingerprints_id])[0]
+
+
+def save_monthly_data_batch(monthly_data_list, data_dir='data', fingerprints_ids=None):
+    """
+    여러 달의 데이터를 저장하고 목록과 건수 집계는 한 번만 갱신
+
+    Args:
+        fingerprints_ids (list): 달마다 생성할 때 넘긴 fingerprints_id (None이면 모두 기본값)
+
+    Returns:
+        list: 저장한 월별 파일 경로 (monthly_data_list와 같은 순서)
+    """
+    if fingerprints_ids is None:
+        fingerprints_ids = [None] * len(monthly_data_list)
+    paths = []
+    with _storage_lock:
+        migrate_monthly_data(data_dir)
+        index = _read_month_index(data_dir)
+        counts = _read_counts_index(data_dir)
+        for monthly_data, fingerprints_id in zip(monthly_data_list, fingerprints_ids):
+            month_key = get_month_key(monthly_data['month'], monthly_data.get('is_japan', False))
+            path = month_path(month_key, data_dir)
+            write_json_atomic(path, monthly_data, indent=2)
+            counts['months'][month_key] = month_count_rows(
+                month_key, monthly_data, data_dir, pending_fingerprints_id(fingerprints_id))
+            promote_month_fingerprints(month_key, fingerprints_id, data_dir)
+            index['months'][month_key] = index_entry(monthly_data)
+            paths.append(path)
+            print(f"💾 데이터 저장 완료: {path} ({month_key})")
+        _write_month_index(index, data_dir)
+        write_json_atomic(counts_index_path(data_dir), counts)
+    return paths
+
+
+def delete_monthly_data(month_key, data_dir='data'):
+    """한 달 데이터 파일, 업로드 지문, 목록/건수 집계 항목 삭제 (삭제했으면 True)"""
+    path = month_path(month_key, data_dir)
+    with _storage_lock:
+        migrate_monthly_data(data_dir)
+        index = _read_month_index(data_dir)
+        found = index['months'].pop(month_key, None) is not None
+        if os.path.exists(path):
+            os.remove(path)
+            found = True
+        if os.path.exists(fingerprints_path(month_key, data_dir)):
+            os.remove(fingerprints_path(month_key, data_dir))
+        remove_pending_fingerprints(month_key, data_dir)
+        _write_month_index(index, data_dir)
+        counts = _read_counts_index(data_dir)
+        if counts['months'].pop(month_key, None) is not None:
+            write_json_atomic(counts_index_path(data_dir), counts)
+
+    if found:
+        print(f"🗑️ 데이터 삭제 완료: {month_key}")
+    return found
+
+
+def load_all_monthly_data(data_dir='data'):
+    """저장된 모든 월별 데이터 로드 (모든 월 파일을 읽으므로 목록만 필요하면 load_month_index 사용)"""
+    index = load_month_index(data_dir)
+    all_data = {'months': {}}
+    for month_key in index['months']:
+        monthly_data = load_monthly_data(month_key, data_dir)
+        if monthly_data is not None:
+            all_data['months'][month_key] = monthly_data
+    return all_data
@@ -0,0 +1,269 @@
+# whisper_benchmark.py
+"""
+whisper_with_speaker_diarization.py 성능 측정 도구
+
+사용 예:
+    python whisper_benchmark.py workers --duration 300 --workers 1 2 4
+    python whisper_benchmark.py vad --duration 600
+    python whisper_benchmark.py postprocess --turns 1000 10000 100000
+    python whisper_benchmark.py minutes --segments 600 --llm-workers 1 4
+"""
+import os
+import sys
+import time
+import json
+import wave
+import random
+import argparse
+import tempfile
+import numpy as np
+
+import whisper_with_speaker_diarization as wsd
+from mock_llm_server import start_mock_server
+
+def generate_synthetic_audio(path, duration, seed=0, silence_range=(0.3, 1.5), break_every=0, break_seconds=0):
+    """
+    발화와 무음이 번갈아 나오는 합성 WAV 파일 생성 (16kHz mono)
+
+    발화 구간은 음높이가 변하는 배음 신호에 음절 단위 진폭 변조를 준 것이고,
+    사이사이에 silence_range 길이(초)의 무음을 넣어 무음 구간 분할/VAD가 동작하도록 합니다.
+    break_every가 있으면 그 간격(초)마다 break_seconds 길이의 긴 무음을 넣습니다.
+    """
+    rng = np.random.default_rng(seed)
+    sr = wsd.SAMPLE_RATE
+    total = int(duration * sr)
+    audio = np.zeros(total, dtype=np.float32)
+
+    pos = 0
+    while pos < total:
+        speech_len = int(rng.uniform(1.5, 6.0) * sr)
+        end = min(pos + speech_len, total)
+        t = np.arange(end - pos) / sr
+        pitch = rng.uniform(100, 220) * (1 + 0.1 * np.sin(2 * np.pi * rng.uniform(0.2, 1.0) * t))
+        phase = 2 * np.pi * np.cumsum(pitch) / sr
+        voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+        syllables = 0.5 * (1 + np.sin(2 * np.pi * rng.uniform(3, 6) * t))
+        audio[pos:end] = 0.2 * voice * syllables
+        pos = end + int(rng.uniform(*silence_range) * sr)
+        if break_every and end // int(break_every * sr) != pos // int(break_every * sr):
+            pos += int(break_seconds * sr)
+
+    audio += rng.normal(0, 0.002, total).astype(np.float32)
+    pcm = (np.clip(audio, -1, 1) * 32767).astype(np.int16)
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sr)
+        f.writeframes(pcm.tobytes())
+    return path
+
+def benchmark_workers(args):
+    """작업 프로세스 수별 전사 실시간 배수(RTF) 측정"""
+    work_dir = tempfile.mkdtemp(prefix="whisper_bench_")
+    audio_path = generate_synthetic_audio(os.path.join(work_dir, "synthetic.wav"), args.duration)
+
+    print(f"\n합성 오디오: {audio_path} ({args.duration:.0f}초)")
+    print(f"모델: {args.model}, CPU 코어: {os.cpu_count()}")
+
+    rows = []
+    for workers in args.workers:
+        output_dir = os.path.join(work_dir, f"out_{workers}")
+        start = time.time()
+        result, _ = wsd.transcribe_audio(audio_path, output_dir, args.model, workers=workers)
+        elapsed = time.time() - start
+        if result is None:
+            print(f"\n❌ workers={workers} 전사 실패")
+            sys.exit(1)
+        rows.append((workers, elapsed, elapsed / args.duration, len(result["segments"])))
+
+    baseline = rows[0][1]
+    print("\n===== 작업 프로세스 수별 실시간 배수 (RTF = 처리 시간 / 오디오 길이) =====")
+    print(f"{'workers':>8} {'시간(초)':>10} {'RTF':>8} {'속도 향상':>10} {'세그먼트':>8}")
+    for workers, elapsed, rtf, num_segments in rows:
+        print(f"{workers:>8} {elapsed:>10.1f} {rtf:>8.3f} {baseline / elapsed:>9.2f}x {num_segments:>8}")
+
+def benchmark_vad(args):
+    """
+    회의처럼 짧은 쉼이 많은 오디오에서 VAD 사전 처리 유무에 따른 실제 전사 시간 비교
+
+    --break-every를 주면 그 간격(초)마다 --break-seconds 길이의 휴식(긴 무음)을 넣습니다.
+    """
+    work_dir = tempfile.mkdtemp(prefix="whisper_bench_")
+    audio_path = generate_synthetic_audio(os.path.join(work_dir, "synthetic_meeting.wav"), args.duration,
+                                          silence_range=(args.min_silence, args.max_silence),
+                                          break_every=args.break_every, break_seconds=args.break_seconds)
+
+    print(f"\n합성 오디오: {audio_path} ({args.duration:.0f}초, 쉼 {args.min_silence}~{args.max_silence}초"
+          + (f", {args.break_every:.0f}초마다 {args.break_seconds:.0f}초 휴식)" if args.break_every else ")"))
+    print(f"모델: {args.model}")
+
+    chunks = wsd.plan_vad_chunks(wsd.whisper.load_audio(audio_path))
+    print(f"VAD 조각 {len(chunks)}개, 디코딩 창 {wsd.count_decode_windows(chunks)}개 "
+          f"(전체 전사 {wsd.count_decode_windows([[0.0, args.duration]])}개)")
+
+    timings = {}
+    for use_vad in (False, True):
+        output_dir = os.path.join(work_dir, "out_vad" if use_vad else "out_full")
+        start = time.time()
+        result, _ = wsd.transcribe_audio(audio_path, output_dir, args.model, vad=use_vad)
+        if result is None:
+            print(f"\n❌ vad={use_vad} 전사 실패")
+            sys.exit(1)
+        timings[use_vad] = time.time() - start
+
+    print("\n===== VAD 사전 처리 결과 (실측) =====")
+    print(f"전체 전사: {timings[False]:.1f}초 (RTF {timings[False] / args.duration:.3f})")
+    print(f"VAD 전사:  {timings[True]:.1f}초 (RTF {timings[True] / args.duration:.3f})")
+    print(f"실측 속도 향상: {timings[False] / timings[True]:.2f}배")
+
+def generate_synthetic_minutes(num_turns, num_speakers=4, batch_turns=50, seed=0):
+    """
+    여러 배치 응답을 이어 붙인 것과 같은 형태의 합성 회의록 생성
+
+    Returns:
+        tuple: (머리말과 결정사항/후속 조치를 포함한 전체 회의록, 배치 응답 목록)
+    """
+    rng = random.Random(seed)
+    speakers = "ABCDEFGH"[:num_speakers]
+    lines = []
+    for i in range(num_turns):
+        speaker = rng.choice(speakers)
+        words = " ".join(f"발언{rng.randint(0, 999)}" for _ in range(rng.randint(3, 30)))
+        lines.append(f"**화자 {speaker}**: {words}")
+        if rng.random() < 0.1:
+            lines.append("이어지는 설명입니다.")
+        if rng.random() < 0.05:
+            lines.append("")
+    batches = ["\n".join(lines[i:i + batch_turns]) for i in range(0, len(lines), batch_turns)]
+
+    header = "# 회의록\n날짜: 2025년 1월\n참석자: 화자 A\n주제: 합성 회의\n\n## 회의 내용\n"
+    footer = "\n\n## 주요 결정사항\n- 결정사항 1\n\n## 후속 조치\n- 후속 조치 1 - 담당자: 화자 B\n"
+    return header + "\n".join(batches) + footer, batches
+
+def benchmark_postprocess(args):
+    """회의록 구조화/후처리가 발언 수에 선형으로 늘어나는지 측정"""
+    print("\n===== 회의록 후처리 확장성 (발언 수별) =====")
+    print(f"{'발언 수':>10} {'크기(KB)':>10} {'후처리(초)':>11} {'발언당(µs)':>11} {'배치 누적(초)':>13} {'발언당(µs)':>11}")
+    for num_turns in args.turns:
+        content, batches = generate_synthetic_minutes(num_turns)
+
+        start = time.perf_counter()
+        wsd.post_process_meeting_minutes(content)
+        post_elapsed = time.perf_counter() - start
+
+        # 배치 응답을 하나씩 이어 붙이면서 매번 다음 프롬프트용 화자 정보를 조회
+        start = time.perf_counter()
+        document = wsd.MinutesDocument()
+        for batch in batches:
+            document.add_turns(batch)
+            document.last_speakers()
+            document.speaker_roster()
+        document.render()
+        batch_elapsed = time.perf_counter() - start
+
+        print(f"{num_turns:>10} {len(content.encode('utf-8')) / 1024:>10.0f} {post_elapsed:>11.3f} "
+              f"{post_elapsed / num_turns * 1e6:>11.2f} {batch_elapsed:>13.3f} {batch_elapsed / num_turns * 1e6:>11.2f}")
+
+def generate_synthetic_transcript(path, num_segments, seed=0):
+    """Whisper 결과와 같은 형식의 합성 전사 JSON 생성"""
+    rng = random.Random(seed)
+    segments = []
+    position = 0.0
+    for i in range(num_segments):
+        duration = rng.uniform(1.5, 8.0)
+        words = " ".join(f"내용{rng.randint(0, 999)}" for _ in range(rng.randint(3, 25)))
+        segments.append({"id": i, "start": position, "end": position + duration, "text": f" {words}"})
+        position += duration + rng.uniform(0.1, 1.0)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"text": "".join(s["text"] for s in segments), "segments": segments, "language": "ko"},
+                  f, ensure_ascii=False)
+    return path
+
+def benchmark_minutes(args):
+    """LLM 대역 서버를 상대로 회의록 생성 전체 과정을 실행해 처리량 측정"""
+    work_dir = tempfile.mkdtemp(prefix="minutes_bench_")
+    json_path = generate_synthetic_transcript(os.path.join(work_dir, "synthetic.json"), args.segments)
+    server = start_mock_server(latency=args.latency, tokens_per_second=args.tokens_per_second)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"\n합성 전사: {json_path} (세그먼트 {args.segments}개)")
+    print(f"LLM 대역 서버: {base_url} (지연 {args.latency}초, 초당 {args.tokens_per_second:g} 토큰)")
+
+    rows = []
+    for workers in args.llm_workers:
+        output_dir = os.path.join(work_dir, f"out_{workers}")
+        os.makedirs(output_dir, exist_ok=True)
+        backend = wsd.AnthropicBackend("mock", base_url=base_url)
+        server_bytes = server.stats()["bytes"]
+        start = time.time()
+        minutes_path = wsd.generate_meeting_minutes(json_path, output_dir, "mock", args.batch_size, workers,
+                                                    token_budget=args.token_budget, backend=backend)
+        elapsed = time.time() - start
+        if minutes_path is None:
+            print(f"\n❌ llm-workers={workers} 회의록 생성 실패")
+            sys.exit(1)
+        rows.append((workers, elapsed, backend.requests, backend.bytes_streamed,
+                     server.stats()["bytes"] - server_bytes))
+    server.shutdown()
+
+    print("\n===== 회의록 생성 처리량 (LLM 대역 서버) =====")
+    print(f"{'llm-workers':>11} {'시간(초)':>10} {'요청 수':>8} {'응답(KB)':>10} {'전송(KB)':>10} {'KB/초':>8}")
+    for workers, elapsed, requests, text_bytes, wire_bytes in rows:
+        print(f"{workers:>11} {elapsed:>10.1f} {requests:>8} {text_bytes / 1024:>10.1f} "
+              f"{wire_bytes / 1024:>10.1f} {text_bytes / 1024 / elapsed:>8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Whisper 전사/회의록 파이프라인 벤치마크")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    workers_parser = subparsers.add_parser("workers", help="--workers 수에 따른 전사 RTF 비교")
+    workers_parser.add_argument("--duration", type=float, default=300,
+                                help="합성 오디오 길이(초) (기본값: 300)")
+    workers_parser.add_argument("--model", "-m", default="tiny",
+                                choices=["tiny", "base", "small", "medium", "large"],
+                                help="모델 크기 (기본값: tiny)")
+    workers_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4],
+                                help="비교할 작업 프로세스 수 목록 (기본값: 1 2 4)")
+    workers_parser.set_defaults(func=benchmark_workers)
+
+    vad_parser = subparsers.add_parser("vad", help="VAD 사전 처리 유무에 따른 전사 시간 비교")
+    vad_parser.add_argument("--duration", type=float, default=600,
+                            help="합성 오디오 길이(초) (기본값: 600)")
+    vad_parser.add_argument("--model", "-m", default="tiny",
+                            choices=["tiny", "base", "small", "medium", "large"],
+                            help="모델 크기 (기본값: tiny)")
+    vad_parser.add_argument("--min-silence", type=float, default=0.3,
+                            help="발화 사이 쉼 최소 길이(초) (기본값: 0.3)")
+    vad_parser.add_argument("--max-silence", type=float, default=2.0,
+                            help="발화 사이 쉼 최대 길이(초) (기본값: 2.0)")
+    vad_parser.add_argument("--break-every", type=float, default=0,
+                            help="이 간격(초)마다 긴 휴식 무음 삽입, 0이면 없음 (기본값: 0)")
+    vad_parser.add_argument("--break-seconds", type=float, default=60,
+                            help="휴식 무음 길이(초) (기본값: 60)")
+    vad_parser.set_defaults(func=benchmark_vad)
+
+    postprocess_parser = subparsers.add_parser("postprocess", help="회의록 후처리 시간의 발언 수별 확장성 측정")
+    postprocess_parser.add_argument("--turns", type=int, nargs="+", default=[1000, 10000, 100000],
+                                    help="합성 회의록의 발언 수 목록 (기본값: 1000 10000 100000)")
+    postprocess_parser.set_defaults(func=benchmark_postprocess)
+
+    minutes_parser = subparsers.add_parser("minutes", help="LLM 대역 서버를 상대로 회의록 생성 처리량 측정")
+    minutes_parser.add_argument("--segments", type=int, default=600,
+                                help="합성 전사의 세그먼트 수 (기본값: 600)")
+    minutes_parser.add_argument("--batch-size", "-bs", type=int, default=120,
+                                help="배치당 세그먼트 수 (기본값: 120)")
+    minutes_parser.add_argument("--token-budget", "-tb", type=int, default=0,
+                                help="요청당 토큰 예산, 지정 시 토큰 기준 배치 구성 (기본값: 0)")
+    minutes_parser.add_argument("--llm-workers", type=int, nargs="+", default=[1, 4],
+                                help="비교할 동시 요청 수 목록 (기본값: 1 4)")
+    minutes_parser.add_argument("--latency", type=float, default=0.5,
+                                help="대역 서버의 첫 토큰 지연(초) (기본값: 0.5)")
+    minutes_parser.add_argument("--tokens-per-second", type=float, default=200,
+                                help="대역 서버의 초당 출력 토큰 수 (기본값: 200)")
+    minutes_parser.set_defaults(func=benchmark_minutes)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+# whisper_model_server.py
+"""
+Whisper 모델 상주 서버
+
+모델을 메모리에 올려 둔 채 Unix 소켓으로 전사 요청을 받습니다.
+whisper_with_speaker_diarization.py는 서버가 실행 중이면 자동으로 이 서버를 사용하고,
+실행 중이 아니면 기존처럼 모델을 직접 로드합니다.
+
+사용 예:
+    python whisper_model_server.py --preload small --max-memory-gb 8
+    python whisper_model_server.py --status
+    python whisper_model_server.py --stop
+"""
+import gc
+import os
+import sys
+import time
+import argparse
+import threading
+import socketserver
+from collections import OrderedDict
+
+import numpy as np
+import whisper
+
+from whisper_with_speaker_diarization import (
+    DEFAULT_SERVER_SOCKET,
+    SAMPLE_RATE,
+    send_server_message,
+    recv_server_message,
+    request_model_server,
+)
+
+# 모델별 대략적인 메모리 사용량 (GB) - LRU 용량 계산에 사용
+MODEL_MEMORY_GB = {"tiny": 1, "base": 1, "small": 2, "medium": 5, "large": 10}
+
+class ModelCache:
+    """
+    로드된 모델을 메모리 사용량 기준 LRU로 관리
+
+    새 모델을 로드할 때 전체 사용량(로딩 중인 모델 포함)이 max_memory_gb를 넘으면
+    가장 오래 사용하지 않은 모델부터 내립니다. 모델마다 잠금이 있어
+    같은 모델에 대한 전사 요청은 순서대로 처리됩니다.
+
+    모델 로드는 전체 잠금 밖에서 하므로 한 모델을 처음 로드하는 동안에도 이미 로드된
+    모델의 요청은 바로 처리됩니다. 같은 모델을 동시에 요청하면 첫 요청만 로드하고
+    나머지는 로드가 끝나기를 기다립니다.
+    """
+
+    def __init__(self, max_memory_gb):
+        self.max_memory_gb = max_memory_gb
+        self.models = OrderedDict()  # 모델 이름 -> (모델, 잠금)
+        self.loading = {}  # 로딩 중인 모델 이름 -> 완료 이벤트
+        self._lock = threading.Lock()
+
+    def get(self, model_name):
+        while True:
+            with self._lock:
+                if model_name in self.models:
+                    self.models.move_to_end(model_name)
+                    return self.models[model_name]
+                loaded = self.loading.get(model_name)
+                if loaded is None:
+                    loaded = self.loading[model_name] = threading.Event()
+                    break
+            # 다른 요청이 로드 중이면 기다린 뒤 다시 확인 (로드에 실패했으면 이 요청이 다시 로드)
+            loaded.wait()
+
+        try:
+            with self._lock:
+                # memory_in_use()에는 로딩 목록에 올린 이 모델도 포함됨
+                while self.models and self.memory_in_use() > self.max_memory_gb:
+                    evicted, _ = self.models.popitem(last=False)
+                    print(f"🗑️ 모델 언로드 (LRU): {evicted}")
+                gc.collect()
+
+            print(f"⏳ 모델 로딩 중: {model_name}")
+            load_start = time.time()
+            entry = (whisper.load_model(model_name), threading.Lock())
+            with self._lock:
+                self.models[model_name] = entry
+            print(f"✅ 모델 로드 완료: {model_name} ({time.time() - load_start:.1f}초)")
+            return entry
+        finally:
+            with self._lock:
+                del self.loading[model_name]
+            loaded.set()
+
+    def memory_in_use(self):
+        """로드된 모델과 로딩 중인 다른 모델의 메모리 사용량 합계 (GB)"""
+        names = list(self.models) + [name for name in self.loading if name not in self.models]
+        return sum(MODEL_MEMORY_GB.get(name, 2) for name in names)
+
+class ModelRequestHandler(socketserver.StreamRequestHandler):
+    """요청 하나를 처리하고 연결 종료"""
+
+    def handle(self):
+        try:
+            header, payload = recv_server_message(self.rfile)
+            response = self.server.dispatch(header, payload)
+        except Exception as e:
+            response = {"ok": False, "error": str(e)}
+        send_server_message(self.connection, response)
+
+class WhisperModelServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, model_cache):
+        self.model_cache = model_cache
+        self.started_at = time.time()
+        self.requests_served = 0
+        super().__init__(socket_path, ModelRequestHandler)
+
+    def dispatch(self, header, payload):
+        cmd = header.get("cmd")
+        if cmd == "ping":
+            return {
+                "ok": True,
+                "models": list(self.model_cache.models),
+                "memory_gb": self.model_cache.memory_in_use(),
+                "max_memory_gb": self.model_cache.max_memory_gb,
+                "uptime": time.time() - self.started_at,
+                "requests": self.requests_served,
+            }
+        if cmd == "transcribe":
+            return {"ok": True, "result": self.transcribe(header, payload)}
+        if cmd == "shutdown":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"ok": True}
+        return {"ok": False, "error": f"알 수 없는 명령: {cmd}"}
+
+    def transcribe(self, header, payload):
+        if payload:
+            audio = np.frombuffer(payload, dtype=np.float32)
+        else:
+            audio = header["audio_path"]
+
+        model, lock = self.model_cache.get(header["model"])
+        with lock:
+            start = time.time()
+            result = model.transcribe(audio, **header.get("options", {}))
+        self.requests_served += 1
+
+        duration = len(audio) / SAMPLE_RATE if payload else None
+        detail = f"{duration:.0f}초 오디오, " if duration else ""
+        print(f"🎙️ 전사 완료: {header['model']} ({detail}{time.time() - start:.1f}초)")
+        return result
+
+def remove_stale_socket(socket_path):
+    """응답하지 않는 이전 서버의 소켓 파일 제거 (실행 중인 서버가 있으면 False)"""
+    if not os.path.exists(socket_path):
+        return True
+    try:
+        request_model_server(socket_path, {"cmd": "ping"}, timeout=2)
+        return False
+    except (OSError, RuntimeError, ValueError):
+        os.remove(socket_path)
+        return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Whisper 모델 상주 서버")
+    parser.add_argument("--socket", "-s", default=DEFAULT_SERVER_SOCKET,
+                        help=f"Unix 소켓 경로 (기본값: {DEFAULT_SERVER_SOCKET})")
+    parser.add_argument("--max-memory-gb", type=float, default=8,
+                        help="동시에 올려 둘 모델의 최대 메모리(GB), 초과 시 LRU로 언로드 (기본값: 8)")
+    parser.add_argument("--preload", nargs="*", default=[],
+                        choices=list(MODEL_MEMORY_GB),
+                        help="서버 시작 시 미리 로드할 모델")
+    parser.add_argument("--status", action="store_true", help="실행 중인 서버 상태 확인")
+    parser.add_argument("--stop", action="store_true", help="실행 중인 서버 종료")
+    args = parser.parse_args()
+
+    if args.status or args.stop:
+        try:
+            response = request_model_server(args.socket, {"cmd": "shutdown" if args.stop else "ping"}, timeout=5)
+        except (OSError, RuntimeError) as e:
+            print(f"❌ 서버에 연결할 수 없습니다: {e}")
+            sys.exit(1)
+        if args.stop:
+            print("🛑 서버 종료 요청 완료")
+        else:
+            print(f"✅ 실행 중 - 로드된 모델: {', '.join(response['models']) or '없음'} "
+                  f"({response['memory_gb']}/{response['max_memory_gb']}GB), "
+                  f"처리한 요청: {response['requests']}건, 가동 시간: {int(response['uptime'])}초")
+        return
+
+    if not remove_stale_socket(args.socket):
+        print(f"❌ 이미 서버가 실행 중입니다: {args.socket}")
+        sys.exit(1)
+
+    model_cache = ModelCache(args.max_memory_gb)
+    for model_name in args.preload:
+        model_cache.get(model_name)
+
+    # 소켓 폴더는 본인만 접근(0700)하고, 소켓 파일은 처음부터 0600으로 생성
+    socket_dir = os.path.dirname(os.path.abspath(args.socket))
+    os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+    if socket_dir == os.path.dirname(DEFAULT_SERVER_SOCKET):
+        os.chmod(socket_dir, 0o700)
+    old_umask = os.umask(0o177)
+    try:
+        server = WhisperModelServer(args.socket, model_cache)
+    finally:
+        os.umask(old_umask)
+    print(f"\n🚀 Whisper 모델 서버 시작: {args.socket} (최대 {args.max_memory_gb}GB)")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n서버를 종료합니다.")
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,128 @@
 # whisper_with_speaker_diarization.py
 import whisper
+import numpy as np
 import os
 import sys
 import time
 import json
+import random
 import anthropic
 from datetime import timedelta
 import re
+import textwrap
 import wave
 import contextlib
 import subprocess
+import hashlib
+import socket
+import threading
+import multiprocessing
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import pyperclip  # For clipboard functionality
 
-def transcribe_audio(audio_path, output_dir="output", model_name="small"):
+MINUTES_MODEL = "claude-3-7-sonnet-latest"
+SAMPLE_RATE = 16000  # Whisper 입력 샘플레이트
+DEFAULT_WINDOW_SECONDS = 600  # 창 길이를 지정하지 않았을 때 사용할 기본 창 길이 (10분)
+# 모델 서버 소켓은 다른 사용자가 쓸 수 없는 사용자 전용 폴더에 둠 ($XDG_RUNTIME_DIR 또는 ~/.cache, 0700)
+DEFAULT_SERVER_SOCKET = os.environ.get("WHISPER_SERVER_SOCKET") or os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "whisper_model_server"),
+    "whisper_model_server.sock")
+BATCH_MAX_OUTPUT_TOKENS = 20000  # 두 번째 배치부터 요청당 최대 출력 토큰
+# 회의록 요청 재시도 (요청 한도 초과, 연결/시간 초과, 서버 오류만 지수 백오프로 재시도)
+MINUTES_MAX_RETRIES = 4
+MINUTES_RETRY_BASE_DELAY = 2.0
+MINUTES_RETRYABLE_ERRORS = (anthropic.RateLimitError, anthropic.APIConnectionError, anthropic.InternalServerError)
+WHISPER_WINDOW_SECONDS = 30  # Whisper 디코딩 창 길이 (짧은 입력도 30초로 채워 디코딩)
+# 이보다 짧은 무음은 앞뒤 음성 구간과 한 조각으로 묶음 (따로 전사하면 마지막 창을 평균 15초 채우게 됨)
+VAD_MERGE_GAP_SECONDS = 15.0
+
+class MinutesCache:
+    """
+    회의록 API 응답을 프롬프트 해시로 저장하는 디스크 캐시
+    
+    키는 (백엔드 식별자, max_tokens, 완성된 프롬프트)의 SHA-256 해시입니다. 백엔드 식별자에는
+    백엔드 종류, base_url, 모델이 들어가므로 대역 서버(mock_llm_server.py)의 응답이 실제 API 응답으로
+    재사용되지 않습니다. 프롬프트에는 템플릿, 배치 세그먼트, 화자 컨텍스트가 모두 포함되므로
+    이 중 하나라도 바뀐 배치만 다시 요청합니다.
+    전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 삭제합니다(LRU).
+    """
+    
+    def __init__(self, cache_dir, max_bytes=200 * 1024 * 1024, backend_id=MINUTES_MODEL):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.backend_id = backend_id
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._evict()
+    
+    def _path(self, prompt, max_tokens):
+        key_source = json.dumps([self.backend_id, max_tokens, prompt], ensure_ascii=False)
+        key = hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def has(self, prompt, max_tokens):
+        return os.path.exists(self._path(prompt, max_tokens))
+    
+    def get(self, prompt, max_tokens):
+        """캐시된 응답 반환 (없으면 None)"""
+        path = self._path(prompt, max_tokens)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = json.load(f)["text"]
+            os.utime(path)  # LRU 순서 갱신
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return text
+    
+    def put(self, prompt, max_tokens, text):
+        """응답 저장 후 용량 제한 초과분 정리"""
+        if not text:
+            return
+        path = self._path(prompt, max_tokens)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"backend": self.backend_id, "max_tokens": max_tokens, "text": text}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._evict()
+    
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            
+            total_size = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total_size <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total_size -= size
+                except OSError:
+                    pass
+    
+    def report(self):
+        total = self.hits + self.misses
+        if total:
+            print(f"\n💾 응답 캐시: {self.hits}/{total} 적중 ({self.cache_dir})")
+
+def transcribe_audio(audio_path, output_dir="output", model_name="small", window_seconds=0, resume=False, workers=1,
+                     server_socket=None, stream_output=False, compact_json=False, vad=False, vad_threshold_db=None):
     """
     OpenAI Whisper를 사용하여 오디오 파일을 전사하는 함수
     
@@ -20,6 +130,17 @@ def transcribe_audio(audio_path, output_dir="output", model_name="small"):
         audio_path (str): 오디오 파일 경로
         output_dir (str): 출력 디렉토리
         model_name (str): 모델 크기 (tiny, base, small, medium, large)
+        window_seconds (float): 0보다 크면 이 길이의 창 단위로 전사하며 창마다 체크포인트 저장
+        resume (bool): 체크포인트 파일에서 마지막으로 완료된 창 이후부터 이어서 전사
+        workers (int): 1보다 크면 무음 구간에서 자른 조각을 여러 프로세스에서 동시에 전사
+        server_socket (str): 모델 서버 소켓 경로 (None이면 서버를 사용하지 않고 직접 로드)
+        stream_output (bool): 조각이 끝날 때마다 결과 파일에 바로 기록 (전체 결과를 메모리에 두지 않음)
+        compact_json (bool): JSON 결과를 들여쓰기 없이 저장
+        vad (bool): 에너지 기반 음성 구간 검출로 무음 구간을 건너뛰고 음성 구간만 전사
+        vad_threshold_db (float): 음성으로 판단할 프레임 에너지 기준(dBFS), None이면 자동 결정
+    
+    Returns:
+        tuple: (전사 결과, JSON 경로) - stream_output이면 전사 결과 대신 요약 정보
     """
     start_time = time.time()
     
@@ -28,72 +149,630 @@ def transcribe_audio(audio_path, output_dir="output", model_name="small"):
     print(f"오디오 파일: {audio_path}")
     print("=" * 30)
     
+    chunked = window_seconds > 0 or resume or workers > 1 or stream_output or vad
+    vad_options = {"threshold_db": vad_threshold_db} if vad else None
+    
     try:
-        # 1. 모델 로드
-        print("\n모델 로딩 중...")
-        model = whisper.load_model(model_name)
-        print(f"모델 로드 완료!")
-        
-        # 2. 전사 실행
-        print("\n전사 진행 중... (시간이 다소 소요될 수 있습니다)")
-        result = model.transcribe(
-            audio_path,
-            verbose=True,  # 진행 상황 표시
-            word_timestamps=True  # 단어별 타임스탬프 활성화
-        )
+        # 1. 모델 로드 (멀티 프로세스 모드에서는 각 작업 프로세스가 직접 로드)
+        model = None
+        if workers <= 1:
+            model = get_transcription_model(model_name, server_socket)
         
-        # 3. 출력 디렉토리 생성
+        # 2. 출력 디렉토리 생성
         os.makedirs(output_dir, exist_ok=True)
-        
-        # 4. 결과 저장
         base_name = os.path.splitext(os.path.basename(audio_path))[0]
-        
-        # a. JSON 결과 저장
+        checkpoint_path = os.path.join(output_dir, f"{base_name}.checkpoint.jsonl")
         json_path = os.path.join(output_dir, f"{base_name}.json")
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
-        
-        # b. 텍스트 결과 저장
         text_path = os.path.join(output_dir, f"{base_name}.txt")
-        with open(text_path, 'w', encoding='utf-8') as f:
-            f.write(result["text"])
-        
-        # c. SRT 자막 생성
         srt_path = os.path.join(output_dir, f"{base_name}.srt")
-        create_srt(result["segments"], srt_path)
+        
+        # 3. 전사 실행
+        print("\n전사 진행 중... (시간이 다소 소요될 수 있습니다)")
+        if stream_output:
+            # 조각이 끝날 때마다 JSONL/SRT/TXT에 바로 기록하고 JSON은 마지막에 파일에서 조립
+            writer = TranscriptWriter(output_dir, base_name)
+            transcribe_in_chunks(model, audio_path, checkpoint_path, model_name,
+                                 window_seconds, resume, workers, writer, vad_options)
+            result = writer.finish(json_path, compact_json)
+            num_segments = result["num_segments"]
+        else:
+            if chunked:
+                collector = ResultCollector()
+                transcribe_in_chunks(model, audio_path, checkpoint_path, model_name,
+                                     window_seconds, resume, workers, collector, vad_options)
+                result = collector.result()
+            else:
+                result = model.transcribe(
+                    audio_path,
+                    verbose=True,  # 진행 상황 표시
+                    word_timestamps=True  # 단어별 타임스탬프 활성화
+                )
+            num_segments = len(result["segments"])
+            
+            # 4. 결과 저장
+            # a. JSON 결과 저장
+            with open(json_path, 'w', encoding='utf-8') as f:
+                if compact_json:
+                    json.dump(result, f, ensure_ascii=False, separators=(',', ':'))
+                else:
+                    json.dump(result, f, ensure_ascii=False, indent=2)
+            
+            # b. 텍스트 결과 저장
+            with open(text_path, 'w', encoding='utf-8') as f:
+                f.write(result["text"])
+            
+            # c. SRT 자막 생성
+            create_srt(result["segments"], srt_path)
+        
+        # 모든 결과가 저장되었으므로 체크포인트 정리
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
         
         # 5. 요약 정보 출력
         total_time = time.time() - start_time
         print("\n===== 전사 완료 =====")
         print(f"소요 시간: {timedelta(seconds=int(total_time))}")
-        print(f"세그먼트 수: {len(result['segments'])}")
+        print(f"세그먼트 수: {num_segments}")
         print("\n생성된 파일:")
         print(f"- 텍스트: {text_path}")
         print(f"- JSON: {json_path}")
         print(f"- SRT: {srt_path}")
+        if stream_output:
+            print(f"- 세그먼트 JSONL: {result['segments_path']}")
         
         return result, json_path
         
     except KeyboardInterrupt:
         print("\n\n작업이 사용자에 의해 중단되었습니다.")
+        if chunked:
+            print("완료된 창은 체크포인트에 저장되어 있습니다. --resume 옵션으로 이어서 전사할 수 있습니다.")
         return None, None
     except Exception as e:
         print(f"\n오류 발생: {e}")
         import traceback
         traceback.print_exc()
+        if chunked:
+            print("완료된 창은 체크포인트에 저장되어 있습니다. --resume 옵션으로 이어서 전사할 수 있습니다.")
         return None, None
 
+def send_server_message(sock, header, payload=b""):
+    """모델 서버 메시지 전송 - JSON 헤더 한 줄 + 선택적 바이너리 페이로드"""
+    header = dict(header, payload_bytes=len(payload))
+    sock.sendall(json.dumps(header, ensure_ascii=False).encode('utf-8') + b"\n" + payload)
+
+def recv_server_message(stream):
+    """모델 서버 메시지 수신 - (헤더, 페이로드) 반환"""
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("모델 서버 연결이 종료되었습니다.")
+    header = json.loads(line)
+    payload_bytes = header.get("payload_bytes", 0)
+    payload = stream.read(payload_bytes) if payload_bytes else b""
+    return header, payload
+
+def request_model_server(socket_path, header, payload=b"", timeout=None):
+    """모델 서버에 요청을 보내고 응답 헤더 반환 (서버 오류는 RuntimeError)"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        send_server_message(sock, header, payload)
+        with sock.makefile('rb') as stream:
+            response, _ = recv_server_message(stream)
+    if not response.get("ok"):
+        raise RuntimeError(f"모델 서버 오류: {response.get('error')}")
+    return response
+
+class RemoteWhisperModel:
+    """
+    모델 서버에 상주하는 Whisper 모델을 로컬 모델처럼 사용하는 프록시
+    
+    transcribe()는 whisper 모델과 같은 인자를 받으며, 파일 경로는 그대로,
+    numpy 오디오 배열은 float32 PCM 바이트로 전송합니다.
+    """
+    
+    def __init__(self, socket_path, model_name):
+        self.socket_path = socket_path
+        self.model_name = model_name
+    
+    def transcribe(self, audio, **options):
+        header = {"cmd": "transcribe", "model": self.model_name, "options": options}
+        payload = b""
+        if isinstance(audio, str):
+            header["audio_path"] = os.path.abspath(audio)
+        else:
+            payload = np.asarray(audio, dtype=np.float32).tobytes()
+        return request_model_server(self.socket_path, header, payload)["result"]
+
+def get_transcription_model(model_name, server_socket=None):
+    """모델 서버가 실행 중이면 서버 모델을, 아니면 직접 로드한 모델을 반환"""
+    if server_socket:
+        try:
+            response = request_model_server(server_socket, {"cmd": "ping"}, timeout=5)
+            loaded = "로드됨" if model_name in response.get("models", []) else "첫 요청 시 로드"
+            print(f"\n⚡ 모델 서버 사용: {server_socket} ({model_name} {loaded})")
+            return RemoteWhisperModel(server_socket, model_name)
+        except (OSError, RuntimeError, ValueError):
+            print(f"\nℹ️ 모델 서버({server_socket})가 실행 중이 아니므로 모델을 직접 로드합니다.")
+    
+    print("\n모델 로딩 중...")
+    model = whisper.load_model(model_name)
+    print(f"모델 로드 완료!")
+    return model
+
+def load_audio_window(audio_path, start, duration):
+    """ffmpeg로 오디오의 일부 구간만 디코딩하여 16kHz mono float32 배열로 반환"""
+    cmd = [
+        "ffmpeg", "-nostdin", "-v", "error",
+        "-ss", f"{start:.3f}", "-t", f"{duration:.3f}",
+        "-i", audio_path,
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "-"
+    ]
+    out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
+
+def offset_segments(segments, offset):
+    """창 기준 타임스탬프를 원본 오디오 기준으로 변환 (단어 타임스탬프 포함)"""
+    shifted = []
+    for segment in segments:
+        segment = dict(segment)
+        segment["start"] = round(segment["start"] + offset, 3)
+        segment["end"] = round(segment["end"] + offset, 3)
+        if "seek" in segment:
+            segment["seek"] = segment["seek"] + int(offset * 100)  # 멜 프레임 단위 (10ms)
+        if "words" in segment:
+            segment["words"] = [
+                dict(word, start=round(word["start"] + offset, 3), end=round(word["end"] + offset, 3))
+                for word in segment["words"]
+            ]
+        shifted.append(segment)
+    return shifted
+
+class ResultCollector:
+    """조각별 전사 결과를 순서대로 받아 하나의 Whisper 결과 형식으로 합치는 수집기"""
+    
+    def __init__(self):
+        self.texts = []
+        self.segments = []
+        self.language = None
+    
+    def add(self, record):
+        self.language = self.language or record.get("language")
+        self.texts.append(record["text"])
+        for segment in record["segments"]:
+            self.segments.append(dict(segment, id=len(self.segments)))
+    
+    def result(self):
+        return {"text": "".join(self.texts), "segments": self.segments, "language": self.language}
+
+class TranscriptWriter:
+    """
+    조각별 전사 결과를 받는 즉시 세그먼트 JSONL, SRT, TXT 파일에 이어 쓰는 출력기
+    
+    세그먼트를 메모리에 모으지 않으므로 오디오 길이와 무관하게 메모리 사용량이 일정합니다.
+    {base}.json은 finish()에서 TXT와 JSONL 파일을 읽어 가며 조립합니다.
+    """
+    
+    def __init__(self, output_dir, base_name):
+        self.segments_path = os.path.join(output_dir, f"{base_name}.segments.jsonl")
+        self.text_path = os.path.join(output_dir, f"{base_name}.txt")
+        self.srt_path = os.path.join(output_dir, f"{base_name}.srt")
+        self._segments_file = open(self.segments_path, 'w', encoding='utf-8')
+        self._text_file = open(self.text_path, 'w', encoding='utf-8')
+        self._srt_file = open(self.srt_path, 'w', encoding='utf-8')
+        self.num_segments = 0
+        self.language = None
+    
+    def add(self, record):
+        self.language = self.language or record.get("language")
+        self._text_file.write(record["text"])
+        for segment in record["segments"]:
+            segment = dict(segment, id=self.num_segments)
+            self._segments_file.write(json.dumps(segment, ensure_ascii=False, separators=(',', ':')) + "\n")
+            write_srt_entry(self._srt_file, self.num_segments + 1, segment)
+            self.num_segments += 1
+        
+        for f in (self._segments_file, self._text_file, self._srt_file):
+            f.flush()
+    
+    def finish(self, json_path, compact=False):
+        """파일을 닫고 {base}.json을 조립한 뒤 요약 정보 반환"""
+        for f in (self._segments_file, self._text_file, self._srt_file):
+            f.close()
+        write_transcript_json(json_path, self.text_path, self.segments_path, self.language, compact)
+        return {"language": self.language, "num_segments": self.num_segments, "segments_path": self.segments_path}
+
+def write_transcript_json(json_path, text_path, segments_path, language, compact=False):
+    """
+    TXT와 세그먼트 JSONL 파일을 조금씩 읽어 Whisper 결과 형식의 JSON 파일로 기록
+    
+    compact가 아니면 json.dump(result, indent=2)와 같은 형식으로 출력합니다.
+    """
+    sep = "" if compact else " "
+    with open(json_path, 'w', encoding='utf-8') as out:
+        out.write("{" if compact else "{\n  ")
+        out.write(f'"text":{sep}"')
+        with open(text_path, 'r', encoding='utf-8') as f:
+            for piece in iter(lambda: f.read(65536), ""):
+                out.write(json.dumps(piece, ensure_ascii=False)[1:-1])
+        out.write('",' if compact else '",\n  ')
+        out.write(f'"segments":{sep}[')
+        
+        count = 0
+        with open(segments_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                segment = json.loads(line)
+                if compact:
+                    out.write(("," if count else "") + json.dumps(segment, ensure_ascii=False, separators=(',', ':')))
+                else:
+                    out.write(("," if count else "") + "\n" + textwrap.indent(
+                        json.dumps(segment, ensure_ascii=False, indent=2), "    "))
+                count += 1
+        
+        if compact:
+            out.write(f'],"language":{json.dumps(language)}}}')
+        else:
+            out.write(("\n  ]" if count else "]") + f',\n  "language": {json.dumps(language)}\n}}')
+
+def load_checkpoint(checkpoint_path, keep_segments=True):
+    """
+    체크포인트 JSONL 로드 - (메타 정보, {창 번호: 기록}) 반환
+    
+    keep_segments가 False이면 세그먼트 대신 해당 줄의 파일 위치("offset")만 보관합니다.
+    """
+    meta = None
+    completed = {}
+    if not os.path.exists(checkpoint_path):
+        return meta, completed
+    
+    with open(checkpoint_path, 'rb') as f:
+        offset = 0
+        for line in f:
+            line_offset, offset = offset, offset + len(line)
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 기록 도중 중단된 마지막 줄은 무시
+                continue
+            if record.get("type") == "meta":
+                meta = record
+            elif record.get("type") == "window":
+                if not keep_segments:
+                    record["segments"] = None
+                    record["offset"] = line_offset
+                completed[record["index"]] = record
+    return meta, completed
+
+def truncate_partial_line(checkpoint_path):
+    """기록 도중 중단되어 줄바꿈으로 끝나지 않은 마지막 줄을 잘라냄 (이어서 기록할 때 새 줄이 붙지 않도록)"""
+    with open(checkpoint_path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            step = min(64 * 1024, position)
+            position -= step
+            f.seek(position)
+            newline = f.read(step).rfind(b"\n")
+            if newline >= 0:
+                position += newline + 1
+                break
+        if position < end:
+            f.truncate(position)
+
+def read_checkpoint_segments(checkpoint_path, offset):
+    """체크포인트의 지정 위치에 기록된 조각의 세그먼트 읽기"""
+    with open(checkpoint_path, 'rb') as f:
+        f.seek(offset)
+        return json.loads(f.readline())["segments"]
+
+def plan_fixed_windows(duration, window_seconds):
+    """전체 길이를 고정 길이 창 [(시작, 끝), ...]으로 분할 (초 단위)"""
+    num_windows = max(1, int(np.ceil(duration / window_seconds)))
+    return [[i * window_seconds, min((i + 1) * window_seconds, duration)] for i in range(num_windows)]
+
+def plan_silence_chunks(audio, target_seconds, search_seconds=None, frame_seconds=0.03):
+    """
+    목표 길이마다 가장 조용한 지점에서 오디오를 자르는 조각 계획 생성
+    
+    각 목표 경계 주변(±search_seconds)에서 프레임 RMS 에너지가 가장 낮은 곳을 자르므로
+    발화 중간에서 잘리는 것을 피할 수 있습니다.
+    
+    Returns:
+        list: [(시작 초, 끝 초), ...]
+    """
+    duration = len(audio) / SAMPLE_RATE
+    if duration <= target_seconds:
+        return [[0.0, duration]]
+    
+    search_seconds = search_seconds or min(15.0, target_seconds / 4)
+    frame_length = int(frame_seconds * SAMPLE_RATE)
+    num_frames = len(audio) // frame_length
+    frames = audio[:num_frames * frame_length].reshape(num_frames, frame_length)
+    energy = np.sqrt(np.mean(frames ** 2, axis=1))
+    # 약 0.3초 이동 평균으로 짧은 끊김보다 긴 무음 구간의 가운데를 우선
+    smooth = max(1, int(0.3 / frame_seconds))
+    energy = np.convolve(energy, np.ones(smooth) / smooth, mode='same')
+    
+    cuts = [0.0]
+    ideal = target_seconds
+    while ideal < duration - search_seconds:
+        lo = max(int((ideal - search_seconds) / frame_seconds), 0)
+        hi = min(int((ideal + search_seconds) / frame_seconds), num_frames)
+        quietest = lo + int(np.argmin(energy[lo:hi]))
+        cut = round((quietest + 0.5) * frame_seconds, 3)
+        if cut > cuts[-1]:
+            cuts.append(cut)
+        ideal = cut + target_seconds
+    cuts.append(duration)
+    
+    return [[cuts[i], cuts[i + 1]] for i in range(len(cuts) - 1)]
+
+def detect_speech_regions(audio, threshold_db=None, frame_seconds=0.03, min_silence=1.0,
+                          min_speech=0.25, padding=0.3):
+    """
+    프레임 RMS 에너지로 음성 구간 검출 (NumPy 기반 VAD)
+    
+    threshold_db가 없으면 하위 10% 프레임 에너지를 배경 소음으로 보고 그보다 12dB 높은 값을
+    기준으로 하되, 전체가 발화인 녹음에서 음성을 놓치지 않도록 -35dBFS를 넘지 않게 합니다.
+    min_silence보다 짧은 무음은 음성 구간에 포함하고, 각 구간 앞뒤에 padding만큼 여유를 둡니다.
+    
+    Returns:
+        list: [(시작 초, 끝 초), ...]
+    """
+    duration = len(audio) / SAMPLE_RATE
+    frame_length = int(frame_seconds * SAMPLE_RATE)
+    num_frames = len(audio) // frame_length
+    if num_frames == 0:
+        return [[0.0, duration]] if duration > 0 else []
+    
+    frames = audio[:num_frames * frame_length].reshape(num_frames, frame_length)
+    energy_db = 20 * np.log10(np.sqrt(np.mean(frames ** 2, axis=1)) + 1e-10)
+    if threshold_db is None:
+        threshold_db = min(np.percentile(energy_db, 10) + 12, -35.0)
+    
+    # 음성 프레임 구간의 시작/끝 인덱스
+    is_speech = np.concatenate(([False], energy_db > threshold_db, [False]))
+    edges = np.flatnonzero(np.diff(is_speech.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+    
+    regions = []
+    for start, end in zip(starts * frame_seconds, ends * frame_seconds):
+        if regions and start - regions[-1][1] < min_silence:
+            regions[-1][1] = end
+        else:
+            regions.append([start, end])
+    
+    padded = []
+    for start, end in regions:
+        if end - start < min_speech:
+            continue
+        start, end = max(0.0, start - padding), min(duration, end + padding)
+        if padded and start <= padded[-1][1]:
+            padded[-1][1] = end
+        else:
+            padded.append([start, end])
+    
+    return [[round(start, 3), round(end, 3)] for start, end in padded]
+
+def plan_vad_chunks(audio, threshold_db=None, max_seconds=DEFAULT_WINDOW_SECONDS, merge_gap=VAD_MERGE_GAP_SECONDS):
+    """
+    음성 구간으로 전사할 조각 계획 생성
+    
+    조각마다 Whisper가 30초 창을 채워 디코딩하므로, 사이 무음이 merge_gap 이하인 이웃 구간은
+    무음까지 포함해 max_seconds 이내의 한 조각으로 묶고 긴 무음만 건너뜁니다.
+    max_seconds보다 긴 구간은 무음 지점에서 나눕니다.
+    """
+    pieces = []
+    for start, end in detect_speech_regions(audio, threshold_db):
+        if end - start <= max_seconds:
+            pieces.append([start, end])
+            continue
+        region = audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+        for sub_start, sub_end in plan_silence_chunks(region, max_seconds):
+            pieces.append([round(start + sub_start, 3), round(start + sub_end, 3)])
+    
+    chunks = []
+    for start, end in pieces:
+        if chunks and start - chunks[-1][1] <= merge_gap and end - chunks[-1][0] <= max_seconds:
+            chunks[-1][1] = end
+        else:
+            chunks.append([start, end])
+    return chunks
+
+def count_decode_windows(chunks):
+    """조각 계획을 전사할 때 디코딩하는 30초 창 수"""
+    return sum(max(1, int(np.ceil((end - start) / WHISPER_WINDOW_SECONDS))) for start, end in chunks)
+
+def report_vad_skip(chunks, duration):
+    """VAD로 건너뛴 오디오 분량과 디코딩 창 수 기준 예상 속도 향상 출력"""
+    speech = sum(end - start for start, end in chunks)
+    skipped = max(0.0, duration - speech)
+    ratio = skipped / duration if duration else 0.0
+    full_windows = count_decode_windows([[0.0, duration]])
+    vad_windows = count_decode_windows(chunks)
+    print(f"\n🔇 VAD: 조각 {len(chunks)}개, 전사 구간 {timedelta(seconds=int(speech))} / "
+          f"전체 {timedelta(seconds=int(duration))}")
+    print(f"   건너뛴 무음: {timedelta(seconds=int(skipped))} ({ratio:.1%}), "
+          f"디코딩 창 {vad_windows}개 (전체 전사 {full_windows}개), "
+          f"예상 속도 향상: {full_windows / max(vad_windows, 1):.2f}배")
+    if vad_windows >= full_windows:
+        print("   ⚠️ 건너뛸 긴 무음이 거의 없어 전체 전사보다 빠르지 않을 수 있습니다.")
+
+# 멀티 프로세스 전사용 작업자 상태 (작업 프로세스마다 모델을 한 번만 로드)
+_worker_model = None
+
+def _init_transcribe_worker(model_name, num_threads):
+    """작업 프로세스 초기화 - 스레드 수 제한 후 모델 로드"""
+    global _worker_model
+    import torch
+    torch.set_num_threads(num_threads)
+    _worker_model = whisper.load_model(model_name)
+
+def _detect_language_worker(audio):
+    """오디오 앞 30초로 언어 감지"""
+    mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), _worker_model.dims.n_mels)
+    _, probs = _worker_model.detect_language(mel.to(_worker_model.device))
+    return max(probs, key=probs.get)
+
+def _transcribe_chunk_worker(audio, language):
+    """조각 하나를 전사하여 필요한 필드만 반환"""
+    result = _worker_model.transcribe(audio, verbose=None, word_timestamps=True, language=language)
+    return {"text": result["text"], "segments": result["segments"], "language": result.get("language")}
+
+def transcribe_in_chunks(model, audio_path, checkpoint_path, model_name, window_seconds, resume, workers, sink,
+                         vad_options=None):
+    """
+    오디오를 조각으로 나누어 전사하고, 조각이 끝날 때마다 체크포인트에 기록
+    
+    완료된 조각은 순서대로 sink(ResultCollector 또는 TranscriptWriter)의 add()로 전달되며,
+    전달된 조각의 세그먼트는 메모리에서 바로 해제됩니다.
+    
+    - workers가 1이면 고정 길이 창을 순서대로 전사합니다 (창마다 ffmpeg로 해당 구간만 디코딩).
+    - workers가 1보다 크면 무음 구간에서 자른 조각을 프로세스 풀에서 동시에 전사합니다.
+    - vad_options가 있으면 검출된 음성 구간만 조각으로 만들어 전사합니다 (무음 구간은 건너뜀).
+    
+    resume이면 체크포인트에 기록된 조각 계획을 그대로 사용하고 완료된 조각은 건너뜁니다.
+    각 조각의 타임스탬프는 원본 오디오 기준으로 보정되어 저장됩니다.
+    """
+    meta, completed = load_checkpoint(checkpoint_path, keep_segments=False) if resume else (None, {})
+    
+    if meta and meta.get("model") != model_name:
+        print(f"\n⚠️ 체크포인트의 모델({meta.get('model')})이 현재 모델과 달라 처음부터 전사합니다.")
+        meta, completed = None, {}
+    
+    audio = None
+    if meta:
+        chunks = meta["chunks"]
+        print(f"\n🔁 체크포인트에서 재개: 완료된 조각 {len(completed)}/{len(chunks)}개 ({checkpoint_path})")
+        if meta.get("vad_duration"):
+            report_vad_skip(chunks, meta["vad_duration"])
+    else:
+        vad_duration = None
+        if vad_options is not None:
+            # 음성 구간을 찾기 위해 전체 오디오 디코딩
+            audio = whisper.load_audio(audio_path)
+            vad_duration = len(audio) / SAMPLE_RATE
+            max_seconds = window_seconds or (max(30.0, min(600.0, vad_duration / (workers * 2)))
+                                             if workers > 1 else DEFAULT_WINDOW_SECONDS)
+            chunks = plan_vad_chunks(audio, vad_options.get("threshold_db"), max_seconds)
+            report_vad_skip(chunks, vad_duration)
+        elif workers > 1:
+            # 무음 지점을 찾기 위해 전체 오디오 디코딩
+            audio = whisper.load_audio(audio_path)
+            duration = len(audio) / SAMPLE_RATE
+            target_seconds = window_seconds or max(30.0, min(600.0, duration / (workers * 2)))
+            chunks = plan_silence_chunks(audio, target_seconds)
+        else:
+            # 길이를 확인할 수 없으면 추정값 대신 전체 오디오를 디코딩한 길이로 창을 나눔
+            duration = probe_audio_duration(audio_path)
+            if duration is None:
+                print("⚠️ 오디오 길이를 확인할 수 없어 전체 오디오를 디코딩해 길이를 구합니다.")
+                audio = whisper.load_audio(audio_path)
+                duration = len(audio) / SAMPLE_RATE
+            chunks = plan_fixed_windows(duration, window_seconds or DEFAULT_WINDOW_SECONDS)
+        
+        with open(checkpoint_path, 'w', encoding='utf-8') as f:
+            meta = {"type": "meta", "audio": os.path.basename(audio_path), "model": model_name,
+                    "chunks": chunks, "vad_duration": vad_duration}
+            f.write(json.dumps(meta, ensure_ascii=False) + "\n")
+    
+    def chunk_audio(index):
+        start, end = chunks[index]
+        if audio is not None:
+            return audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+        return load_audio_window(audio_path, start, end - start)
+    
+    # 조각마다 언어가 달라지지 않도록 처음 감지된 언어를 고정
+    language = completed[min(completed)]["language"] if completed else None
+    pending = [index for index in range(len(chunks)) if index not in completed]
+    next_to_emit = 0
+    
+    def emit_ready():
+        """앞 조각부터 끊김 없이 완료된 구간을 sink로 전달"""
+        nonlocal next_to_emit
+        while next_to_emit in completed:
+            record = completed[next_to_emit]
+            if record["segments"] is None:
+                record["segments"] = read_checkpoint_segments(checkpoint_path, record["offset"])
+            sink.add(record)
+            # 다음 조각의 프롬프트에 필요한 텍스트 끝부분만 남기고 해제
+            record["segments"] = []
+            record["text"] = record["text"][-200:]
+            next_to_emit += 1
+    
+    emit_ready()
+    
+    truncate_partial_line(checkpoint_path)
+    with open(checkpoint_path, 'a', encoding='utf-8') as f:
+        def commit(index, chunk_result):
+            record = {
+                "type": "window",
+                "index": index,
+                "start": chunks[index][0],
+                "text": chunk_result["text"],
+                "language": chunk_result.get("language"),
+                "segments": offset_segments(chunk_result["segments"], chunks[index][0])
+            }
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+            completed[index] = record
+            print(f"✓ 조각 {index+1}/{len(chunks)} 체크포인트 저장 완료 ({len(completed)}/{len(chunks)})")
+            emit_ready()
+        
+        if workers > 1 and pending:
+            if audio is None:
+                audio = whisper.load_audio(audio_path)
+            num_threads = max(1, (os.cpu_count() or 1) // workers)
+            print(f"\n{len(pending)}개 조각을 {workers}개 프로세스로 전사합니다 (프로세스당 스레드 {num_threads}개)")
+            
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_transcribe_worker,
+                                     initargs=(model_name, num_threads)) as executor:
+                if language is None:
+                    language = executor.submit(_detect_language_worker, chunk_audio(pending[0])).result()
+                    print(f"감지된 언어: {language}")
+                
+                futures = {executor.submit(_transcribe_chunk_worker, chunk_audio(index), language): index
+                           for index in pending}
+                for future in as_completed(futures):
+                    commit(futures[future], future.result())
+        else:
+            for index in pending:
+                chunk = chunk_audio(index)
+                if chunk.size == 0:
+                    # 빈 조각도 기록해야 뒤 조각이 순서대로 sink로 전달됨
+                    commit(index, {"text": "", "segments": [], "language": language})
+                    continue
+                
+                print(f"\n조각 {index+1}/{len(chunks)} 전사 중... ({format_time_simple(chunks[index][0])} ~)")
+                
+                # 이전 조각의 마지막 문장을 프롬프트로 주어 경계에서 문맥 유지
+                previous = completed.get(index - 1)
+                chunk_result = model.transcribe(
+                    chunk,
+                    verbose=False,
+                    word_timestamps=True,
+                    language=language,
+                    initial_prompt=previous["text"][-200:] if previous else None
+                )
+                language = language or chunk_result.get("language")
+                commit(index, chunk_result)
+
 def create_srt(segments, output_path):
     """세그먼트로부터 SRT 자막 파일 생성"""
     with open(output_path, 'w', encoding='utf-8') as f:
         for i, segment in enumerate(segments):
-            # SRT 형식: 인덱스, 시간 범위, 텍스트
-            start = format_timestamp(segment["start"])
-            end = format_timestamp(segment["end"])
-            
-            f.write(f"{i+1}\n")
-            f.write(f"{start} --> {end}\n")
-            f.write(f"{segment['text'].strip()}\n\n")
+            write_srt_entry(f, i + 1, segment)
+
+def write_srt_entry(f, index, segment):
+    """SRT 항목 하나 기록 - 인덱스, 시간 범위, 텍스트"""
+    start = format_timestamp(segment["start"])
+    end = format_timestamp(segment["end"])
+    
+    f.write(f"{index}\n")
+    f.write(f"{start} --> {end}\n")
+    f.write(f"{segment['text'].strip()}\n\n")
 
 def format_timestamp(seconds):
     """초를 SRT 타임스탬프 형식(HH:MM:SS,mmm)으로 변환"""
@@ -136,26 +815,6 @@ def load_json_transcript(json_path):
         traceback.print_exc()
         return None, None
 
-def extract_last_speakers(content, num_speakers=5):
-    """마지막 n개의 화자 대화를 추출"""
-    speaker_pattern = r'\*\*(화자 [A-Z])\*\*: (.*?)(?=\*\*화자|\Z)'
-    matches = re.findall(speaker_pattern, content, re.DOTALL)
-    
-    # 마지막 num_speakers개의 화자 대화 반환
-    if matches:
-        return "\n".join([f"**{speaker}**: {text.strip()}" for speaker, text in matches[-num_speakers:]])
-    else:
-        return "아직 식별된 화자가 없습니다."
-
-def extract_all_speakers(content):
-    """모든 고유 화자를 추출"""
-    speaker_pattern = r'\*\*(화자 [A-Z])\*\*'
-    matches = re.findall(speaker_pattern, content)
-    if matches:
-        return ", ".join(sorted(set(matches)))
-    else:
-        return "아직 식별된 화자가 없습니다."
-
 def sample_meeting_content(content, max_samples=12, sample_size=300):
     """긴 회의 내용에서 균등하게 샘플 추출"""
     content_length = len(content)
@@ -177,91 +836,172 @@ def sample_meeting_content(content, max_samples=12, sample_size=300):
     
     return "\n...\n".join(samples)
 
+# 회의록 마크다운 구조화에 사용하는 패턴 (한 줄 단위로 적용)
+SPEAKER_TURN_PATTERN = re.compile(r'\*\*화자 ([A-Z])\*\*: (.*)')
+SPEAKER_MENTION_PATTERN = re.compile(r'\*\*화자 ([A-Z])\*\*')
+META_MARKER_PATTERN = re.compile(r'\*\*화자 구분 (?:결과|정리)\*\*|화자 구분된 전사 내용 \(\d+/\d+ 부분\)')
+META_BLOCK_PATTERN = re.compile(r'\*\*(?:마지막 화자 컨텍스트|지금까지 식별된 화자 목록|식별된 화자 목록)\*\*')
+MEETING_SECTION = "회의 내용"
+DECISION_SECTION = "주요 결정사항"
+FOLLOW_UP_SECTION = "후속 조치"
+NO_SPEAKERS_TEXT = "아직 식별된 화자가 없습니다."
+
+class MinutesDocument:
+    """
+    회의록 마크다운을 줄 단위로 한 번 읽어 만든 구조화 문서
+
+    머리말(제목/날짜/참석자/주제), 화자 발언, 그 뒤의 섹션(주요 결정사항, 후속 조치 등)으로
+    나누어 보관합니다. 읽는 동안 메타 정보 제거, 연속된 같은 화자 발언 병합, 화자 목록 갱신을
+    함께 처리하고, 정리된 마크다운은 render()로 이 모델에서 다시 만듭니다.
+    배치 응답은 add_turns()로 이어 붙이므로 배치마다 전체 회의록을 다시 검색하지 않습니다.
+    """
+
+    def __init__(self, recent_turns=5):
+        self.header = []                    # "## 회의 내용" 이전 줄
+        self.turns = []                     # [화자, 발언 조각 목록] (연속된 같은 화자 발언은 병합)
+        self.sections = []                  # (제목, 본문 줄 목록)
+        self.speakers = set()
+        self.recent = deque(maxlen=recent_turns)  # 병합 전 최근 발언 (후속 배치 프롬프트용)
+        self.has_meeting_section = False
+        self._section = None                # 현재 읽는 섹션 (None이면 머리말)
+        self._skipping = False              # 메타 정보 블록을 건너뛰는 중인지 여부
+
+    @classmethod
+    def parse(cls, content):
+        document = cls()
+        document.feed(content)
+        return document
+
+    def feed(self, content):
+        """마크다운 텍스트를 이어서 읽음"""
+        for line in content.split('\n'):
+            self._feed_line(line)
+
+    def add_turns(self, content):
+        """후속 배치의 회의 내용을 발언 목록에 이어 붙임 (읽던 섹션 위치는 유지)"""
+        section, self._section = self._section, MEETING_SECTION
+        self.has_meeting_section = True
+        self.feed(content)
+        self._section = section
+
+    def add_missing_batch(self, batch_num, num_batches, error):
+        """응답을 받지 못한 배치 자리에 누락 표시를 남김 (화자 발언과 섞이지 않는 별도 항목)"""
+        self.has_meeting_section = True
+        self.turns.append([None, [f"> ⚠️ 배치 {batch_num+1}/{num_batches} 누락: 응답을 받지 못했습니다 ({error})"]])
+
+    def has_section(self, title):
+        return any(section_title == title for section_title, _ in self.sections)
+
+    def _feed_line(self, line):
+        stripped = line.strip()
+
+        # 메타 정보 블록은 다음 강조 표시(**)나 제목이 나올 때까지 건너뜀
+        if self._skipping:
+            if not stripped.startswith(('**', '#')):
+                return
+            self._skipping = False
+        if stripped.startswith('**') and META_BLOCK_PATTERN.match(stripped):
+            self._skipping = True
+            return
+        if '화자 구분' in line:
+            line = META_MARKER_PATTERN.sub('', line)
+            stripped = line.strip()
+
+        if stripped.startswith('## '):
+            title = stripped[3:].strip()
+            if title == MEETING_SECTION:
+                self.has_meeting_section = True
+                self._section = MEETING_SECTION
+            else:
+                self._section = title
+                self.sections.append((title, []))
+            return
+
+        if '**화자' in line:
+            self.speakers.update(SPEAKER_MENTION_PATTERN.findall(line))
+
+        if self._section == MEETING_SECTION:
+            self._feed_turn_line(line, stripped)
+        elif self._section is None:
+            self._append_line(self.header, line)
+        else:
+            self._append_line(self.sections[-1][1], line)
+
+    def _feed_turn_line(self, line, stripped):
+        speaker_match = SPEAKER_TURN_PATTERN.match(line)
+        if speaker_match:
+            speaker, text = speaker_match.groups()
+            self.recent.append([speaker, [text]])
+            if self.turns and self.turns[-1][0] == speaker:
+                # 같은 화자가 계속 말하는 경우
+                self.turns[-1][1].append(text)
+            else:
+                self.turns.append([speaker, [text]])
+        elif stripped and self.turns and self.turns[-1][0] is not None and not stripped.startswith('#'):
+            # 화자 표시가 없는 텍스트 줄은 이전 화자의 발언에 추가
+            self.turns[-1][1].append(stripped)
+            if self.recent:
+                self.recent[-1][1].append(stripped)
+
+    @staticmethod
+    def _append_line(lines, line):
+        # 여러 줄 공백은 한 줄로 줄임
+        if not line.strip() and (not lines or not lines[-1]):
+            return
+        lines.append(line.rstrip())
+
+    def speaker_roster(self):
+        """지금까지 식별된 화자 목록 ("화자 A, 화자 B")"""
+        if not self.speakers:
+            return NO_SPEAKERS_TEXT
+        return ", ".join(f"화자 {speaker}" for speaker in sorted(self.speakers))
+
+    def last_speakers(self):
+        """최근 발언 (병합 전 기준)"""
+        if not self.recent:
+            return NO_SPEAKERS_TEXT
+        return "\n".join(f"**화자 {speaker}**: {' '.join(parts).strip()}" for speaker, parts in self.recent)
+
+    def meeting_text(self):
+        """병합된 화자 발언을 한 줄에 하나씩 나열한 회의 내용 (누락된 배치는 누락 표시)"""
+        return "\n\n".join(f"**화자 {speaker}**: {' '.join(parts)}" if speaker is not None else parts[0]
+                           for speaker, parts in self.turns)
+
+    def render(self):
+        """정리된 회의록 마크다운 생성"""
+        roster = ", ".join(f"화자 {speaker}" for speaker in sorted(self.speakers))
+        blocks = []
+
+        header = []
+        for line in self.header:
+            if "참석자: " in line:
+                line = line[:line.index("참석자: ")] + f"참석자: {roster}"
+            header.append(line)
+        header_text = "\n".join(header).strip('\n')
+        if header_text:
+            blocks.append(header_text)
+
+        if self.has_meeting_section or self.turns:
+            blocks.append(f"## {MEETING_SECTION}")
+            if self.turns:
+                blocks.append(self.meeting_text())
+
+        # 발언에 없는 화자 C가 결정사항/후속 조치에 나오면 화자 A로 통일
+        fix_speaker_c = 'C' not in self.speakers
+        for title, lines in self.sections:
+            body = textwrap.dedent("\n".join(lines)).strip('\n')
+            if fix_speaker_c and title in (DECISION_SECTION, FOLLOW_UP_SECTION):
+                body = body.replace('화자 C', '화자 A')
+            blocks.append(f"## {title}\n{body}" if body else f"## {title}")
+
+        return "\n\n".join(blocks) + "\n"
+
 def post_process_meeting_minutes(content):
     """회의록 내용을 후처리하여 일관성 있는 형식으로 변환"""
-    
-    # 1. 불필요한 마크업 및 중간 프롬프트 제거
-    patterns_to_remove = [
-        r'\*\*화자 구분 결과\*\*',
-        r'\*\*마지막 화자 컨텍스트\*\*.*?(?=\*\*|##|\Z)',
-        r'\*\*지금까지 식별된 화자 목록\*\*.*?(?=\*\*|##|\Z)',
-        r'\*\*화자 구분 정리\*\*',
-        r'\*\*식별된 화자 목록\*\*.*?(?=\*\*|##|\Z)',
-        r'화자 구분된 전사 내용 \(\d+/\d+ 부분\)'
-    ]
-    
-    for pattern in patterns_to_remove:
-        content = re.sub(pattern, '', content, flags=re.DOTALL)
-    
-    # 2. 여러 줄 공백을 한 줄로 줄이기
-    content = re.sub(r'\n{3,}', '\n\n', content)
-    
-    # 3. 화자 일관성 확인 및 수정
-    # 화자 목록 추출
-    speakers = set(re.findall(r'\*\*화자 ([A-Z])\*\*', content))
-    
-    # 헤더에서 참석자 목록 추출
-    header_match = re.search(r'참석자: (.*?)(?=\n|$)', content)
-    if header_match:
-        header_participants = header_match.group(1)
-        
-        # 헤더의 참석자 목록 업데이트
-        participants_list = ", ".join([f"화자 {speaker}" for speaker in sorted(speakers)])
-        content = re.sub(r'참석자: .*?(?=\n|$)', f'참석자: {participants_list}', content)
-    
-    # 4. 회의 내용 부분 정리
-    content_match = re.search(r'## 회의 내용(.*?)(?=##|$)', content, re.DOTALL)
-    if content_match:
-        meeting_content = content_match.group(1).strip()
-        
-        # 연속된 같은 화자의 발언을 하나로 합치기
-        current_speaker = None
-        merged_lines = []
-        lines = meeting_content.split('\n')
-        
-        buffer = ""
-        for line in lines:
-            speaker_match = re.match(r'\*\*화자 ([A-Z])\*\*: (.*)', line)
-            if speaker_match:
-                speaker, text = speaker_match.groups()
-                
-                if speaker == current_speaker and buffer:
-                    # 같은 화자가 계속 말하는 경우
-                    buffer += " " + text
-                else:
-                    # 다른 화자로 전환된 경우
-                    if buffer:
-                        merged_lines.append(buffer)
-                    buffer = f"**화자 {speaker}**: {text}"
-                    current_speaker = speaker
-            elif line.strip() and buffer:
-                # 화자 표시가 없는 텍스트 줄은 이전 화자의 발언에 추가
-                buffer += " " + line.strip()
-        
-        if buffer:  # 마지막 발언 추가
-            merged_lines.append(buffer)
-        
-        # 정리된 회의 내용으로 대체
-        cleaned_content = "\n\n".join(merged_lines)
-        content = content.replace(content_match.group(0), f"## 회의 내용\n\n{cleaned_content}\n\n")
-    
-    # 5. 후속 조치 및 결정사항 섹션 정리 (화자 C가 실제로 있는지 확인)
-    decision_section = re.search(r'## 주요 결정사항(.*?)(?=##|$)', content, re.DOTALL)
-    follow_up_section = re.search(r'## 후속 조치(.*?)(?=##|$)', content, re.DOTALL)
-    
-    # 화자 C 등 비일관적인 화자 처리
-    if 'C' not in speakers and ('화자 C' in content):
-        if decision_section:
-            decision_content = decision_section.group(1)
-            content = content.replace(decision_section.group(0), f"## 주요 결정사항{decision_content.replace('화자 C', '화자 A')}")
-        
-        if follow_up_section:
-            follow_up_content = follow_up_section.group(1)
-            content = content.replace(follow_up_section.group(0), f"## 후속 조치{follow_up_content.replace('화자 C', '화자 A')}")
-    
-    return content
+    return MinutesDocument.parse(content).render()
 
-def generate_meeting_minutes(json_path, output_dir, api_key, segment_batch_size=60):
+def generate_meeting_minutes(json_path, output_dir, api_key, segment_batch_size=60, max_workers=1, cache=None,
+                             token_budget=0, backend=None):
     """
     Anthropic API를 사용하여 전사 결과에서 화자를 구분하고 회의록 생성
     긴 전사 내용을 여러 청크로 나누어 처리합니다.
@@ -271,6 +1011,10 @@ def generate_meeting_minutes(json_path, output_dir, api_key, segment_batch_size=
         output_dir (str): 출력 디렉토리
         api_key (str): Anthropic API 키
         segment_batch_size (int): 한 번에 처리할 세그먼트 수
+        max_workers (int): 배치를 동시에 처리할 최대 API 요청 수 (1이면 순차 처리)
+        cache (MinutesCache): API 응답 캐시 (None이면 캐시 사용 안 함)
+        token_budget (int): 요청당 토큰 예산 (0보다 크면 세그먼트 수 대신 토큰 추정치로 배치 구성)
+        backend (LLMBackend): 사용할 LLM 백엔드 (None이면 api_key로 AnthropicBackend 생성)
     """
     print("\n===== 화자 구분 및 회의록 생성 시작 =====")
     
@@ -282,21 +1026,35 @@ def generate_meeting_minutes(json_path, output_dir, api_key, segment_batch_size=
     segments = transcript_data["segments"]
     full_text = transcript_data["text"]
     
+    if backend is None:
+        backend = AnthropicBackend(api_key)
+    
     # 세그먼트 수가 많은 경우 분할 처리
     total_segments = len(segments)
     
-    if total_segments <= segment_batch_size:
+    if token_budget > 0:
+        # 토큰 예산 기준으로 배치 구성
+        planned_batches = plan_token_batches(segments, token_budget)
+        report_token_batches(planned_batches, token_budget, total_segments)
+        batches = [batch for batch, _, _ in planned_batches]
+    elif total_segments <= segment_batch_size:
+        batches = [segments]
+    else:
+        batches = split_into_batches(segments, segment_batch_size)
+    
+    if len(batches) == 1:
         # 세그먼트가 적은 경우 한 번에 처리
-        return process_single_batch(segments, full_text, json_path, output_dir, api_key)
+        minutes_path = process_single_batch(segments, full_text, json_path, output_dir, backend, cache)
     else:
         # 세그먼트가 많은 경우 분할 처리
-        return process_multiple_batches(segments, json_path, output_dir, api_key, segment_batch_size)
+        minutes_path = process_multiple_batches(batches, json_path, output_dir, backend, max_workers, cache)
+    
+    if cache is not None:
+        cache.report()
+    return minutes_path
 
-def process_single_batch(segments, full_text, json_path, output_dir, api_key):
+def process_single_batch(segments, full_text, json_path, output_dir, backend, cache=None):
     """단일 배치로 회의록 생성 처리 - 스트리밍 모드 사용"""
-    # 3. Anthropic 클라이언트 초기화
-    client = anthropic.Anthropic(api_key=api_key)
-    
     # 4. 화자 구분 및 회의록 생성 프롬프트 작성
     prompt = f"""
     아래는 회의 녹음의 전사 내용입니다. 이 내용을 바탕으로 구조화된 회의록 형식으로 정리해주세요.
@@ -342,32 +1100,11 @@ def process_single_batch(segments, full_text, json_path, output_dir, api_key):
         end_time = format_time_simple(segment["end"])
         prompt += f"\n[{start_time} - {end_time}] {segment['text']}"
     
-    # 5. Anthropic API 호출
+    # 5. LLM API 호출
     try:
         print("\nAnthropic API로 화자 구분 및 회의록 생성 중... (스트리밍 모드)")
         
-        # 스트리밍 모드로 API 호출
-        stream = client.messages.create(
-            model="claude-3-7-sonnet-latest",
-            max_tokens=64000,
-            temperature=0.2,
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            stream=True  # 스트리밍 모드 활성화
-        )
-        
-        meeting_minutes = ""
-        print("\n응답 수신 중...")
-        
-        # 스트림에서 응답 수집
-        for chunk in stream:
-            if chunk.type == "content_block_delta" and chunk.delta.text:
-                meeting_minutes += chunk.delta.text
-                # 진행 상황을 표시하는 점 출력
-                print(".", end="", flush=True)
-        
-        print("\n응답 수신 완료!")
+        meeting_minutes = stream_completion(backend, prompt, 64000, cache=cache)
         
         # 회의록 후처리
         meeting_minutes = post_process_meeting_minutes(meeting_minutes)
@@ -388,13 +1125,389 @@ def process_single_batch(segments, full_text, json_path, output_dir, api_key):
         traceback.print_exc()
         return None
 
-def process_multiple_batches(segments, json_path, output_dir, api_key, batch_size):
-    """여러 배치로 나누어 회의록 생성 처리 - 스트리밍 모드 사용"""
-    client = anthropic.Anthropic(api_key=api_key)
-    total_segments = len(segments)
-    num_batches = (total_segments + batch_size - 1) // batch_size  # 올림 나눗셈
+def split_into_batches(segments, batch_size):
+    """세그먼트를 batch_size 단위의 배치 목록으로 분할"""
+    return [segments[i:i + batch_size] for i in range(0, len(segments), batch_size)]
+
+# 토큰 예산 기반 배치 구성에 사용하는 추정치
+CJK_PATTERN = re.compile(r'[\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u3400-\u9fff\uac00-\ud7af\uf900-\ufaff]')  # 한글 자모/가나/한자/한글 음절
+PROMPT_OVERHEAD_TOKENS = 1500   # 지시문 + 이전 화자 컨텍스트
+OUTPUT_OVERHEAD_TOKENS = 200    # 배치 응답의 머리말/맺음말
+SEGMENT_LINE_TOKENS = 10        # 세그먼트 한 줄의 타임스탬프 표기
+SPEAKER_LABEL_TOKENS = 8        # 출력의 "**화자 X**: " 표기
+OUTPUT_EXPANSION = 1.2          # 원문 대비 정리된 발언의 길이 비율
+OUTPUT_SAFETY_RATIO = 0.8       # 추정 오차를 감안해 최대 출력 토큰의 80%까지만 사용
+MIN_TOKEN_BUDGET = 4000
+
+def estimate_tokens(text):
+    """
+    텍스트의 토큰 수 추정
+
+    한글/한자/가나는 글자당 약 1토큰, 그 밖의 문자는 4글자당 약 1토큰으로 계산합니다.
+    """
+    cjk_chars = len(CJK_PATTERN.findall(text))
+    return cjk_chars + (len(text) - cjk_chars + 3) // 4
+
+def estimate_segment_tokens(segment):
+    """세그먼트 하나가 배치에 더하는 (입력, 예상 출력) 토큰 수"""
+    text_tokens = estimate_tokens(segment["text"])
+    # 입력: 전사 내용 본문 + 타임스탬프가 붙은 세부 세그먼트로 두 번 들어감
+    input_tokens = 2 * text_tokens + SEGMENT_LINE_TOKENS
+    output_tokens = int(text_tokens * OUTPUT_EXPANSION) + SPEAKER_LABEL_TOKENS
+    return input_tokens, output_tokens
+
+def split_long_segment(segment, max_text_tokens):
+    """
+    추정 토큰 수가 max_text_tokens를 넘는 세그먼트를 문장/공백 경계에서 나눔
+
+    나눈 조각의 시작/종료 시간은 글자 수 비율로 보간합니다.
+    """
+    text = segment["text"]
+    pieces = []
+    current = ""
+    for token in re.findall(r'\S+\s*', text):
+        if current and estimate_tokens(current + token) > max_text_tokens:
+            pieces.append(current)
+            current = ""
+        # 공백 없이 긴 문자열은 글자 단위로 자름
+        while estimate_tokens(token) > max_text_tokens:
+            cut = max(1, max_text_tokens)
+            while cut > 1 and estimate_tokens(token[:cut]) > max_text_tokens:
+                cut //= 2
+            pieces.append(token[:cut])
+            token = token[cut:]
+        current += token
+    if current:
+        pieces.append(current)
+
+    duration = segment["end"] - segment["start"]
+    total_chars = max(len(text), 1)
+    split_segments = []
+    consumed = 0
+    for piece in pieces:
+        start = segment["start"] + duration * consumed / total_chars
+        consumed += len(piece)
+        end = segment["start"] + duration * consumed / total_chars
+        split_segment = dict(segment, start=start, end=end, text=piece)
+        split_segment.pop("words", None)
+        split_segments.append(split_segment)
+    return split_segments
+
+def plan_token_batches(segments, token_budget, max_output_tokens=BATCH_MAX_OUTPUT_TOKENS):
+    """
+    요청당 토큰 예산(입력 + 예상 출력)에 맞춰 세그먼트를 배치로 묶음
+
+    짧은 세그먼트는 예산이 찰 때까지 한 배치에 채우고, 혼자서 예산을 넘는
+    세그먼트는 여러 조각으로 나눕니다. 배치의 예상 출력은 max_output_tokens의
+    OUTPUT_SAFETY_RATIO 이하로 유지해 응답이 잘리지 않도록 합니다.
+
+    Returns:
+        list: (배치 세그먼트 목록, 입력 토큰, 출력 토큰) 튜플 목록
+    """
+    input_limit = token_budget
+    output_limit = int(max_output_tokens * OUTPUT_SAFETY_RATIO)
+
+    # 세그먼트 하나에 허용되는 최대 본문 토큰 (배치에 혼자 있어도 두 한도를 모두 지키도록)
+    per_text_input = (token_budget - PROMPT_OVERHEAD_TOKENS - OUTPUT_OVERHEAD_TOKENS
+                      - SEGMENT_LINE_TOKENS - SPEAKER_LABEL_TOKENS) / (2 + OUTPUT_EXPANSION)
+    per_text_output = (output_limit - OUTPUT_OVERHEAD_TOKENS - SPEAKER_LABEL_TOKENS) / OUTPUT_EXPANSION
+    max_text_tokens = int(min(per_text_input, per_text_output))
+    if max_text_tokens < 100:
+        raise ValueError(f"토큰 예산이 너무 작습니다: {token_budget} (최소 {MIN_TOKEN_BUDGET})")
+
+    batches = []
+    current, current_input, current_output = [], PROMPT_OVERHEAD_TOKENS, OUTPUT_OVERHEAD_TOKENS
+    for segment in segments:
+        if estimate_tokens(segment["text"]) > max_text_tokens:
+            pieces = split_long_segment(segment, max_text_tokens)
+        else:
+            pieces = [segment]
+
+        for piece in pieces:
+            input_tokens, output_tokens = estimate_segment_tokens(piece)
+            over_budget = current_input + current_output + input_tokens + output_tokens > input_limit
+            over_output = current_output + output_tokens > output_limit
+            if current and (over_budget or over_output):
+                batches.append((current, current_input, current_output))
+                current, current_input, current_output = [], PROMPT_OVERHEAD_TOKENS, OUTPUT_OVERHEAD_TOKENS
+            current.append(piece)
+            current_input += input_tokens
+            current_output += output_tokens
+
+    if current:
+        batches.append((current, current_input, current_output))
+    return batches
+
+def report_token_batches(planned_batches, token_budget, num_segments):
+    """토큰 예산 배치 구성 결과 출력"""
+    totals = [input_tokens + output_tokens for _, input_tokens, output_tokens in planned_batches]
+    num_pieces = sum(len(batch) for batch, _, _ in planned_batches)
+    print(f"\n📦 토큰 예산 배치: 예산 {token_budget:,} 토큰, 세그먼트 {num_segments}개 → 배치 {len(planned_batches)}개")
+    if num_pieces > num_segments:
+        print(f"   긴 세그먼트 분할로 {num_pieces - num_segments}개 조각 추가")
+    for i, (batch, input_tokens, output_tokens) in enumerate(planned_batches):
+        print(f"   배치 {i+1}: 세그먼트 {len(batch)}개, 입력 ~{input_tokens:,} + 출력 ~{output_tokens:,} "
+              f"= ~{input_tokens + output_tokens:,} 토큰")
+    print(f"   배치당 평균 ~{sum(totals) // len(totals):,} 토큰 (최소 ~{min(totals):,}, 최대 ~{max(totals):,})")
+
+class LLMBackend(ABC):
+    """
+    회의록 생성에 사용하는 LLM 백엔드 기본 클래스
+
+    하위 클래스는 stream(prompt, max_tokens)만 구현하면 됩니다. (구현하지 않으면 생성 시 TypeError)
+    요청 수와 수신한 응답 바이트 수는 여러 스레드에서 호출해도 함께 집계됩니다.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes_streamed = 0
+        self._lock = threading.Lock()
+
+    def complete(self, prompt, max_tokens, on_text=None):
+        """
+        프롬프트 하나를 처리하고 (응답 텍스트, 종료 사유)를 반환
+
+        on_text가 주어지면 텍스트 조각을 받을 때마다 호출합니다.
+        """
+        parts = []
+        stop_reason = None
+        for kind, value in self.stream(prompt, max_tokens):
+            if kind == "text":
+                parts.append(value)
+                if on_text:
+                    on_text(value)
+            elif kind == "stop":
+                stop_reason = value
+        text = "".join(parts)
+        with self._lock:
+            self.requests += 1
+            self.bytes_streamed += len(text.encode('utf-8'))
+        return text, stop_reason
+
+    @abstractmethod
+    def stream(self, prompt, max_tokens):
+        """("text", 텍스트 조각) 또는 ("stop", 종료 사유) 튜플을 내보내는 제너레이터"""
+
+    def cache_id(self):
+        """응답 캐시 키에 넣을 백엔드 식별자 (같은 프롬프트라도 백엔드가 다르면 다른 응답)"""
+        return type(self).__name__
+
+    def report(self):
+        print(f"📡 LLM 요청 {self.requests}건, 응답 {self.bytes_streamed / 1024:.1f}KB 수신")
+
+class AnthropicBackend(LLMBackend):
+    """
+    Anthropic Messages API 스트리밍 백엔드
+
+    base_url을 지정하면 같은 API를 흉내 내는 서버(mock_llm_server.py 등)로 요청을 보냅니다.
+    """
+
+    def __init__(self, api_key, base_url=None, model=MINUTES_MODEL):
+        super().__init__()
+        self.client = anthropic.Anthropic(api_key=api_key, base_url=base_url)
+        self.base_url = base_url
+        self.model = model
+
+    def cache_id(self):
+        return json.dumps([type(self).__name__, self.base_url or "", self.model])
+
+    def stream(self, prompt, max_tokens):
+        stream = self.client.messages.create(
+            model=self.model,
+            max_tokens=max_tokens,
+            temperature=0.2,
+            messages=[
+                {"role": "user", "content": prompt}
+            ],
+            stream=True  # 스트리밍 모드 활성화
+        )
+        for chunk in stream:
+            if chunk.type == "content_block_delta" and chunk.delta.text:
+                yield "text", chunk.delta.text
+            elif chunk.type == "message_delta":
+                yield "stop", chunk.delta.stop_reason
+
+def retry_delay(error, attempt, base_delay=MINUTES_RETRY_BASE_DELAY):
+    """재시도 대기 시간: 응답의 Retry-After 헤더가 있으면 그 값, 없으면 지터를 더한 지수 백오프"""
+    response = getattr(error, 'response', None)
+    if response is not None:
+        try:
+            return min(float(response.headers.get('retry-after')), 60.0)
+        except (TypeError, ValueError):
+            pass
+    return min(base_delay * 2 ** (attempt - 1), 60.0) + random.uniform(0, base_delay)
+
+def complete_with_retry(backend, prompt, max_tokens, on_text=None, max_retries=MINUTES_MAX_RETRIES, label=""):
+    """backend.complete를 호출하고 재시도 가능한 오류는 백오프 후 다시 요청 (횟수를 넘으면 마지막 오류 발생)"""
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return backend.complete(prompt, max_tokens, on_text)
+        except MINUTES_RETRYABLE_ERRORS as e:
+            if attempt > max_retries:
+                raise
+            delay = retry_delay(e, attempt)
+            print(f"\n⏳ {label}재시도 {attempt}/{max_retries} ({type(e).__name__}, {delay:.1f}초 후)")
+            time.sleep(delay)
+
+def stream_completion(backend, prompt, max_tokens, show_progress=True, cache=None, label=""):
+    """
+    스트리밍 모드로 LLM 백엔드를 호출하고 응답 텍스트를 모아서 반환 (캐시 적중 시 호출 생략)
+
+    요청 한도 초과, 연결/시간 초과, 서버 오류는 MINUTES_MAX_RETRIES번까지 백오프 후 재시도합니다.
+    """
+    if cache is not None:
+        cached_text = cache.get(prompt, max_tokens)
+        if cached_text is not None:
+            if show_progress:
+                print("\n💾 캐시된 응답 사용")
+            return cached_text
+    
+    if show_progress:
+        print("\n응답 수신 중...")
+    
+    # 진행 상황을 표시하는 점 출력
+    on_text = (lambda _: print(".", end="", flush=True)) if show_progress else None
+    text, stop_reason = complete_with_retry(backend, prompt, max_tokens, on_text, label=label)
     
-    print(f"\n전체 세그먼트 수: {total_segments}, 배치 크기: {batch_size}, 총 배치 수: {num_batches}")
+    if show_progress:
+        print("\n응답 수신 완료!")
+    truncated = stop_reason == "max_tokens"
+    if truncated:
+        print(f"\n⚠️ 응답이 최대 출력 토큰({max_tokens})에서 잘렸습니다. --token-budget을 줄여 보세요.")
+    
+    # 잘린 응답은 캐시하지 않음 (다음 실행에서 다시 요청)
+    if cache is not None and not truncated:
+        cache.put(prompt, max_tokens, text)
+    return text
+
+def build_context_prompt(batch_num, num_batches, current_batch, last_speakers, all_speakers):
+    """이전 화자 정보를 포함한 후속 배치용 프롬프트 생성"""
+    current_batch_text = " ".join([segment["text"] for segment in current_batch])
+    
+    # 개선된 프롬프트: 명확한 지시 포함
+    context_prompt = f"""
+            아래는 긴 회의 녹음의 전사 내용 중 {batch_num+1}/{num_batches} 부분입니다.
+            이전 부분에서 이미 다음과 같이 화자를 구분했습니다:
+            
+            # 마지막 화자 컨텍스트 (참고용)
+            {last_speakers}
+            
+            # 지금까지 식별된 화자 목록
+            {all_speakers}
+            
+            이어서 아래 전사 내용에서 화자를 구분하여 정리해주세요.
+            아래 지침을 엄격하게 따라주세요:
+            
+            1. 각 화자의 이름은 반드시 이전과 동일한 화자 표기(화자 A, 화자 B 등)를 사용해주세요.
+            2. 새 화자가 확실하게 식별되지 않는 한, 기존 화자 중 하나로 분류해주세요.
+            3. 화자 구분은 "**화자 X**: 발언내용" 형식으로 정확히 표기해주세요.
+            4. 참고용 섹션 제목이나 메타데이터를 출력하지 마세요.
+            5. 회의 내용만 출력하고, 중간에 "화자 구분 결과"나 "화자 구분 정리" 같은 제목을 넣지 마세요.
+            
+            전사 내용({batch_num+1}/{num_batches} 부분):
+            {current_batch_text}
+            
+            세부 세그먼트 (타임스탬프 포함):
+            """
+    
+    # 세그먼트 정보 추가
+    for i, segment in enumerate(current_batch):
+        start_time = format_time_simple(segment["start"])
+        end_time = format_time_simple(segment["end"])
+        context_prompt += f"\n[{start_time} - {end_time}] {segment['text']}"
+    
+    return context_prompt
+
+def clean_batch_content(batch_content):
+    """후속 배치 응답에서 메타데이터를 제거하고 회의 내용만 추출"""
+    # 특정 제목 패턴을 찾아 제거
+    batch_content = re.sub(r'#+\s*화자\s*구분\s*(?:결과|정리).*?(?=\*\*화자|\Z)', '', batch_content, flags=re.DOTALL)
+    batch_content = re.sub(r'마지막\s*화자\s*컨텍스트.*?(?=\*\*화자|\Z)', '', batch_content, flags=re.DOTALL)
+    batch_content = re.sub(r'지금까지\s*식별된\s*화자\s*목록.*?(?=\*\*화자|\Z)', '', batch_content, flags=re.DOTALL)
+    
+    # 회의 내용만 추출
+    content_match = re.search(r'(?:## 회의 내용)?(.*?)(?=##|$)', batch_content, re.DOTALL)
+    if content_match:
+        return content_match.group(1).strip()
+    return batch_content
+
+def process_batches_concurrently(backend, batches, document, max_workers, save_interim, cache=None):
+    """
+    첫 배치에서 식별된 화자 목록을 공유하여 나머지 배치를 동시에 처리
+    
+    각 배치는 이전 배치의 결과를 기다리지 않고 첫 배치의 화자 컨텍스트만 참고합니다.
+    응답은 완료되는 순서와 무관하게 배치 순서대로 이어 붙입니다.
+    
+    Args:
+        backend (LLMBackend): LLM 백엔드
+        batches (list): 세그먼트 배치 목록 (첫 배치 포함)
+        document (MinutesDocument): 첫 배치로 생성된 회의록 (배치 응답이 순서대로 추가됨)
+        max_workers (int): 동시에 처리할 최대 요청 수
+        save_interim (callable): 중간 결과 저장 함수 (완료된 배치 수)
+        cache (MinutesCache): API 응답 캐시
+
+    Returns:
+        list: 재시도 후에도 실패해 누락 표시를 남긴 배치 번호 (1부터)
+    """
+    num_batches = len(batches)
+    last_speakers = document.last_speakers()
+    all_speakers = document.speaker_roster()
+    
+    print(f"\n화자 목록 공유: {all_speakers}")
+    print(f"나머지 {num_batches - 1}개 배치를 최대 {max_workers}개씩 동시에 처리합니다...")
+    
+    def run_batch(batch_num):
+        prompt = build_context_prompt(batch_num, num_batches, batches[batch_num], last_speakers, all_speakers)
+        batch_content = stream_completion(backend, prompt, BATCH_MAX_OUTPUT_TOKENS, show_progress=False, cache=cache,
+                                          label=f"배치 {batch_num+1} ")
+        return clean_batch_content(batch_content)
+    
+    completed = {}
+    missing = []
+    next_batch = 1
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(run_batch, batch_num): batch_num for batch_num in range(1, num_batches)}
+        
+        for future in as_completed(futures):
+            batch_num = futures[future]
+            try:
+                completed[batch_num] = future.result()
+                print(f"✓ 배치 {batch_num+1}/{num_batches} 응답 수신 완료")
+            except Exception as e:
+                print(f"\n배치 {batch_num+1} 처리 중 오류 발생: {e}")
+                completed[batch_num] = e
+            
+            # 앞 배치가 모두 끝난 구간까지만 순서대로 이어 붙이기 (실패한 배치는 누락 표시)
+            appended = False
+            while next_batch in completed:
+                additional_content = completed.pop(next_batch)
+                if isinstance(additional_content, Exception):
+                    document.add_missing_batch(next_batch, num_batches, additional_content)
+                    missing.append(next_batch + 1)
+                else:
+                    document.add_turns(additional_content)
+                next_batch += 1
+                appended = True
+            
+            if appended:
+                save_interim(next_batch)
+    
+    return missing
+
+def process_multiple_batches(batches, json_path, output_dir, backend, max_workers=1, cache=None):
+    """
+    여러 배치로 나누어 회의록 생성 처리 - 스트리밍 모드 사용
+    
+    batches는 split_into_batches 또는 plan_token_batches로 나눈 세그먼트 배치 목록입니다.
+    max_workers가 1보다 크면 첫 배치로 화자 목록을 만든 뒤 나머지 배치를 동시에 처리합니다.
+    """
+    total_segments = sum(len(batch) for batch in batches)
+    num_batches = len(batches)
+    
+    print(f"\n전체 세그먼트 수: {total_segments}, 총 배치 수: {num_batches}")
     
     # 중간 결과 저장 경로
     base_name = os.path.splitext(os.path.basename(json_path))[0]
@@ -402,7 +1515,7 @@ def process_multiple_batches(segments, json_path, output_dir, api_key, batch_siz
     minutes_path = os.path.join(output_dir, f"{base_name}_meeting_minutes.md")
     
     # 1단계: 첫 번째 배치로 회의록 기본 구조 생성
-    first_batch = segments[:batch_size]
+    first_batch = batches[0]
     first_batch_text = " ".join([segment["text"] for segment in first_batch])
     
     initial_prompt = f"""
@@ -442,166 +1555,64 @@ def process_multiple_batches(segments, json_path, output_dir, api_key, batch_siz
     try:
         print("\n회의록 구조 생성 중... (1단계) - 스트리밍 모드 사용")
         
-        # 스트리밍 모드로 API 호출
-        stream = client.messages.create(
-            model="claude-3-7-sonnet-latest",
-            max_tokens=64000,
-            temperature=0.2,
-            messages=[
-                {"role": "user", "content": initial_prompt}
-            ],
-            stream=True  # 스트리밍 모드 활성화
-        )
-        
-        initial_minutes = ""
-        print("\n응답 수신 중...")
-        
-        # 스트림에서 응답 수집
-        for chunk in stream:
-            if chunk.type == "content_block_delta" and chunk.delta.text:
-                initial_minutes += chunk.delta.text
-                # 진행 상황을 표시하는 점 출력
-                print(".", end="", flush=True)
-        
-        print("\n응답 수신 완료!")
+        initial_minutes = stream_completion(backend, initial_prompt, 64000, cache=cache)
         
-        # 회의록에서 회의 내용 부분 이전까지 추출 (헤더 부분)
-        header_match = re.search(r'(# 회의록.*?)## 회의 내용', initial_minutes, re.DOTALL)
-        if header_match:
-            header_content = header_match.group(1)
-        else:
-            header_content = initial_minutes.split("## 회의 내용")[0]
-        
-        # 회의록에서 회의 내용 부분 추출
-        content_match = re.search(r'## 회의 내용(.*?)(?=##|$)', initial_minutes, re.DOTALL)
-        if content_match:
-            meeting_content = content_match.group(1).strip()
-        else:
-            meeting_content = ""
+        # 첫 응답을 구조화 문서로 읽음 (머리말, 회의 내용, 결정사항/후속 조치)
+        # 이후 배치 응답은 이 문서에 이어 붙이며 화자 목록도 함께 갱신됨
+        document = MinutesDocument.parse(initial_minutes)
         
-        # 회의록에서 결정사항과 후속 조치 추출 (푸터 부분)
-        footer_content = ""
-        if "## 주요 결정사항" in initial_minutes:
-            footer_match = re.search(r'(## 주요 결정사항.*)', initial_minutes, re.DOTALL)
-            if footer_match:
-                footer_content = footer_match.group(1)
+        def save_interim(completed_batches):
+            """중간 결과 저장"""
+            with open(interim_path, 'w', encoding='utf-8') as f:
+                f.write(document.render())
+            print(f"✓ 중간 결과 업데이트 완료: {interim_path} (배치 {completed_batches}/{num_batches})")
         
         # 2단계: 나머지 배치 처리
-        all_meeting_content = meeting_content
-        
         # 중간 결과 저장
-        with open(interim_path, 'w', encoding='utf-8') as f:
-            f.write(f"{header_content}\n## 회의 내용\n{all_meeting_content}\n\n{footer_content}")
-        
-        print(f"\n✓ 중간 결과 저장 완료: {interim_path} (배치 1/{num_batches})")
+        save_interim(1)
         
-        for batch_num in range(1, num_batches):
-            start_idx = batch_num * batch_size
-            end_idx = min(start_idx + batch_size, total_segments)
-            current_batch = segments[start_idx:end_idx]
-            current_batch_text = " ".join([segment["text"] for segment in current_batch])
-            
-            # 이전 처리 결과에서 화자 정보 추출
-            last_speakers = extract_last_speakers(all_meeting_content, 5)
-            all_speakers = extract_all_speakers(all_meeting_content)
-            
-            # 개선된 프롬프트: 명확한 지시 포함
-            context_prompt = f"""
-            아래는 긴 회의 녹음의 전사 내용 중 {batch_num+1}/{num_batches} 부분입니다.
-            이전 부분에서 이미 다음과 같이 화자를 구분했습니다:
-            
-            # 마지막 화자 컨텍스트 (참고용)
-            {last_speakers}
-            
-            # 지금까지 식별된 화자 목록
-            {all_speakers}
-            
-            이어서 아래 전사 내용에서 화자를 구분하여 정리해주세요.
-            아래 지침을 엄격하게 따라주세요:
-            
-            1. 각 화자의 이름은 반드시 이전과 동일한 화자 표기(화자 A, 화자 B 등)를 사용해주세요.
-            2. 새 화자가 확실하게 식별되지 않는 한, 기존 화자 중 하나로 분류해주세요.
-            3. 화자 구분은 "**화자 X**: 발언내용" 형식으로 정확히 표기해주세요.
-            4. 참고용 섹션 제목이나 메타데이터를 출력하지 마세요.
-            5. 회의 내용만 출력하고, 중간에 "화자 구분 결과"나 "화자 구분 정리" 같은 제목을 넣지 마세요.
-            
-            전사 내용({batch_num+1}/{num_batches} 부분):
-            {current_batch_text}
-            
-            세부 세그먼트 (타임스탬프 포함):
-            """
+        missing_batches = []
+        if max_workers > 1 and num_batches > 1:
+            missing_batches = process_batches_concurrently(backend, batches, document, max_workers, save_interim, cache)
+        else:
+            for batch_num in range(1, num_batches):
+                current_batch = batches[batch_num]
             
-            # 세그먼트 정보 추가
-            for i, segment in enumerate(current_batch):
-                start_time = format_time_simple(segment["start"])
-                end_time = format_time_simple(segment["end"])
-                context_prompt += f"\n[{start_time} - {end_time}] {segment['text']}"
+                # 지금까지의 화자 정보 (문서에 누적된 값 사용)
+                context_prompt = build_context_prompt(batch_num, num_batches, current_batch,
+                                                      document.last_speakers(), document.speaker_roster())
             
-            print(f"\n회의 내용 추가 처리 중... ({batch_num+1}/{num_batches} 부분)")
-            try:
-                # API 호출 제한을 피하기 위한 짧은 대기 시간
-                if batch_num > 1 and batch_num % 3 == 0:
-                    print("API 제한 방지를 위해 3초 대기...")
-                    time.sleep(3)
-                
-                # 스트리밍 모드로 API 호출
-                batch_stream = client.messages.create(
-                    model="claude-3-7-sonnet-latest",
-                    max_tokens=20000,
-                    temperature=0.2,
-                    messages=[
-                        {"role": "user", "content": context_prompt}
-                    ],
-                    stream=True  # 스트리밍 모드 활성화
-                )
-                
-                batch_content = ""
-                print("\n응답 수신 중...")
-                
-
-                # 스트림에서 응답 수집
-                for chunk in batch_stream:
-                    if chunk.type == "content_block_delta" and chunk.delta.text:
-                        batch_content += chunk.delta.text
-                        # 진행 상황을 표시하는 점 출력
-                        print(".", end="", flush=True)
-                
-                print("\n응답 수신 완료!")
-                
-                # 회의 내용만 추출하고 메타데이터 제거
-                # 특정 제목 패턴을 찾아 제거
-                batch_content = re.sub(r'#+\s*화자\s*구분\s*(?:결과|정리).*?(?=\*\*화자|\Z)', '', batch_content, flags=re.DOTALL)
-                batch_content = re.sub(r'마지막\s*화자\s*컨텍스트.*?(?=\*\*화자|\Z)', '', batch_content, flags=re.DOTALL)
-                batch_content = re.sub(r'지금까지\s*식별된\s*화자\s*목록.*?(?=\*\*화자|\Z)', '', batch_content, flags=re.DOTALL)
+                print(f"\n회의 내용 추가 처리 중... ({batch_num+1}/{num_batches} 부분)")
+                try:
+                    # API 호출 제한을 피하기 위한 짧은 대기 시간 (캐시된 배치는 대기 불필요)
+                    is_cached = cache is not None and cache.has(context_prompt, BATCH_MAX_OUTPUT_TOKENS)
+                    if batch_num > 1 and batch_num % 3 == 0 and not is_cached:
+                        print("API 제한 방지를 위해 3초 대기...")
+                        time.sleep(3)
                 
-                # 회의 내용만 추출
-                content_match = re.search(r'(?:## 회의 내용)?(.*?)(?=##|$)', batch_content, re.DOTALL)
-                if content_match:
-                    additional_content = content_match.group(1).strip()
-                    all_meeting_content += "\n" + additional_content
-                else:
-                    all_meeting_content += "\n" + batch_content
+                    batch_content = stream_completion(backend, context_prompt, BATCH_MAX_OUTPUT_TOKENS, cache=cache,
+                                                      label=f"배치 {batch_num+1} ")
                 
-                # 중간 결과 저장
-                with open(interim_path, 'w', encoding='utf-8') as f:
-                    f.write(f"{header_content}\n## 회의 내용\n{all_meeting_content}\n\n{footer_content}")
+                    # 회의 내용만 추출하고 메타데이터 제거
+                    document.add_turns(clean_batch_content(batch_content))
                 
-                print(f"✓ 중간 결과 업데이트 완료: {interim_path} (배치 {batch_num+1}/{num_batches})")
+                    # 중간 결과 저장
+                    save_interim(batch_num + 1)
             
-            except Exception as e:
-                print(f"\n배치 {batch_num+1} 처리 중 오류 발생: {e}")
-                import traceback
-                traceback.print_exc()
+                except Exception as e:
+                    print(f"\n배치 {batch_num+1} 처리 중 오류 발생: {e}")
+                    import traceback
+                    traceback.print_exc()
                 
-                # 오류 발생 시에도 지금까지의 결과 저장
-                print(f"⚠️ 오류 발생: 지금까지의 결과를 저장합니다.")
-                with open(interim_path, 'w', encoding='utf-8') as f:
-                    f.write(f"{header_content}\n## 회의 내용\n{all_meeting_content}\n\n{footer_content}")
+                    # 재시도 후에도 실패한 배치는 누락 표시를 남기고 다음 배치로 진행
+                    document.add_missing_batch(batch_num, num_batches, e)
+                    missing_batches.append(batch_num + 1)
+                    save_interim(batch_num + 1)
         
         # 3단계: 마지막 배치로 결정사항 및 후속 조치 생성 또는 업데이트
-        if not footer_content:
+        if not document.has_section(DECISION_SECTION):
             # 전체 내용에서 샘플링
-            meeting_content_samples = sample_meeting_content(all_meeting_content)
+            meeting_content_samples = sample_meeting_content(document.meeting_text())
             
             summarize_prompt = f"""
             아래는 회의 전체 내용에서 샘플링한 주요 부분입니다. 
@@ -628,28 +1639,7 @@ def process_multiple_batches(segments, json_path, output_dir, api_key, batch_siz
             
             print("\n주요 결정사항 및 후속 조치 생성 중...")
             try:
-                # 스트리밍 모드로 API 호출
-                summary_stream = client.messages.create(
-                    model="claude-3-7-sonnet-latest", 
-                    max_tokens=4000,
-                    temperature=0.2,
-                    messages=[
-                        {"role": "user", "content": summarize_prompt}
-                    ],
-                    stream=True  # 스트리밍 모드 활성화
-                )
-                
-                footer_content = ""
-                print("\n응답 수신 중...")
-                
-                # 스트림에서 응답 수집
-                for chunk in summary_stream:
-                    if chunk.type == "content_block_delta" and chunk.delta.text:
-                        footer_content += chunk.delta.text
-                        # 진행 상황을 표시하는 점 출력
-                        print(".", end="", flush=True)
-                
-                print("\n응답 수신 완료!")
+                footer_content = stream_completion(backend, summarize_prompt, 4000, cache=cache)
                 
             except Exception as e:
                 print(f"\n결정사항 생성 중 오류 발생: {e}")
@@ -660,18 +1650,19 @@ def process_multiple_batches(segments, json_path, output_dir, api_key, batch_siz
                 ## 후속 조치
                 - 후속 조치를 추출할 수 없습니다.
                 """
+            document.feed(footer_content)
         
-        # 4단계: 최종 회의록 조합 및 후처리
-        final_minutes = f"{header_content}\n## 회의 내용\n{all_meeting_content}\n\n{footer_content}"
-        
-        # 후처리 적용
-        final_minutes = post_process_meeting_minutes(final_minutes)
+        # 4단계: 최종 회의록 조합 (문서 모델에서 정리된 마크다운 생성)
+        final_minutes = document.render()
         
         # 최종 회의록 저장
         with open(minutes_path, 'w', encoding='utf-8') as f:
             f.write(final_minutes)
         
         print(f"\n✅ 회의록 생성 완료: {minutes_path}")
+        if missing_batches:
+            print(f"⚠️ 응답을 받지 못한 배치 {len(missing_batches)}개는 회의록에 누락 표시를 남겼습니다: "
+                  f"{', '.join(map(str, missing_batches))}번")
         return minutes_path
         
     except Exception as e:
@@ -705,7 +1696,14 @@ def copy_to_clipboard(file_path):
        return False
 
 def get_audio_duration(file_path):
-   """오디오 파일의 재생 시간 확인"""
+   """오디오 파일의 재생 시간 확인 (확인할 수 없으면 1시간으로 가정, 배치 크기 조정 등 대략적인 용도)"""
+   duration = probe_audio_duration(file_path)
+   if duration is None:
+       return 3600  # 1시간으로 가정
+   return duration
+
+def probe_audio_duration(file_path):
+   """오디오 파일 헤더(WAV) 또는 ffprobe로 재생 시간 확인 (확인할 수 없으면 None)"""
    try:
        # WAV 파일 처리
        if file_path.lower().endswith('.wav'):
@@ -727,8 +1725,7 @@ def get_audio_duration(file_path):
            return float(result.stdout.strip())
    except Exception as e:
        print(f"오디오 길이 확인 중 오류: {e}")
-       # 기본값 반환 (안전하게 긴 값으로)
-       return 3600  # 1시간으로 가정
+       return None
 
 def main():
    import argparse
@@ -750,6 +1747,36 @@ def main():
                        help="전사 과정을 건너뛰고 기존 JSON 파일을 사용합니다")
    parser.add_argument("--json-path", "-jp", 
                        help="기존 Whisper JSON 파일 경로 (--skip-transcription 옵션 사용 시 필요)")
+   parser.add_argument("--token-budget", "-tb", type=int, default=0,
+                       help="요청당 토큰 예산(입력 + 예상 출력, 예: 30000) - 지정 시 세그먼트 수 대신 토큰 추정치로 배치 구성 (기본값: 0, 사용 안 함)")
+   parser.add_argument("--llm-base-url",
+                       help="Anthropic 호환 API 주소 (예: mock_llm_server.py의 http://127.0.0.1:8089)")
+   parser.add_argument("--llm-workers", "-lw", type=int, default=1,
+                       help="회의록 배치를 동시에 처리할 API 요청 수 (기본값: 1, 순차 처리)")
+   parser.add_argument("--cache-dir", 
+                       help="회의록 API 응답 캐시 디렉토리 (기본값: <출력 디렉토리>/.minutes_cache)")
+   parser.add_argument("--cache-max-mb", type=int, default=200,
+                       help="응답 캐시 최대 크기(MB), 초과 시 오래된 항목부터 삭제 (기본값: 200)")
+   parser.add_argument("--no-cache", action="store_true",
+                       help="회의록 API 응답 캐시를 사용하지 않음")
+   parser.add_argument("--window-minutes", "-wm", type=float, default=0,
+                       help="N분 단위 창으로 나누어 전사하고 창마다 체크포인트 저장 (기본값: 0, 한 번에 전사)")
+   parser.add_argument("--workers", "-w", type=int, default=1,
+                       help="무음 구간에서 자른 조각을 N개 프로세스로 동시에 전사 (프로세스마다 모델 로드, 기본값: 1)")
+   parser.add_argument("--server-socket", default=DEFAULT_SERVER_SOCKET,
+                       help=f"모델 서버(whisper_model_server.py) 소켓 경로 (기본값: {DEFAULT_SERVER_SOCKET})")
+   parser.add_argument("--no-server", action="store_true",
+                       help="모델 서버를 사용하지 않고 항상 모델을 직접 로드")
+   parser.add_argument("--stream-output", action="store_true",
+                       help="조각이 끝날 때마다 세그먼트 JSONL/SRT/TXT에 바로 기록 (긴 오디오에서도 메모리 사용량 일정)")
+   parser.add_argument("--compact-json", action="store_true",
+                       help="JSON 결과를 들여쓰기 없이 저장")
+   parser.add_argument("--vad", action="store_true",
+                       help="에너지 기반 음성 구간 검출로 무음 구간을 건너뛰고 음성 구간만 전사")
+   parser.add_argument("--vad-threshold-db", type=float,
+                       help="음성으로 판단할 프레임 에너지 기준(dBFS, 예: -40) - 미지정 시 배경 소음 기준 자동 결정")
+   parser.add_argument("--resume", action="store_true",
+                       help="체크포인트에서 마지막으로 완료된 창 이후부터 전사를 이어서 진행")
    parser.add_argument("--force-small-batch", "-fsb", action="store_true",
                        help="긴 오디오에 대해 작은 배치 크기 강제 적용 (15 세그먼트)")
    parser.add_argument("--no-clipboard", "-nc", action="store_true",
@@ -757,6 +1784,10 @@ def main():
    
    args = parser.parse_args()
    
+   if args.token_budget and args.token_budget < MIN_TOKEN_BUDGET:
+       print(f"\n❌ 오류: --token-budget은 {MIN_TOKEN_BUDGET} 이상이어야 합니다.")
+       sys.exit(1)
+   
    print("\n🎵 Whisper 오디오 전사 및 회의록 생성 도구")
    print("=" * 50)
    
@@ -795,26 +1826,42 @@ def main():
        audio_duration = get_audio_duration(args.audio)
        print(f"\n🎵 오디오 파일 길이: {int(audio_duration//60)}분 {int(audio_duration%60)}초")
        
-       if (audio_duration > 45 * 60 or args.force_small_batch) and args.batch_size > 15:
+       if not args.token_budget and (audio_duration > 45 * 60 or args.force_small_batch) and args.batch_size > 15:
            adjusted_batch = 15
            print(f"\n⚠️ 긴 오디오 감지됨 - 배치 크기를 {adjusted_batch}로 자동 조정합니다.")
            args.batch_size = adjusted_batch
        
        # 전사 실행
-       result, json_path = transcribe_audio(args.audio, args.output, args.model)
+       result, json_path = transcribe_audio(args.audio, args.output, args.model,
+                                            args.window_minutes * 60, args.resume, args.workers,
+                                            None if args.no_server else args.server_socket,
+                                            args.stream_output, args.compact_json,
+                                            args.vad, args.vad_threshold_db)
    
    # 회의록 생성
    if result and not args.no_minutes:
        # API 키 결정 (인자 > 환경 변수)
        api_key = args.api_key or os.environ.get("ANTHROPIC_API_KEY")
+       if not api_key and args.llm_base_url:
+           api_key = "local"  # 로컬 대역 서버는 키를 확인하지 않음
        
        if not api_key:
            print("\n❌ 회의록 생성을 위한 Anthropic API 키가 필요합니다.")
            print("--api-key 인자를 사용하거나 ANTHROPIC_API_KEY 환경 변수를 설정하세요.")
            sys.exit(1)
        
+       backend = AnthropicBackend(api_key, args.llm_base_url)
+       
+       # 응답 캐시 준비 (재실행 시 이미 성공한 배치는 API를 다시 호출하지 않음, 백엔드별로 구분)
+       cache = None
+       if not args.no_cache:
+           cache_dir = args.cache_dir or os.path.join(args.output, ".minutes_cache")
+           cache = MinutesCache(cache_dir, args.cache_max_mb * 1024 * 1024, backend.cache_id())
+       
        # 회의록 생성
-       minutes_path = generate_meeting_minutes(json_path, args.output, api_key, args.batch_size)
+       minutes_path = generate_meeting_minutes(json_path, args.output, api_key, args.batch_size, args.llm_workers, cache,
+                                              args.token_budget, backend)
+       backend.report()
        
        if minutes_path:
            print("\n✅ 전체 작업이 성공적으로 완료되었습니다!")